@@ -1,3 +1,48 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
-# Register your models here.
+from travel.paginator import EstimatedCountPaginator
+from .models import User, NewsletterSubscriber, NewsletterCampaign
+
+
+@admin.register(User)
+class UserAdmin(BaseUserAdmin):
+    """User admin for the email-based user model (no username field)"""
+    ordering = ('email',)
+    list_display = ('email', 'first_name', 'last_name', 'user_type', 'is_staff', 'date_joined')
+    list_filter = ('user_type', 'is_staff', 'is_active')
+    search_fields = ('email', 'first_name', 'last_name')
+    readonly_fields = ('date_joined', 'last_login')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    fieldsets = (
+        (None, {'fields': ('email', 'password')}),
+        ('Personal info', {'fields': ('first_name', 'last_name', 'phone', 'whatsapp', 'profile_picture')}),
+        ('Address', {'fields': ('address', 'city', 'state_province', 'zip_code', 'country')}),
+        ('Preferences', {'fields': ('subscribe_newsletter',)}),
+        ('Permissions', {'fields': ('user_type', 'is_active', 'is_staff', 'is_superuser', 'groups', 'user_permissions')}),
+        ('Important dates', {'fields': ('last_login', 'date_joined')}),
+    )
+    add_fieldsets = (
+        (None, {
+            'classes': ('wide',),
+            'fields': ('email', 'password1', 'password2'),
+        }),
+    )
+
+
+@admin.register(NewsletterSubscriber)
+class NewsletterSubscriberAdmin(admin.ModelAdmin):
+    list_display = ('email', 'status', 'segment', 'created_at', 'confirmed_at')
+    list_filter = ('status', 'segment')
+    search_fields = ('email',)
+    raw_id_fields = ('user',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(NewsletterCampaign)
+class NewsletterCampaignAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'segment', 'status', 'sent_count', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    readonly_fields = ('status', 'last_subscriber_id', 'sent_count', 'sent_at')
@@ -0,0 +1,46 @@
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import NewsletterCampaign
+from accounts.newsletter import send_campaign
+
+
+class Command(BaseCommand):
+    help = 'Send (or resume) a newsletter campaign to its active subscribers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('campaign_id', type=int)
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Messages per send_messages() call')
+        parser.add_argument('--rate', type=float, default=None,
+                            help='Maximum messages per second (0 disables throttling)')
+        parser.add_argument('--backend', default=None,
+                            help='Email backend path, e.g. django.core.mail.backends.filebased.EmailBackend')
+        parser.add_argument('--restart', action='store_true',
+                            help='Ignore the saved checkpoint and send from the first subscriber')
+
+    def handle(self, *args, **options):
+        try:
+            campaign = NewsletterCampaign.objects.get(pk=options['campaign_id'])
+        except NewsletterCampaign.DoesNotExist:
+            raise CommandError(f"Campaign {options['campaign_id']} does not exist")
+
+        if campaign.status == 'sent' and not options['restart']:
+            raise CommandError('Campaign has already been sent; use --restart to send it again')
+
+        if options['restart']:
+            campaign.last_subscriber_id = 0
+            campaign.sent_count = 0
+            campaign.save(update_fields=['last_subscriber_id', 'sent_count'])
+        elif campaign.last_subscriber_id:
+            self.stdout.write(f'Resuming after subscriber #{campaign.last_subscriber_id}')
+
+        connection = get_connection(options['backend']) if options['backend'] else None
+        sent = send_campaign(
+            campaign,
+            batch_size=options['batch_size'],
+            rate=options['rate'],
+            connection=connection,
+            stdout=self.stdout,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Campaign "{campaign}" sent to {sent} subscribers.'))
@@ -65,4 +65,65 @@ class User(AbstractUser):
     objects = UserManager()
     
     def __str__(self):
-        return self.email
\ No newline at end of file
+        return self.email
+
+class NewsletterSubscriber(models.Model):
+    """Newsletter address with double opt-in, keyed on the normalized email"""
+    STATUS_CHOICES = (
+        ('pending', 'Pending Confirmation'),
+        ('active', 'Active'),
+        ('unsubscribed', 'Unsubscribed'),
+    )
+    
+    email = models.EmailField(unique=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    segment = models.CharField(max_length=50, default='general')
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                             related_name='newsletter_subscriptions')
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    confirmed_at = models.DateTimeField(null=True, blank=True)
+    unsubscribed_at = models.DateTimeField(null=True, blank=True)
+    
+    @staticmethod
+    def normalize(email):
+        """Normalize an address so duplicates collapse onto one row"""
+        return (email or '').strip().lower()
+    
+    def save(self, *args, **kwargs):
+        self.email = self.normalize(self.email)
+        super().save(*args, **kwargs)
+    
+    def __str__(self):
+        return f"{self.email} ({self.status})"
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'segment', 'id']),
+        ]
+
+class NewsletterCampaign(models.Model):
+    """A newsletter mailing, with a checkpoint so interrupted sends can resume"""
+    STATUS_CHOICES = (
+        ('draft', 'Draft'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+    )
+    
+    subject = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    template_name = models.CharField(max_length=200, default='newsletter/campaign')
+    segment = models.CharField(max_length=50, blank=True)  # Blank sends to every segment
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
+    last_subscriber_id = models.BigIntegerField(default=0)  # Resume checkpoint
+    sent_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return self.subject
+    
+    class Meta:
+        ordering = ['-created_at']
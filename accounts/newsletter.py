@@ -0,0 +1,200 @@
+"""
+Newsletter subscriptions and batched campaign sending.
+
+Campaign bodies are rendered once per segment, then sent in batches over a
+single reused SMTP connection with ``send_messages``. Progress is
+checkpointed on the campaign so a crashed run resumes where it stopped.
+"""
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core import signing
+from django.core.mail import EmailMultiAlternatives, get_connection, send_mail
+from django.db import IntegrityError, transaction
+from django.template import TemplateDoesNotExist
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import NewsletterCampaign, NewsletterSubscriber
+
+CONFIRM_SALT = 'accounts.newsletter.confirm'
+UNSUBSCRIBE_SALT = 'accounts.newsletter.unsubscribe'
+UNSUBSCRIBE_PLACEHOLDER = '__UNSUBSCRIBE_URL__'
+
+
+def _absolute_url(path):
+    return getattr(settings, 'NEWSLETTER_BASE_URL', 'http://localhost:8000').rstrip('/') + path
+
+
+def make_token(email, salt):
+    return signing.dumps(NewsletterSubscriber.normalize(email), salt=salt)
+
+
+def read_token(token, salt, max_age=None):
+    """Return the email in a signed token, or None if it is invalid or expired"""
+    try:
+        return signing.loads(token, salt=salt, max_age=max_age)
+    except signing.BadSignature:
+        return None
+
+
+def unsubscribe_url(email):
+    return _absolute_url(reverse('newsletter_unsubscribe', args=[make_token(email, UNSUBSCRIBE_SALT)]))
+
+
+def subscribe(email, user=None):
+    """Register an address and send the opt-in email, after commit, if it is not yet active"""
+    email = NewsletterSubscriber.normalize(email)
+    try:
+        subscriber, created = NewsletterSubscriber.objects.get_or_create(email=email, defaults={'user': user})
+    except IntegrityError:
+        # A double submit inserted the same address between our lookup and insert
+        subscriber = NewsletterSubscriber.objects.get(email=email)
+    if subscriber.status == 'active':
+        return subscriber
+    if subscriber.status == 'unsubscribed':
+        NewsletterSubscriber.objects.filter(pk=subscriber.pk).update(status='pending', unsubscribed_at=None)
+        subscriber.status = 'pending'
+
+    confirm_url = _absolute_url(reverse('newsletter_confirm', args=[make_token(subscriber.email, CONFIRM_SALT)]))
+    context = {'subscriber': subscriber, 'confirm_url': confirm_url}
+    # Never mail an opt-in link for a row that a surrounding transaction then rolls back
+    transaction.on_commit(partial(
+        send_mail,
+        render_to_string('accounts/newsletter_confirm_subject.txt', context).strip(),
+        render_to_string('accounts/newsletter_confirm_email.txt', context),
+        settings.DEFAULT_FROM_EMAIL,
+        [subscriber.email],
+    ))
+    return subscriber
+
+
+def confirm(token):
+    """Activate the subscriber named by a confirmation token"""
+    max_age = getattr(settings, 'NEWSLETTER_CONFIRM_MAX_AGE', 7 * 24 * 3600)
+    email = read_token(token, CONFIRM_SALT, max_age=max_age)
+    if email is None:
+        return False
+    subscribers = NewsletterSubscriber.objects.filter(email=email)
+    if not subscribers.exists():
+        return False
+    subscribers.exclude(status='active').update(status='active', confirmed_at=timezone.now())
+    return True
+
+
+def unsubscribe(token):
+    """Unsubscribe the address named by an unsubscribe token"""
+    email = read_token(token, UNSUBSCRIBE_SALT)
+    if email is None:
+        return False
+    NewsletterSubscriber.objects.filter(email=email).exclude(status='unsubscribed').update(
+        status='unsubscribed', unsubscribed_at=timezone.now(),
+    )
+    return True
+
+
+def sync_user_subscription(user):
+    """Mirror ``User.subscribe_newsletter`` onto the subscriber table"""
+    email = NewsletterSubscriber.normalize(user.email)
+    if user.subscribe_newsletter:
+        # The account email is already verified by login, so no opt-in mail is needed
+        subscriber, created = NewsletterSubscriber.objects.get_or_create(
+            email=email,
+            defaults={'user': user, 'status': 'active', 'confirmed_at': timezone.now()},
+        )
+        if not created and (subscriber.status != 'active' or subscriber.user_id != user.pk):
+            NewsletterSubscriber.objects.filter(pk=subscriber.pk).update(
+                status='active', user=user, confirmed_at=subscriber.confirmed_at or timezone.now(),
+                unsubscribed_at=None,
+            )
+    else:
+        NewsletterSubscriber.objects.filter(email=email, status='active').update(
+            status='unsubscribed', unsubscribed_at=timezone.now(),
+        )
+
+
+def _render_segment(campaign, segment):
+    """Render the campaign once for a segment, leaving a per-recipient placeholder"""
+    context = {'campaign': campaign, 'segment': segment, 'unsubscribe_url': UNSUBSCRIBE_PLACEHOLDER}
+    text = render_to_string(f'{campaign.template_name}.txt', context)
+    try:
+        html = render_to_string(f'{campaign.template_name}.html', context)
+    except TemplateDoesNotExist:
+        html = None
+    return text, html
+
+
+def send_campaign(campaign, batch_size=None, rate=None, connection=None, stdout=None):
+    """Send a campaign to its active subscribers, resuming from the last checkpoint.
+
+    ``rate`` caps messages per second; ``connection`` overrides the configured
+    email backend (e.g. a console or file backend for testing).
+    """
+    batch_size = batch_size or getattr(settings, 'NEWSLETTER_BATCH_SIZE', 100)
+    rate = rate if rate is not None else getattr(settings, 'NEWSLETTER_SEND_RATE', 0)
+    connection = connection or get_connection()
+
+    recipients = NewsletterSubscriber.objects.filter(status='active')
+    if campaign.segment:
+        recipients = recipients.filter(segment=campaign.segment)
+
+    NewsletterCampaign.objects.filter(pk=campaign.pk).update(status='sending')
+    rendered = {}
+    sent = 0
+
+    connection.open()
+    try:
+        while True:
+            batch = list(
+                recipients.filter(id__gt=campaign.last_subscriber_id)
+                .order_by('id')
+                .values_list('id', 'email', 'segment')[:batch_size]
+            )
+            if not batch:
+                break
+
+            started = time.monotonic()
+            messages = []
+            for subscriber_id, email, segment in batch:
+                if segment not in rendered:
+                    rendered[segment] = _render_segment(campaign, segment)
+                text, html = rendered[segment]
+                link = unsubscribe_url(email)
+                message = EmailMultiAlternatives(
+                    campaign.subject,
+                    text.replace(UNSUBSCRIBE_PLACEHOLDER, link),
+                    settings.DEFAULT_FROM_EMAIL,
+                    [email],
+                    connection=connection,
+                    headers={'List-Unsubscribe': f'<{link}>'},
+                )
+                if html is not None:
+                    message.attach_alternative(html.replace(UNSUBSCRIBE_PLACEHOLDER, link), 'text/html')
+                messages.append(message)
+
+            connection.send_messages(messages)
+
+            # Checkpoint after every batch so a crash resends at most one batch
+            campaign.last_subscriber_id = batch[-1][0]
+            campaign.sent_count += len(batch)
+            NewsletterCampaign.objects.filter(pk=campaign.pk).update(
+                last_subscriber_id=campaign.last_subscriber_id,
+                sent_count=campaign.sent_count,
+            )
+            sent += len(batch)
+            if stdout is not None:
+                stdout.write(f'Sent {campaign.sent_count} messages (checkpoint #{campaign.last_subscriber_id})')
+
+            if rate:
+                remaining = len(batch) / rate - (time.monotonic() - started)
+                if remaining > 0:
+                    time.sleep(remaining)
+    finally:
+        connection.close()
+
+    campaign.status = 'sent'
+    campaign.sent_at = timezone.now()
+    NewsletterCampaign.objects.filter(pk=campaign.pk).update(status='sent', sent_at=campaign.sent_at)
+    return sent
@@ -1,3 +1,31 @@
+from unittest import mock
+
+from django.core import mail
+from django.db import IntegrityError
 from django.test import TestCase
 
-# Create your tests here.
+from . import newsletter
+from .models import NewsletterSubscriber
+
+
+class NewsletterSubscribeTests(TestCase):
+    def test_opt_in_email_is_sent_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            subscriber = newsletter.subscribe(' Guest@Example.com ')
+        self.assertEqual(len(mail.outbox), 0)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(mail.outbox[0].to, ['guest@example.com'])
+
+        token = newsletter.make_token(subscriber.email, newsletter.CONFIRM_SALT)
+        self.assertTrue(newsletter.confirm(token))
+        self.assertEqual(NewsletterSubscriber.objects.get().status, 'active')
+
+    def test_double_submit_race_reuses_the_row(self):
+        existing = NewsletterSubscriber.objects.create(email='guest@example.com')
+        with mock.patch.object(NewsletterSubscriber.objects, 'get_or_create', side_effect=IntegrityError), \
+                self.captureOnCommitCallbacks(execute=True):
+            subscriber = newsletter.subscribe('guest@example.com')
+        self.assertEqual(subscriber.pk, existing.pk)
+        self.assertEqual(NewsletterSubscriber.objects.count(), 1)
+        self.assertEqual(len(mail.outbox), 1)
@@ -27,4 +27,8 @@ urlpatterns = [
     # User profile management
     path('profile/', views.profile, name='profile'),
     path('profile/edit/', views.edit_profile, name='edit_profile'),
+    
+    # Newsletter double opt-in
+    path('newsletter/confirm/<str:token>/', views.newsletter_confirm, name='newsletter_confirm'),
+    path('newsletter/unsubscribe/<str:token>/', views.newsletter_unsubscribe, name='newsletter_unsubscribe'),
 ]
\ No newline at end of file
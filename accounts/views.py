@@ -4,9 +4,15 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import AuthenticationForm
 
+from sanskruti_travels.querybudget import query_budget
+from sanskruti_travels.ratelimit import rate_limit
+
 from .models import User
 from .forms import UserRegisterForm, UserProfileForm
+from . import newsletter
 
+@query_budget(10)
+@rate_limit('register')
 def register(request):
     """View for user registration"""
     if request.method == 'POST':
@@ -21,6 +27,8 @@ def register(request):
     
     return render(request, 'accounts/register.html', {'form': form})
 
+@query_budget(10)
+@rate_limit('login')
 def login_view(request):
     """View for user login"""
     if request.method == 'POST':
@@ -44,6 +52,7 @@ def login_view(request):
     
     return render(request, 'accounts/login.html', {'form': form})
 
+@query_budget(6)
 @login_required
 def profile(request):
     """View for user profile"""
@@ -55,13 +64,16 @@ def profile(request):
     }
     return render(request, 'accounts/profile.html', context)
 
+@query_budget(10)
 @login_required
 def edit_profile(request):
     """View for editing user profile"""
     if request.method == 'POST':
         form = UserProfileForm(request.POST, request.FILES, instance=request.user)
         if form.is_valid():
-            form.save()
+            user = form.save()
+            if 'subscribe_newsletter' in form.changed_data:
+                newsletter.sync_user_subscription(user)
             messages.success(request, 'Your profile has been updated successfully!')
             return redirect('profile')
     else:
@@ -70,4 +82,22 @@ def edit_profile(request):
     context = {
         'form': form,
     }
-    return render(request, 'accounts/edit_profile.html', context)
\ No newline at end of file
+    return render(request, 'accounts/edit_profile.html', context)
+
+@query_budget(6)
+def newsletter_confirm(request, token):
+    """Confirm a newsletter subscription from the opt-in email link"""
+    if newsletter.confirm(token):
+        messages.success(request, 'Your newsletter subscription is confirmed. Thank you!')
+    else:
+        messages.error(request, 'This confirmation link is invalid or has expired.')
+    return redirect('home')
+
+@query_budget(6)
+def newsletter_unsubscribe(request, token):
+    """Unsubscribe from the newsletter via the link in a campaign email"""
+    if newsletter.unsubscribe(token):
+        messages.success(request, 'You have been unsubscribed from our newsletter.')
+    else:
+        messages.error(request, 'This unsubscribe link is invalid.')
+    return redirect('home')
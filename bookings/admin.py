@@ -1,3 +1,129 @@
 from django.contrib import admin
+from django.utils import timezone
 
-# Register your models here.
+from travel.paginator import EstimatedCountPaginator
+from . import spam
+from .models import Booking, CustomTourRequest, ContactInquiry, ArchivedBooking, ArchivedInquiry
+
+
+def status_transition(target, allowed_from, description):
+    """Build an admin action that moves rows to ``target`` in a single UPDATE"""
+    def action(modeladmin, request, queryset):
+        # Rows whose current status doesn't allow the transition are left untouched.
+        # update() skips auto_now, so modified_date is set explicitly.
+        updated = queryset.filter(status__in=allowed_from).update(status=target, modified_date=timezone.now())
+        modeladmin.message_user(request, f'{updated} marked as {target}.')
+
+    action.__name__ = f'mark_{target}'
+    return admin.action(description=description)(action)
+
+
+def verdict_action(kind, verdict, allowed_from, description):
+    """Like status_transition, but also records the verdict so similar later submissions follow it"""
+    def action(modeladmin, request, queryset):
+        ids = list(queryset.filter(status__in=allowed_from).values_list('id', flat=True))
+        updated = spam.mark(kind, ids, verdict) if ids else 0
+        modeladmin.message_user(request, f'{updated} marked as {verdict}.')
+
+    action.__name__ = f'mark_{verdict}'
+    return admin.action(description=description)(action)
+
+
+def detection_actions(kind):
+    """Admin actions to run duplicate/spam detection on, or merge, the selected submissions"""
+    @admin.action(description='Check selected for duplicates and spam')
+    def detect_duplicates(modeladmin, request, queryset):
+        verdicts = spam.process(kind, queryset)
+        summary = ', '.join(f'{count} {verdict}' for verdict, count in verdicts.items()) or 'nothing new found'
+        modeladmin.message_user(request, f'Checked: {summary}.')
+
+    @admin.action(description='Merge selected into the oldest as duplicates')
+    def merge_duplicates(modeladmin, request, queryset):
+        ids = list(queryset.values_list('id', flat=True))
+        keep = spam.merge(kind, ids)
+        modeladmin.message_user(request, f'{len(ids) - 1} merged into #{keep}.' if keep else 'Nothing selected.')
+
+    return [detect_duplicates, merge_duplicates]
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist defaults for tables that grow without bound"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+
+@admin.register(Booking)
+class BookingAdmin(LargeTableAdmin):
+    list_display = ('id', 'name', 'email', 'package', 'travel_date', 'number_of_adults',
+                    'number_of_children', 'total_price', 'status', 'booking_date')
+    list_select_related = ('package',)
+    list_filter = ('status',)
+    date_hierarchy = 'booking_date'
+    search_fields = ('=id', 'email', 'name')
+    autocomplete_fields = ('package',)
+    raw_id_fields = ('user',)
+    readonly_fields = ('booking_date', 'modified_date')
+    actions = [
+        status_transition('confirmed', ['pending'], 'Confirm selected pending bookings'),
+        status_transition('completed', ['confirmed'], 'Mark selected confirmed bookings as completed'),
+        status_transition('cancelled', ['pending', 'confirmed'], 'Cancel selected bookings'),
+    ]
+
+
+@admin.register(CustomTourRequest)
+class CustomTourRequestAdmin(LargeTableAdmin):
+    list_display = ('id', 'name', 'email', 'destination', 'start_date', 'end_date', 'budget',
+                    'status', 'request_date')
+    list_filter = ('status',)
+    date_hierarchy = 'request_date'
+    search_fields = ('=id', 'email', 'name')
+    raw_id_fields = ('user',)
+    readonly_fields = ('request_date', 'modified_date')
+    actions = [
+        status_transition('processing', ['pending'], 'Mark selected requests as processing'),
+        status_transition('completed', ['pending', 'processing'], 'Mark selected requests as completed'),
+        status_transition('cancelled', ['pending', 'processing'], 'Cancel selected requests'),
+        verdict_action('custom_tour', 'spam', ['pending', 'processing'], 'Mark selected requests as spam'),
+        *detection_actions('custom_tour'),
+    ]
+
+
+@admin.register(ContactInquiry)
+class ContactInquiryAdmin(LargeTableAdmin):
+    list_display = ('id', 'name', 'email', 'subject', 'status', 'submission_date')
+    list_filter = ('status',)
+    date_hierarchy = 'submission_date'
+    search_fields = ('=id', 'email', 'name')
+    raw_id_fields = ('user',)
+    readonly_fields = ('submission_date', 'modified_date')
+    actions = [
+        status_transition('read', ['unread'], 'Mark selected inquiries as read'),
+        status_transition('replied', ['unread', 'read'], 'Mark selected inquiries as replied'),
+        verdict_action('contact', 'spam', ['unread', 'read'], 'Mark selected inquiries as spam'),
+        *detection_actions('contact'),
+    ]
+
+
+class ArchiveAdmin(LargeTableAdmin):
+    """Archived rows are read-only; they are only written by the archive_records command"""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedBooking)
+class ArchivedBookingAdmin(ArchiveAdmin):
+    list_display = ('id', 'name', 'email', 'package_title', 'travel_date', 'total_price', 'status', 'booking_date')
+    list_filter = ('status',)
+    search_fields = ('=id', 'email')
+
+
+@admin.register(ArchivedInquiry)
+class ArchivedInquiryAdmin(ArchiveAdmin):
+    list_display = ('original_id', 'kind', 'name', 'email', 'status', 'submitted_at', 'archived_at')
+    list_filter = ('kind', 'status')
+    search_fields = ('=original_id', 'email')
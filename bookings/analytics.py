@@ -0,0 +1,240 @@
+"""
+Booking analytics from daily rollups.
+
+``BookingDailyRollup`` holds one row per (local booking day, package):
+booking, adult and child counts, ``total_price`` sums and a status breakdown.
+Reports read only this table, never ``Booking``.
+
+``refresh()`` is incremental:
+- It finds the booking days of bookings whose ``modified_date`` is past
+  the ``RollupWatermark``.
+- It recomputes every package's group on those days from live plus
+  archived bookings and replaces them in one transaction, then moves the
+  watermark. Recomputing whole days means a booking moved to another
+  package also leaves its old package's group.
+- Each run re-reads ``ANALYTICS_WATERMARK_OVERLAP`` seconds before the
+  watermark, so rows committed late with an earlier timestamp are not lost.
+- Recomputing a group is idempotent, so the overlap costs nothing in
+  correctness.
+
+Archiving moves rows between tables without changing totals. Source scans
+run on ``ANALYTICS_SOURCE_DATABASE``, e.g. a replica. Bookings deleted
+outright are not seen by ``refresh()``; ``check()`` finds the affected
+groups and ``rebuild()`` fixes them.
+"""
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from travel.models import Country, Package, State
+from .models import ArchivedBooking, Booking, BookingDailyRollup, RollupWatermark
+
+WATERMARK = 'booking_daily'
+COUNT_FIELDS = ('bookings', 'adults', 'children', 'pending', 'confirmed', 'completed', 'cancelled')
+PRICE_FIELDS = ('total_price', 'cancelled_price')
+ROLLUP_FIELDS = COUNT_FIELDS + PRICE_FIELDS
+MAX_GAP_DAYS = 7  # Changed days closer than this are recomputed with one range scan
+REBUILD_CHUNK_DAYS = 31
+
+GROUPINGS = {
+    'package': 'package',
+    'state': 'state',
+    'country': 'country',
+    'type': 'package_type',
+    'month': 'month',
+}
+
+
+def _source(model):
+    return model.objects.using(getattr(settings, 'ANALYTICS_SOURCE_DATABASE', 'default')).order_by()
+
+
+def _day_range(first, last):
+    """Aware [start, end) datetimes covering local days ``first`` to ``last`` inclusive"""
+    tz = timezone.get_current_timezone()
+    return (datetime.combine(first, time.min, tzinfo=tz),
+            datetime.combine(last + timedelta(days=1), time.min, tzinfo=tz))
+
+
+def compute(first, last):
+    """{(day, package_id): totals} from live and archived bookings made on local days first..last"""
+    start, end = _day_range(first, last)
+    totals = {}
+    for model in (Booking, ArchivedBooking):
+        queryset = _source(model).filter(booking_date__gte=start, booking_date__lt=end)
+        rows = queryset.annotate(day=TruncDate('booking_date')).values('day', 'package_id').annotate(
+            bookings=Count('id'),
+            adults=Sum('number_of_adults'),
+            children=Sum('number_of_children'),
+            price=Sum('total_price'),  # Annotations may not reuse the field's own name
+            cancelled_price=Sum('total_price', filter=Q(status='cancelled')),
+            **{status: Count('id', filter=Q(status=status)) for status in ('pending', 'confirmed', 'completed', 'cancelled')},
+        )
+        for row in rows:
+            row['total_price'] = row.pop('price')
+            entry = totals.setdefault((row['day'], row['package_id']), {
+                **dict.fromkeys(COUNT_FIELDS, 0), **dict.fromkeys(PRICE_FIELDS, Decimal('0.00')),
+            })
+            for name in ROLLUP_FIELDS:
+                entry[name] += row[name] or 0
+    return totals
+
+
+def _store(first, last, totals):
+    """Replace the rollups for days first..last with ``totals``"""
+    ids = {package_id for day, package_id in totals} - {None}
+    packages = {
+        pk: (state_id, country_id, package_type)
+        for pk, state_id, country_id, package_type in Package.objects.filter(id__in=ids).values_list(
+            'id', 'state_id', 'country_id', 'type',
+        )
+    }
+    rows = []
+    for (day, package_id), values in totals.items():
+        state_id, country_id, package_type = packages.get(package_id, (None, None, ''))
+        rows.append(BookingDailyRollup(
+            day=day, package_id=package_id, state_id=state_id, country_id=country_id,
+            package_type=package_type, **values,
+        ))
+    scope = BookingDailyRollup.objects.filter(day__gte=first, day__lte=last)
+    with transaction.atomic():
+        scope.delete()
+        BookingDailyRollup.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def _clusters(days):
+    """Split sorted days into (first, last) runs with gaps of at most MAX_GAP_DAYS"""
+    runs = []
+    for day in sorted(days):
+        if runs and (day - runs[-1][1]).days <= MAX_GAP_DAYS:
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return runs
+
+
+def refresh(now=None):
+    """Fold bookings changed since the watermark into the rollups; returns groups rewritten"""
+    now = now or timezone.now()
+    watermark, created = RollupWatermark.objects.get_or_create(name=WATERMARK)
+    if watermark.value is None:
+        return rebuild(now=now)
+
+    since = watermark.value - timedelta(seconds=getattr(settings, 'ANALYTICS_WATERMARK_OVERLAP', 300))
+    touched = _source(Booking).filter(modified_date__gt=since, modified_date__lte=now).annotate(
+        day=TruncDate('booking_date'),
+    ).values_list('day', flat=True).distinct()
+
+    written = 0
+    for first, last in _clusters(touched):
+        # The booking's previous package isn't known, so every package on these days is recomputed
+        written += _store(first, last, compute(first, last))
+
+    watermark.value = now
+    watermark.save(update_fields=['value', 'updated_at'])
+    return written
+
+
+def _booking_days():
+    """(first, last) local booking day across live and archived bookings, or None"""
+    bounds = []
+    for model in (Booking, ArchivedBooking):
+        bounds.extend(_source(model).aggregate(first=Min('booking_date'), last=Max('booking_date')).values())
+    bounds = [timezone.localdate(value) for value in bounds if value is not None]
+    return (min(bounds), max(bounds)) if bounds else None
+
+
+def rebuild(first=None, last=None, now=None, progress=None):
+    """Recompute every rollup for local days first..last (default: all bookings); returns rows written"""
+    now = now or timezone.now()
+    full = first is None and last is None
+    if first is None or last is None:
+        span = _booking_days()
+        if span is None:
+            span = (timezone.localdate(now),) * 2
+        first, last = first or span[0], last or span[1]
+
+    written = 0
+    start = first
+    while start <= last:
+        end = min(start + timedelta(days=REBUILD_CHUNK_DAYS - 1), last)
+        written += _store(start, end, compute(start, end))
+        if progress is not None:
+            progress(start, end, written)
+        start = end + timedelta(days=1)
+
+    # Only a full rebuild may move the watermark: a partial one says nothing about other days
+    if full:
+        RollupWatermark.objects.update_or_create(name=WATERMARK, defaults={'value': now})
+    return written
+
+
+@dataclass
+class Mismatch:
+    day: object
+    package_id: int
+    field: str
+    rollup: object
+    source: object
+
+
+def check(first, last):
+    """Compare rollups for days first..last against the source tables; returns a list of Mismatch"""
+    mismatches = []
+    start = first
+    while start <= last:
+        end = min(start + timedelta(days=REBUILD_CHUNK_DAYS - 1), last)
+        source = compute(start, end)
+        stored = {
+            (row['day'], row['package_id']): row
+            for row in BookingDailyRollup.objects.filter(day__gte=start, day__lte=end).values('day', 'package_id', *ROLLUP_FIELDS)
+        }
+        zero = {name: 0 for name in ROLLUP_FIELDS}
+        for key in sorted(source.keys() | stored.keys(), key=lambda key: (key[0], key[1] or 0)):
+            expected, actual = source.get(key, zero), stored.get(key, zero)
+            for name in ROLLUP_FIELDS:
+                if expected[name] != actual[name]:
+                    mismatches.append(Mismatch(key[0], key[1], name, actual[name], expected[name]))
+        start = end + timedelta(days=1)
+    return mismatches
+
+
+def last_refreshed():
+    return RollupWatermark.objects.filter(name=WATERMARK).values_list('value', flat=True).first()
+
+
+def report(group, first, last):
+    """Totals per package, state, country, package type or month for days first..last, from rollups only"""
+    key = GROUPINGS[group]
+    queryset = BookingDailyRollup.objects.filter(day__gte=first, day__lte=last).order_by()
+    if key == 'month':
+        queryset = queryset.annotate(month=TruncMonth('day'))
+    rows = list(queryset.values(key).annotate(**{f'sum_{name}': Sum(name) for name in ROLLUP_FIELDS}).order_by(key))
+
+    labels = {}
+    if key in ('package', 'state', 'country'):
+        model, label_field = {'package': (Package, 'title'), 'state': (State, 'name'), 'country': (Country, 'name')}[key]
+        labels = dict(model.objects.filter(id__in=[row[key] for row in rows if row[key]]).values_list('id', label_field))
+    for row in rows:
+        for name in ROLLUP_FIELDS:
+            row[name] = row.pop(f'sum_{name}') or 0
+        value = row[key]
+        if key == 'month':
+            row['label'] = value.strftime('%Y-%m')
+        elif key == 'package_type':
+            row['label'] = value or 'unknown'
+        else:
+            row['label'] = labels.get(value, f'#{value} (deleted)' if value else 'none')
+        row['travellers'] = row['adults'] + row['children']
+        row['revenue'] = row['total_price'] - row['cancelled_price']
+        row['cancellation_rate'] = row['cancelled'] / row['bookings'] if row['bookings'] else 0
+    if key != 'month':
+        rows.sort(key=lambda row: row['revenue'], reverse=True)
+    return rows
@@ -0,0 +1,158 @@
+"""
+Retention for bookings and inquiries.
+
+Old completed/cancelled bookings and handled inquiries are moved into the
+archive tables in small batches, each in its own short transaction, so the
+live tables stay small without holding long locks. Copies are inserted
+without ignoring conflicts: a clash aborts the batch, originals included,
+rather than deleting rows that were never archived. Archived bookings stay
+visible to their owners through ``get_user_booking`` / ``user_booking_list``.
+"""
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.forms.models import model_to_dict
+from django.http import Http404
+from django.utils import timezone
+
+from .models import ArchivedBooking, ArchivedInquiry, Booking, ContactInquiry, CustomTourRequest
+
+BOOKING_ARCHIVE_STATUSES = ('completed', 'cancelled')
+CONTACT_ARCHIVE_STATUSES = ('replied', 'spam', 'duplicate')
+CUSTOM_TOUR_ARCHIVE_STATUSES = ('completed', 'cancelled', 'spam', 'duplicate')
+
+
+@dataclass
+class ArchiveReport:
+    """Rows and approximate payload bytes moved per source table"""
+    rows: dict = field(default_factory=dict)
+    bytes: dict = field(default_factory=dict)
+
+    def add(self, label, rows, size):
+        self.rows[label] = self.rows.get(label, 0) + rows
+        self.bytes[label] = self.bytes.get(label, 0) + size
+
+
+def _row_size(values):
+    return len(json.dumps(values, cls=DjangoJSONEncoder))
+
+
+def _cutoff(days):
+    return timezone.now() - timedelta(days=days)
+
+
+def _archive_in_batches(queryset, copy_batch, label, report, batch_size, pause, dry_run):
+    """Repeatedly take the oldest ``batch_size`` ids, copy them and delete the originals"""
+    last_id = 0
+    while True:
+        ids = list(queryset.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        last_id = ids[-1]
+
+        with transaction.atomic():
+            # Lock just this batch and re-check it still matches, in case it changed since the id scan
+            rows = list(queryset.select_for_update(of=('self',)).filter(id__in=ids))
+            size = copy_batch(rows, dry_run)
+            if not dry_run:
+                queryset.model.objects.filter(id__in=[row.id for row in rows]).delete()
+        report.add(label, len(rows), size)
+
+        if pause:
+            time.sleep(pause)
+
+
+def _copy_bookings(rows, dry_run):
+    archived = []
+    size = 0
+    for booking in rows:
+        values = model_to_dict(booking, exclude=['package', 'user'])
+        values.update(
+            id=booking.id,
+            package_id=booking.package_id,
+            user_id=booking.user_id,
+            booking_date=booking.booking_date,
+            modified_date=booking.modified_date,
+        )
+        size += _row_size(values)
+        archived.append(ArchivedBooking(package_title=booking.package.title, **values))
+    if not dry_run:
+        ArchivedBooking.objects.bulk_create(archived)
+    return size
+
+
+def _inquiry_copier(kind, date_field):
+    def copy(rows, dry_run):
+        archived = []
+        size = 0
+        for row in rows:
+            data = model_to_dict(row, exclude=['id', 'name', 'email', 'status', 'user'])
+            data['modified_date'] = row.modified_date
+            data = json.loads(json.dumps(data, cls=DjangoJSONEncoder))
+            size += _row_size(data)
+            archived.append(ArchivedInquiry(
+                kind=kind,
+                original_id=row.id,
+                name=row.name,
+                email=row.email,
+                status=row.status,
+                submitted_at=getattr(row, date_field),
+                user_id=row.user_id,
+                data=data,
+            ))
+        if not dry_run:
+            ArchivedInquiry.objects.bulk_create(archived)
+        return size
+    return copy
+
+
+def archive_old_records(booking_days=None, inquiry_days=None, batch_size=None, pause=0, dry_run=False):
+    """Archive everything past its retention age and return an ``ArchiveReport``"""
+    booking_days = booking_days or getattr(settings, 'RETENTION_BOOKING_DAYS', 730)
+    inquiry_days = inquiry_days or getattr(settings, 'RETENTION_INQUIRY_DAYS', 365)
+    batch_size = batch_size or getattr(settings, 'RETENTION_BATCH_SIZE', 500)
+    report = ArchiveReport()
+
+    _archive_in_batches(
+        Booking.objects.select_related('package').filter(
+            status__in=BOOKING_ARCHIVE_STATUSES, modified_date__lt=_cutoff(booking_days),
+        ),
+        _copy_bookings, 'bookings', report, batch_size, pause, dry_run,
+    )
+    _archive_in_batches(
+        ContactInquiry.objects.filter(
+            status__in=CONTACT_ARCHIVE_STATUSES, modified_date__lt=_cutoff(inquiry_days),
+        ),
+        _inquiry_copier('contact', 'submission_date'), 'contact inquiries', report, batch_size, pause, dry_run,
+    )
+    _archive_in_batches(
+        CustomTourRequest.objects.filter(
+            status__in=CUSTOM_TOUR_ARCHIVE_STATUSES, modified_date__lt=_cutoff(inquiry_days),
+        ),
+        _inquiry_copier('custom_tour', 'request_date'), 'custom tour requests', report, batch_size, pause, dry_run,
+    )
+    return report
+
+
+def get_user_booking(user, booking_id):
+    """Return a live or archived booking owned by ``user``, or raise Http404"""
+    booking = Booking.objects.select_related('package').filter(id=booking_id, user=user).first()
+    if booking is None:
+        booking = ArchivedBooking.objects.select_related('package').filter(id=booking_id, user=user).first()
+    if booking is None:
+        raise Http404('No booking matches the given query.')
+    return booking
+
+
+def user_booking_list(user):
+    """All of a user's bookings, live and archived, newest first"""
+    live = list(Booking.objects.select_related('package').filter(user=user).order_by('-booking_date'))
+    archived = list(ArchivedBooking.objects.select_related('package').filter(user=user).order_by('-booking_date'))
+    if not archived:
+        return live
+    return sorted(live + archived, key=lambda booking: booking.booking_date, reverse=True)
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from bookings.archive import archive_old_records
+
+
+class Command(BaseCommand):
+    help = 'Move old completed/cancelled bookings and handled inquiries into the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--booking-days', type=int, default=None,
+                            help='Archive bookings last modified more than this many days ago')
+        parser.add_argument('--inquiry-days', type=int, default=None,
+                            help='Archive inquiries last modified more than this many days ago')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Rows moved per transaction')
+        parser.add_argument('--pause', type=float, default=0.1,
+                            help='Seconds to sleep between batches to give other writers room')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report what would be archived without changing anything')
+
+    def handle(self, *args, **options):
+        report = archive_old_records(
+            booking_days=options['booking_days'],
+            inquiry_days=options['inquiry_days'],
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            dry_run=options['dry_run'],
+        )
+
+        prefix = 'Would archive' if options['dry_run'] else 'Archived'
+        for label, rows in report.rows.items():
+            self.stdout.write(f'{prefix} {rows} {label} ({report.bytes[label] / 1024:.1f} KiB of row data)')
+        total_rows = sum(report.rows.values())
+        total_bytes = sum(report.bytes.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix} {total_rows} rows in total, reclaiming about {total_bytes / 1024:.1f} KiB.'
+        ))
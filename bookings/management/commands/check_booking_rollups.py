@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from bookings import analytics
+
+
+class Command(BaseCommand):
+    help = 'Compare the daily booking rollups with the live and archived booking tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=35, help='Check this many days up to today')
+        parser.add_argument('--start', help='First local booking day to check (YYYY-MM-DD); overrides --days')
+        parser.add_argument('--end', help='Last day to check (default today)')
+        parser.add_argument('--repair', action='store_true', help='Recompute the days that disagree')
+
+    def handle(self, *args, **options):
+        last = parse_date(options['end']) if options['end'] else timezone.localdate()
+        first = parse_date(options['start']) if options['start'] else last - timedelta(days=options['days'] - 1)
+        if first is None or last is None or first > last:
+            raise CommandError('Dates must be YYYY-MM-DD, start before end.')
+
+        mismatches = analytics.check(first, last)
+        for mismatch in mismatches[:50]:
+            self.stdout.write(
+                f'  {mismatch.day} package #{mismatch.package_id} {mismatch.field}: '
+                f'rollup {mismatch.rollup}, source {mismatch.source}'
+            )
+        if len(mismatches) > 50:
+            self.stdout.write(f'  ... and {len(mismatches) - 50} more')
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS(f'Rollups match the source tables for {first} to {last}.'))
+            return
+
+        days = sorted({mismatch.day for mismatch in mismatches})
+        if options['repair']:
+            for day in days:
+                analytics.rebuild(day, day)
+            self.stdout.write(self.style.SUCCESS(f'Recomputed {len(days)} days.'))
+        else:
+            raise CommandError(f'{len(mismatches)} differences on {len(days)} days; rerun with --repair to fix.')
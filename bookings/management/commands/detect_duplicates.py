@@ -0,0 +1,35 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from bookings import spam
+from bookings.models import SubmissionFingerprint
+
+
+class Command(BaseCommand):
+    help = 'Fingerprint contact inquiries and custom tour requests and mark duplicates and spam'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', choices=sorted(spam.KINDS), action='append',
+                            help='Limit to these kinds (repeatable); default all')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Submissions fingerprinted and classified per round of queries')
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Drop existing fingerprints first; statuses already set are kept')
+
+    def handle(self, *args, **options):
+        for kind in options['kind'] or sorted(spam.KINDS):
+            model = spam.KINDS[kind][0]
+            if options['rebuild']:
+                SubmissionFingerprint.objects.filter(kind=kind).delete()
+            totals, last_id, seen = Counter(), 0, 0
+            while True:
+                # Keyset pagination in id order, so each submission is judged against earlier ones only
+                batch = list(model.objects.filter(id__gt=last_id).order_by('id')[:options['batch_size']])
+                if not batch:
+                    break
+                totals.update(spam.process(kind, batch))
+                last_id = batch[-1].id
+                seen += len(batch)
+            summary = ', '.join(f'{count} {verdict}' for verdict, count in sorted(totals.items())) or 'none flagged'
+            self.stdout.write(self.style.SUCCESS(f'{kind}: {seen} checked, {summary}.'))
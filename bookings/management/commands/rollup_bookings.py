@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from bookings import analytics
+
+
+class Command(BaseCommand):
+    help = 'Update the daily booking rollups incrementally, or backfill them for a range of days'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Recompute every day instead of only bookings changed since the last run')
+        parser.add_argument('--start', help='Backfill from this local booking day (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Backfill up to and including this day (default: --start)')
+
+    def handle(self, *args, **options):
+        if options['start'] or options['end']:
+            first = parse_date(options['start'] or options['end'] or '')
+            last = parse_date(options['end'] or options['start'] or '')
+            if first is None or last is None or first > last:
+                raise CommandError('Give --start (and optionally --end) as YYYY-MM-DD, start before end.')
+            written = analytics.rebuild(first, last, progress=self._progress)
+            self.stdout.write(self.style.SUCCESS(f'Backfilled {written} rollup rows for {first} to {last}.'))
+        elif options['rebuild']:
+            written = analytics.rebuild(progress=self._progress)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} rollup rows.'))
+        else:
+            written = analytics.refresh()
+            self.stdout.write(self.style.SUCCESS(f'Rewrote {written} rollup rows.'))
+
+    def _progress(self, first, last, written):
+        if self.verbosity > 1:
+            self.stdout.write(f'  {first} to {last}: {written} rows so far')
@@ -0,0 +1,211 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('travel', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('value', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SubmissionFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('contact', 'Contact Inquiry'), ('custom_tour', 'Custom Tour Request')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('email', models.CharField(blank=True, max_length=254)),
+                ('phone', models.CharField(blank=True, max_length=20)),
+                ('signature', models.BinaryField()),
+                ('link_count', models.PositiveSmallIntegerField(default=0)),
+                ('verdict', models.CharField(blank=True, max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('duplicate_of', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='bookings.submissionfingerprint')),
+            ],
+            options={
+                'ordering': ['kind', 'object_id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SubmissionBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('bucket', models.BigIntegerField()),
+                ('fingerprint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='buckets', to='bookings.submissionfingerprint')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('package_title', models.CharField(max_length=200)),
+                ('name', models.CharField(max_length=255)),
+                ('email', models.EmailField(max_length=254)),
+                ('phone', models.CharField(max_length=20)),
+                ('travel_date', models.DateField()),
+                ('number_of_adults', models.PositiveIntegerField(default=1)),
+                ('number_of_children', models.PositiveIntegerField(default=0)),
+                ('special_requirements', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('cancelled', 'Cancelled'), ('completed', 'Completed')], max_length=20)),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('booking_date', models.DateTimeField()),
+                ('modified_date', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('address', models.TextField(blank=True)),
+                ('city', models.CharField(blank=True, max_length=100)),
+                ('state_province', models.CharField(blank=True, max_length=100)),
+                ('zip_code', models.CharField(blank=True, max_length=20)),
+                ('country', models.CharField(blank=True, max_length=100)),
+                ('package', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_bookings', to='travel.package')),
+                ('user', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_bookings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-booking_date'],
+                'indexes': [models.Index(fields=['user', 'booking_date'], name='bookings_ar_user_id_7ff085_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedInquiry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('contact', 'Contact Inquiry'), ('custom_tour', 'Custom Tour Request')], max_length=20)),
+                ('original_id', models.BigIntegerField()),
+                ('name', models.CharField(max_length=255)),
+                ('email', models.EmailField(max_length=254)),
+                ('status', models.CharField(max_length=20)),
+                ('submitted_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('data', models.JSONField()),
+                ('user', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_inquiries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Archived Inquiries',
+                'ordering': ['-submitted_at'],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'original_id'), name='unique_archived_inquiry')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Booking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('email', models.EmailField(max_length=254)),
+                ('phone', models.CharField(max_length=20)),
+                ('travel_date', models.DateField()),
+                ('number_of_adults', models.PositiveIntegerField(default=1)),
+                ('number_of_children', models.PositiveIntegerField(default=0)),
+                ('special_requirements', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('cancelled', 'Cancelled'), ('completed', 'Completed')], default='pending', max_length=20)),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('booking_date', models.DateTimeField(auto_now_add=True)),
+                ('modified_date', models.DateTimeField(auto_now=True)),
+                ('address', models.TextField(blank=True)),
+                ('city', models.CharField(blank=True, max_length=100)),
+                ('state_province', models.CharField(blank=True, max_length=100)),
+                ('zip_code', models.CharField(blank=True, max_length=20)),
+                ('country', models.CharField(blank=True, max_length=100)),
+                ('package', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='travel.package')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bookings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-booking_date'],
+                'indexes': [models.Index(fields=['booking_date'], name='bookings_bo_booking_f34616_idx'), models.Index(fields=['status', 'booking_date'], name='bookings_bo_status_dfd677_idx'), models.Index(fields=['travel_date'], name='bookings_bo_travel__83d735_idx'), models.Index(fields=['modified_date'], name='bookings_bo_modifie_1324ec_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BookingDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('package_type', models.CharField(blank=True, max_length=20)),
+                ('bookings', models.PositiveIntegerField(default=0)),
+                ('adults', models.PositiveIntegerField(default=0)),
+                ('children', models.PositiveIntegerField(default=0)),
+                ('total_price', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cancelled_price', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('pending', models.PositiveIntegerField(default=0)),
+                ('confirmed', models.PositiveIntegerField(default=0)),
+                ('completed', models.PositiveIntegerField(default=0)),
+                ('cancelled', models.PositiveIntegerField(default=0)),
+                ('country', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='travel.country')),
+                ('package', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='travel.package')),
+                ('state', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='travel.state')),
+            ],
+            options={
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['day', 'package'], name='bookings_bo_day_5db032_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ContactInquiry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('email', models.EmailField(max_length=254)),
+                ('phone', models.CharField(blank=True, max_length=20)),
+                ('subject', models.CharField(max_length=255)),
+                ('message', models.TextField()),
+                ('status', models.CharField(choices=[('unread', 'Unread'), ('read', 'Read'), ('replied', 'Replied'), ('duplicate', 'Duplicate'), ('spam', 'Spam')], default='unread', max_length=20)),
+                ('submission_date', models.DateTimeField(auto_now_add=True)),
+                ('modified_date', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='contact_inquiries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Contact Inquiries',
+                'ordering': ['-submission_date'],
+                'indexes': [models.Index(fields=['submission_date'], name='bookings_co_submiss_cd9734_idx'), models.Index(fields=['status', 'submission_date'], name='bookings_co_status_43a473_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CustomTourRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('email', models.EmailField(max_length=254)),
+                ('phone', models.CharField(max_length=20)),
+                ('destination', models.CharField(max_length=255)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('number_of_adults', models.PositiveIntegerField(default=1)),
+                ('number_of_children', models.PositiveIntegerField(default=0)),
+                ('budget', models.CharField(max_length=100)),
+                ('accommodation_preferences', models.TextField(blank=True)),
+                ('transport_preferences', models.TextField(blank=True)),
+                ('activities_interests', models.TextField(blank=True)),
+                ('special_requirements', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('cancelled', 'Cancelled'), ('duplicate', 'Duplicate'), ('spam', 'Spam')], default='pending', max_length=20)),
+                ('request_date', models.DateTimeField(auto_now_add=True)),
+                ('modified_date', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='custom_tour_requests', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-request_date'],
+                'indexes': [models.Index(fields=['request_date'], name='bookings_cu_request_e8dbf8_idx'), models.Index(fields=['status', 'request_date'], name='bookings_cu_status_641dc3_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='submissionfingerprint',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_submission_fingerprint'),
+        ),
+        migrations.AddIndex(
+            model_name='submissionbucket',
+            index=models.Index(fields=['kind', 'bucket'], name='bookings_su_kind_ce3584_idx'),
+        ),
+    ]
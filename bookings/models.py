@@ -36,11 +36,19 @@ class Booking(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, 
                             null=True, blank=True, related_name='bookings')
     
+    is_archived = False
+    
     def __str__(self):
         return f"Booking #{self.id} - {self.name} - {self.package.title}"
     
     class Meta:
         ordering = ['-booking_date']
+        indexes = [
+            models.Index(fields=['booking_date']),
+            models.Index(fields=['status', 'booking_date']),
+            models.Index(fields=['travel_date']),
+            models.Index(fields=['modified_date']),  # Rollup watermark scans (bookings.analytics)
+        ]
         
 class CustomTourRequest(models.Model):
     """Model for customized tour requests"""
@@ -49,6 +57,8 @@ class CustomTourRequest(models.Model):
         ('processing', 'Processing'),
         ('completed', 'Completed'),
         ('cancelled', 'Cancelled'),
+        ('duplicate', 'Duplicate'),
+        ('spam', 'Spam'),
     )
     
     name = models.CharField(max_length=255)
@@ -82,6 +92,10 @@ class CustomTourRequest(models.Model):
     
     class Meta:
         ordering = ['-request_date']
+        indexes = [
+            models.Index(fields=['request_date']),
+            models.Index(fields=['status', 'request_date']),
+        ]
         
 class ContactInquiry(models.Model):
     """Model for contact form submissions"""
@@ -89,6 +103,7 @@ class ContactInquiry(models.Model):
         ('unread', 'Unread'),
         ('read', 'Read'),
         ('replied', 'Replied'),
+        ('duplicate', 'Duplicate'),
         ('spam', 'Spam'),
     )
     
@@ -111,4 +126,158 @@ class ContactInquiry(models.Model):
     
     class Meta:
         ordering = ['-submission_date']
-        verbose_name_plural = 'Contact Inquiries'
\ No newline at end of file
+        verbose_name_plural = 'Contact Inquiries'
+        indexes = [
+            models.Index(fields=['submission_date']),
+            models.Index(fields=['status', 'submission_date']),
+        ]
+
+class ArchivedBooking(models.Model):
+    """Completed or cancelled booking moved out of the live table by bookings.archive.
+
+    The primary key is the original booking id, so existing links keep resolving.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    package = models.ForeignKey(Package, on_delete=models.SET_NULL, null=True, blank=True,
+                                related_name='archived_bookings', db_constraint=False)
+    package_title = models.CharField(max_length=200)  # Kept in case the package is later deleted
+    name = models.CharField(max_length=255)
+    email = models.EmailField()
+    phone = models.CharField(max_length=20)
+    travel_date = models.DateField()
+    number_of_adults = models.PositiveIntegerField(default=1)
+    number_of_children = models.PositiveIntegerField(default=0)
+    special_requirements = models.TextField(blank=True)
+    
+    status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES)
+    total_price = models.DecimalField(max_digits=10, decimal_places=2)
+    booking_date = models.DateTimeField()
+    modified_date = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    address = models.TextField(blank=True)
+    city = models.CharField(max_length=100, blank=True)
+    state_province = models.CharField(max_length=100, blank=True)
+    zip_code = models.CharField(max_length=20, blank=True)
+    country = models.CharField(max_length=100, blank=True)
+    
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                             related_name='archived_bookings', db_constraint=False)
+    
+    is_archived = True
+    
+    def __str__(self):
+        return f"Booking #{self.id} - {self.name} - {self.package_title} (archived)"
+    
+    class Meta:
+        ordering = ['-booking_date']
+        indexes = [
+            models.Index(fields=['user', 'booking_date']),
+        ]
+
+class ArchivedInquiry(models.Model):
+    """Handled contact inquiry or custom tour request moved out of the live tables"""
+    KIND_CHOICES = (
+        ('contact', 'Contact Inquiry'),
+        ('custom_tour', 'Custom Tour Request'),
+    )
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    original_id = models.BigIntegerField()
+    name = models.CharField(max_length=255)
+    email = models.EmailField()
+    status = models.CharField(max_length=20)
+    submitted_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    data = models.JSONField()  # Remaining columns of the original row
+    
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                             related_name='archived_inquiries', db_constraint=False)
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.original_id} - {self.name} (archived)"
+    
+    class Meta:
+        ordering = ['-submitted_at']
+        verbose_name_plural = 'Archived Inquiries'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'original_id'], name='unique_archived_inquiry'),
+        ]
+
+
+class SubmissionFingerprint(models.Model):
+    """MinHash signature of a contact inquiry or custom tour request (see bookings.spam)"""
+    KIND_CHOICES = ArchivedInquiry.KIND_CHOICES
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()  # Kept after the row is archived, so repeats are still caught
+    email = models.CharField(max_length=254, blank=True)  # Normalized
+    phone = models.CharField(max_length=20, blank=True)  # Last 10 digits
+    signature = models.BinaryField()
+    link_count = models.PositiveSmallIntegerField(default=0)
+    duplicate_of = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='duplicates')
+    verdict = models.CharField(max_length=20, blank=True)  # '', 'duplicate' or 'spam'
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.object_id} fingerprint"
+    
+    class Meta:
+        ordering = ['kind', 'object_id']
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_submission_fingerprint'),
+        ]
+
+
+class SubmissionBucket(models.Model):
+    """One LSH band of a fingerprint; submissions sharing a bucket are near-duplicate candidates"""
+    fingerprint = models.ForeignKey(SubmissionFingerprint, on_delete=models.CASCADE, related_name='buckets')
+    kind = models.CharField(max_length=20)
+    bucket = models.BigIntegerField()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'bucket']),
+        ]
+
+
+class BookingDailyRollup(models.Model):
+    """Booking totals per local booking day and package, maintained by bookings.analytics"""
+    day = models.DateField()
+    package = models.ForeignKey(Package, on_delete=models.DO_NOTHING, null=True, blank=True,
+                                related_name='+', db_constraint=False)
+    # Copied from the package when the row is computed, so reports never join the catalogue
+    state = models.ForeignKey('travel.State', on_delete=models.DO_NOTHING, null=True, blank=True,
+                              related_name='+', db_constraint=False)
+    country = models.ForeignKey('travel.Country', on_delete=models.DO_NOTHING, null=True, blank=True,
+                                related_name='+', db_constraint=False)
+    package_type = models.CharField(max_length=20, blank=True)
+    
+    bookings = models.PositiveIntegerField(default=0)
+    adults = models.PositiveIntegerField(default=0)
+    children = models.PositiveIntegerField(default=0)
+    total_price = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cancelled_price = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    pending = models.PositiveIntegerField(default=0)
+    confirmed = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    cancelled = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.day} package #{self.package_id}: {self.bookings} bookings"
+    
+    class Meta:
+        ordering = ['-day']
+        indexes = [
+            models.Index(fields=['day', 'package']),
+        ]
+
+
+class RollupWatermark(models.Model):
+    """Point in time a periodic job has caught up to: a rollup table's source rows, or popularity decay"""
+    name = models.CharField(max_length=50, unique=True)
+    value = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name} @ {self.value}"
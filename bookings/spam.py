@@ -0,0 +1,258 @@
+"""
+Near-duplicate and spam detection for contact inquiries and custom tour requests.
+
+Each submission gets a SubmissionFingerprint: normalized email and phone,
+a link count and a 32-value MinHash of its text shingles. The MinHash is
+split into 16 bands of 2 values; each band is hashed into a
+SubmissionBucket row, and submissions sharing any bucket are candidates.
+Finding candidates is therefore one indexed ``bucket IN (...)`` query, never
+a pairwise scan, and candidates are confirmed by comparing signatures
+(the fraction of equal MinHash values estimates Jaccard similarity).
+
+Verdicts, applied to the row's status in one UPDATE per verdict:
+
+    spam       too many links, or the same text from SPAM_MIN_SENDERS
+               different senders, or close to a submission already marked spam
+    duplicate  the same sender (email or phone) sent similar text before;
+               the fingerprint points at the earliest one
+
+Only free text is fingerprinted, never structured fields such as a custom
+tour's destination and dates. Both similarity rules for spam also need
+at least SPAM_MIN_SHINGLES word 3-grams, so short stock phrases ("Please
+call me back") from different customers are never spam on similarity alone.
+Submissions with no text at all get no similarity verdict.
+
+``process`` handles any batch (the backlog command, admin actions) and
+``check_submission`` runs it inline for a single new row.
+"""
+import hashlib
+import logging
+import random
+import re
+import struct
+from array import array
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ContactInquiry, CustomTourRequest, SubmissionBucket, SubmissionFingerprint
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 32
+BANDS, ROWS = 16, 2  # A pair at Jaccard 0.6 shares a bucket with probability ~0.999, at 0.2 ~0.48
+_PRIME = (1 << 61) - 1
+_random = random.Random(20240601)  # Fixed seed: stored signatures must stay comparable
+_PERMUTATIONS = [(_random.randrange(1, _PRIME), _random.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+_WORD_RE = re.compile(r'[^\W_]+', re.UNICODE)
+_URL_RE = re.compile(r'https?://|www\.', re.IGNORECASE)
+
+# kind -> (model, text fields, statuses a verdict may overwrite)
+KINDS = {
+    'contact': (ContactInquiry, ('subject', 'message'), ('unread', 'read')),
+    'custom_tour': (CustomTourRequest, (
+        'accommodation_preferences', 'transport_preferences', 'activities_interests', 'special_requirements',
+    ), ('pending',)),
+}
+
+
+def normalize_email(email):
+    local, _, domain = (email or '').strip().lower().partition('@')
+    local = local.split('+', 1)[0]
+    if domain in ('gmail.com', 'googlemail.com'):
+        local, domain = local.replace('.', ''), 'gmail.com'
+    return f'{local}@{domain}' if domain else local
+
+
+def normalize_phone(phone):
+    return re.sub(r'\D', '', phone or '')[-10:]
+
+
+def shingles(text):
+    """Word 3-grams, or character 5-grams for very short texts"""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) >= 5:
+        return {' '.join(words[i:i + 3]) for i in range(len(words) - 2)}
+    joined = ' '.join(words)
+    if len(joined) <= 5:
+        return {joined}
+    return {joined[i:i + 5] for i in range(len(joined) - 4)}
+
+
+def minhash(shingle_set):
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), 'big') for s in shingle_set]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def band_buckets(signature):
+    buckets = []
+    for band in range(BANDS):
+        packed = struct.pack('>H2Q', band, *signature[band * ROWS:(band + 1) * ROWS])
+        buckets.append(int.from_bytes(hashlib.blake2b(packed, digest_size=8).digest(), 'big', signed=True))
+    return buckets
+
+
+def similarity(first, second):
+    return sum(a == b for a, b in zip(first, second)) / NUM_PERM
+
+
+def _signature(fingerprint):
+    values = array('Q')
+    values.frombytes(bytes(fingerprint.signature))
+    return values
+
+
+def _fingerprint(kind, obj):
+    model, fields, _ = KINDS[kind]
+    text = ' '.join(str(getattr(obj, name) or '') for name in fields)
+    words = len(_WORD_RE.findall(text))
+    signature = minhash(shingles(text))
+    fingerprint = SubmissionFingerprint(
+        kind=kind, object_id=obj.pk,
+        email=normalize_email(obj.email), phone=normalize_phone(obj.phone),
+        signature=array('Q', signature).tobytes(),
+        link_count=min(len(_URL_RE.findall(text)), 32767),
+    )
+    fingerprint.values = signature
+    fingerprint.word_shingles = max(words - 2, 0) if words else -1  # -1: no text to compare
+    return fingerprint
+
+
+def _classify(fingerprint, candidates):
+    """Set verdict and duplicate_of on ``fingerprint`` from earlier, similar submissions"""
+    duplicate_threshold = getattr(settings, 'SPAM_DUPLICATE_SIMILARITY', 0.6)
+    spam_threshold = getattr(settings, 'SPAM_SIMILARITY', 0.8)
+    senders, canonical, known_spam = set(), None, False
+    if fingerprint.word_shingles < 0:
+        candidates = ()
+    for candidate in candidates:
+        score = similarity(fingerprint.values, candidate.values)
+        same_sender = (fingerprint.email and fingerprint.email == candidate.email) or \
+            (fingerprint.phone and fingerprint.phone == candidate.phone)
+        if same_sender and score >= duplicate_threshold:
+            root = candidate.duplicate_of_id or candidate.id
+            canonical = root if canonical is None else min(canonical, root)
+        if score >= spam_threshold:
+            known_spam = known_spam or candidate.verdict == 'spam'
+            if not same_sender:
+                senders.add(candidate.email or candidate.phone)
+
+    distinctive = fingerprint.word_shingles >= getattr(settings, 'SPAM_MIN_SHINGLES', 10)
+    if (fingerprint.link_count >= getattr(settings, 'SPAM_MAX_LINKS', 3)
+            or (distinctive and (known_spam or len(senders) + 1 >= getattr(settings, 'SPAM_MIN_SENDERS', 3)))):
+        fingerprint.verdict = 'spam'
+    elif canonical is not None:
+        fingerprint.verdict = 'duplicate'
+        fingerprint.duplicate_of_id = canonical
+
+
+def _apply_verdicts(kind, verdicts):
+    """verdict -> [object ids]; only rows still in their initial statuses are changed"""
+    model, _, initial = KINDS[kind]
+    now = timezone.now()
+    for verdict, ids in verdicts.items():
+        model.objects.filter(id__in=ids, status__in=initial).update(status=verdict, modified_date=now)
+
+
+def process(kind, objects, skip_existing=True):
+    """Fingerprint, index and classify a batch of rows of one kind; returns a Counter of verdicts"""
+    objects = sorted(objects, key=lambda obj: obj.pk)
+    if skip_existing and objects:
+        existing = set(SubmissionFingerprint.objects.filter(
+            kind=kind, object_id__in=[obj.pk for obj in objects],
+        ).values_list('object_id', flat=True))
+        objects = [obj for obj in objects if obj.pk not in existing]
+    if not objects:
+        return Counter()
+
+    batch = SubmissionFingerprint.objects.bulk_create([_fingerprint(kind, obj) for obj in objects])
+    buckets = {}
+    for fingerprint in batch:
+        fingerprint.bucket_values = band_buckets(fingerprint.values)
+        for bucket in fingerprint.bucket_values:
+            buckets.setdefault(bucket, []).append(fingerprint.id)
+    SubmissionBucket.objects.bulk_create([
+        SubmissionBucket(fingerprint_id=fingerprint.id, kind=kind, bucket=bucket)
+        for fingerprint in batch for bucket in fingerprint.bucket_values
+    ])
+
+    # One query for every earlier fingerprint sharing a bucket with anything in the batch
+    sharing = {}
+    batch_ids = {fingerprint.id for fingerprint in batch}
+    for bucket, fingerprint_id in SubmissionBucket.objects.filter(
+        kind=kind, bucket__in=list(buckets),
+    ).exclude(fingerprint_id__in=batch_ids).values_list('bucket', 'fingerprint_id'):
+        sharing.setdefault(bucket, set()).add(fingerprint_id)
+
+    limit = getattr(settings, 'SPAM_MAX_CANDIDATES', 200)
+    wanted = {}
+    for fingerprint in batch:
+        ids = set().union(*(sharing.get(bucket, ()) for bucket in fingerprint.bucket_values))
+        wanted[fingerprint.id] = sorted(ids)[-limit:]  # The most recent earlier submissions
+    known = {
+        fingerprint.id: fingerprint
+        for fingerprint in SubmissionFingerprint.objects.filter(id__in=set().union(*wanted.values()))
+    }
+    for fingerprint in known.values():
+        fingerprint.values = _signature(fingerprint)
+
+    by_id = {fingerprint.id: fingerprint for fingerprint in batch}
+    verdicts = {}
+    for fingerprint in batch:  # In id order, so later rows see the verdicts of earlier ones
+        candidates = [known[pk] for pk in wanted[fingerprint.id] if pk in known]
+        earlier = {pk for bucket in fingerprint.bucket_values for pk in buckets[bucket] if pk < fingerprint.id}
+        candidates += [by_id[pk] for pk in sorted(earlier)]
+        _classify(fingerprint, candidates)
+        if fingerprint.verdict:
+            verdicts.setdefault(fingerprint.verdict, []).append(fingerprint.object_id)
+
+    SubmissionFingerprint.objects.bulk_update(
+        [fingerprint for fingerprint in batch if fingerprint.verdict], ['verdict', 'duplicate_of'],
+    )
+    _apply_verdicts(kind, verdicts)
+    return Counter({verdict: len(ids) for verdict, ids in verdicts.items()})
+
+
+def check_submission(kind, obj):
+    """Classify one freshly created row; returns its verdict or ''. Never raises into the form view."""
+    if not getattr(settings, 'SPAM_CHECK_ENABLED', True):
+        return ''
+    try:
+        with transaction.atomic():
+            verdicts = process(kind, [obj], skip_existing=False)
+    except Exception:
+        logger.exception('Spam check failed for %s %s', kind, obj.pk)
+        return ''
+    verdict = next(iter(verdicts), '')
+    if verdict:
+        obj.status = verdict
+    return verdict
+
+
+def mark(kind, object_ids, verdict):
+    """Staff decision: set the status and record the verdict so similar later submissions follow it"""
+    model, _, _ = KINDS[kind]
+    updated = model.objects.filter(id__in=object_ids).update(status=verdict, modified_date=timezone.now())
+    SubmissionFingerprint.objects.filter(kind=kind, object_id__in=object_ids).update(verdict=verdict)
+    return updated
+
+
+def merge(kind, object_ids):
+    """Mark every row but the oldest as a duplicate of the oldest; returns the kept row's id"""
+    object_ids = sorted(object_ids)
+    if len(object_ids) < 2:
+        return object_ids[0] if object_ids else None
+    model, _, _ = KINDS[kind]
+    keep, rest = object_ids[0], object_ids[1:]
+    canonical = SubmissionFingerprint.objects.filter(kind=kind, object_id=keep).first()
+    if canonical is None:
+        process(kind, list(model.objects.filter(id=keep)), skip_existing=False)
+        canonical = SubmissionFingerprint.objects.get(kind=kind, object_id=keep)
+    model.objects.filter(id__in=rest).update(status='duplicate', modified_date=timezone.now())
+    SubmissionFingerprint.objects.filter(kind=kind, object_id__in=rest).update(
+        verdict='duplicate', duplicate_of=canonical.duplicate_of_id or canonical.id,
+    )
+    return keep
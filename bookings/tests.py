@@ -1,3 +1,225 @@
-from django.test import TestCase
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from sanskruti_travels import ratelimit
+from sanskruti_travels.querybudget import assert_max_queries
+from travel.tests import make_package
+from . import analytics, archive, spam
+from .models import ArchivedBooking, Booking, BookingDailyRollup, ContactInquiry, CustomTourRequest, SubmissionFingerprint
+
+
+class BookingViewQueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.package = make_package('Goa Escape')
+        cls.staff = get_user_model().objects.create_user('staff@example.com', 'secret', is_staff=True)
+        for number in range(6):
+            Booking.objects.create(
+                package=cls.package, name=f'Guest {number}', email=f'guest{number}@example.com', phone='9800000000',
+                travel_date=timezone.localdate() + timedelta(days=30), number_of_adults=2,
+                total_price=Decimal('20000.00'),
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_quote_preview_within_budget(self):
+        params = {'travel_date': (timezone.localdate() + timedelta(days=30)).isoformat(), 'number_of_adults': 2}
+        with assert_max_queries(6):
+            response = self.client.get(reverse('quote_preview', args=[self.package.id]), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total'], '20000.00')
+
+    def test_booking_report_csv_reads_only_rollups(self):
+        analytics.rebuild()
+        self.client.force_login(self.staff)
+        with assert_max_queries(6):
+            response = self.client.get(reverse('booking_report_csv'), {'group': 'package'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Goa Escape', response.content.decode())
+
+
+class SpamDetectionTests(TestCase):
+    LONG_TEXT = ('We are a family of four looking for a relaxed beach holiday in Goa in December '
+                 'with a sea view hotel and airport transfers')
+
+    def contact(self, number, message, subject='Holiday enquiry', email=None):
+        inquiry = ContactInquiry.objects.create(
+            name=f'Sender {number}', email=email or f'sender{number}@example.com', subject=subject, message=message,
+        )
+        return spam.check_submission('contact', inquiry)
+
+    def test_minhash_estimates_similarity(self):
+        variant = self.LONG_TEXT.replace('December', 'January') + ' included'
+        signature = spam.minhash(spam.shingles(self.LONG_TEXT))
+        self.assertEqual(spam.similarity(signature, signature), 1.0)
+        self.assertGreaterEqual(spam.similarity(signature, spam.minhash(spam.shingles(variant))), 0.8)
+        unrelated = 'Please send me the itinerary and prices for the Kashmir houseboat package for two adults'
+        other = spam.minhash(spam.shingles(unrelated))
+        self.assertLess(spam.similarity(signature, other), 0.2)
+        self.assertFalse(set(spam.band_buckets(signature)) & set(spam.band_buckets(other)))
+
+    def test_normalizes_senders(self):
+        self.assertEqual(spam.normalize_email(' John.Smith+travel@GoogleMail.com'), 'johnsmith@gmail.com')
+        self.assertEqual(spam.normalize_phone('+91 98765-43210'), '9876543210')
+
+    def test_same_text_from_many_senders_is_spam(self):
+        self.assertEqual([self.contact(number, self.LONG_TEXT) for number in range(3)], ['', '', 'spam'])
+        self.assertEqual(ContactInquiry.objects.filter(status='spam').count(), 1)
+
+    def test_short_stock_phrases_from_different_senders_are_not_spam(self):
+        verdicts = [self.contact(number, 'Please call me back') for number in range(4)]
+        self.assertEqual(verdicts, ['', '', '', ''])
+
+    def test_same_sender_repeating_is_a_duplicate(self):
+        self.contact(1, 'Please call me back', email='guest@example.com')
+        self.assertEqual(self.contact(2, 'Please call me back', email='Guest@Example.com'), 'duplicate')
+        first, second = SubmissionFingerprint.objects.filter(kind='contact').order_by('id')
+        self.assertEqual(second.duplicate_of_id, first.id)
+
+    def test_custom_tours_compare_free_text_only(self):
+        start = timezone.localdate() + timedelta(days=60)
+        verdicts = []
+        for number in range(3):
+            tour = CustomTourRequest.objects.create(
+                name=f'Sender {number}', email=f'sender{number}@example.com', phone=f'98000000{number:02d}',
+                destination='Goa', start_date=start, end_date=start + timedelta(days=5), budget='50000',
+            )
+            verdicts.append(spam.check_submission('custom_tour', tour))
+        self.assertEqual(verdicts, ['', '', ''])
+
+
+@override_settings(RATE_LIMITS={'test': [('ip', '10/m')]}, RATE_LIMIT_IP_HEADER='REMOTE_ADDR')
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def hits(self, now, count, ip='203.0.113.5'):
+        """Retry-After of each of ``count`` requests at time ``now``"""
+        request = RequestFactory().post('/', REMOTE_ADDR=ip)
+        with mock.patch.object(ratelimit.time, 'time', return_value=now):
+            return [ratelimit.check(request, 'test') for _ in range(count)]
+
+    def test_parse_rate(self):
+        self.assertEqual(ratelimit.parse_rate('5/m'), (5, 60))
+        self.assertEqual(ratelimit.parse_rate('10/15m'), (10, 900))
+        with self.assertRaises(ValueError):
+            ratelimit.parse_rate('5 per minute')
+
+    def test_sliding_window_weights_the_previous_window(self):
+        start = 6000  # A window boundary for 60 second windows
+        self.assertEqual(self.hits(start + 30, 8), [None] * 8)
+        # 15s into the next window the previous 8 still count as 8 * 45/60 = 6, so 4 more fit
+        self.assertEqual(self.hits(start + 75, 5), [None] * 4 + [8])
+        # The fifth waits until 8 * (1 - t/60) + 5 <= 10: t = 22.5s into the window, 7.5s away
+        self.assertEqual(self.hits(start + 75, 1, ip='198.51.100.1'), [None])
+        # Two windows on, only the 5 from the previous window weigh in: 5 * 45/60 + 1 <= 10
+        self.assertEqual(self.hits(start + 135, 1), [None])
+
+    @override_settings(RATE_LIMIT_IP_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_client_ip_uses_the_hop_our_proxy_added(self):
+        factory = RequestFactory()
+        spoofed = factory.post('/', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='1.1.1.1, 203.0.113.9')
+        self.assertEqual(ratelimit.client_ip(spoofed), '203.0.113.9')
+        with override_settings(RATE_LIMIT_TRUSTED_PROXIES=2):
+            chained = factory.post('/', HTTP_X_FORWARDED_FOR='1.1.1.1, 198.51.100.7, 10.0.0.2')
+            self.assertEqual(ratelimit.client_ip(chained), '198.51.100.7')
+        self.assertEqual(ratelimit.client_ip(factory.post('/', REMOTE_ADDR='10.0.0.1')), '10.0.0.1')
+
+
+class BookingRollupTests(TestCase):
+    def test_refresh_moves_a_rebooked_booking_between_packages(self):
+        goa, kerala = make_package('Goa Escape'), make_package('Kerala Backwaters')
+        booking = Booking.objects.create(
+            package=goa, name='Guest', email='guest@example.com', phone='9800000000',
+            travel_date=timezone.localdate() + timedelta(days=30), total_price=Decimal('10000.00'),
+        )
+        analytics.rebuild()
+        booking.package = kerala
+        booking.save()
+        analytics.refresh(now=timezone.now() + timedelta(seconds=1))
+
+        rollups = dict(BookingDailyRollup.objects.values_list('package_id', 'bookings'))
+        self.assertEqual(rollups, {kerala.id: 1})
+        today = timezone.localdate()
+        self.assertEqual(analytics.check(today, today), [])
+
+
+class PrivateMediaAccessTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.owner = User.objects.create_user('owner@example.com', 'secret')
+        other = User.objects.create_user('other@example.com', 'secret')
+        package = make_package('Goa Escape')
+        cls.bookings = [
+            Booking.objects.create(
+                package=package, user=user, name='Guest', email=user.email, phone='9800000000',
+                travel_date=timezone.localdate() + timedelta(days=30), total_price=Decimal('10000.00'),
+            )
+            for user in (cls.owner, other)
+        ]
+
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        for booking in self.bookings:
+            os.makedirs(os.path.join(root.name, 'bookings', str(booking.id)))
+            with open(os.path.join(root.name, 'bookings', str(booking.id), 'voucher.txt'), 'w') as handle:
+                handle.write(f'voucher {booking.id}')
+        settings_override = override_settings(PRIVATE_MEDIA_ROOT=root.name, MEDIA_SERVE_BACKEND='python')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client.force_login(self.owner)
+
+    def get(self, path):
+        return self.client.get(f'/private-media/{path}')
+
+    def test_owner_reads_own_booking_files_only(self):
+        own, other = self.bookings
+        response = self.get(f'bookings/{own.id}/voucher.txt')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), f'voucher {own.id}'.encode())
+        self.assertEqual(self.get(f'bookings/{other.id}/voucher.txt').status_code, 404)
+
+    def test_traversal_out_of_an_owned_booking_is_rejected(self):
+        own, other = self.bookings
+        for path in (f'bookings/{own.id}/../{other.id}/voucher.txt', f'bookings/{own.id}/./../{other.id}/voucher.txt',
+                     f'bookings//{other.id}/voucher.txt', f'bookings/{own.id}/..%2F{other.id}/voucher.txt'):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path).status_code, 404)
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.booking = Booking.objects.create(
+            package=make_package('Goa Escape'), name='Guest', email='guest@example.com', phone='9800000000',
+            travel_date=timezone.localdate() - timedelta(days=800), total_price=Decimal('10000.00'), status='completed',
+        )
+        Booking.objects.filter(pk=self.booking.pk).update(modified_date=timezone.now() - timedelta(days=800))
+
+    def test_moves_old_bookings(self):
+        report = archive.archive_old_records()
+        self.assertEqual(report.rows['bookings'], 1)
+        self.assertFalse(Booking.objects.exists())
+        self.assertEqual(ArchivedBooking.objects.get().package_title, 'Goa Escape')
+
+    def test_conflicting_copy_keeps_the_original(self):
+        ArchivedBooking.objects.create(
+            id=self.booking.id, package_title='Other', name='Other', email='other@example.com', phone='9800000001',
+            travel_date=self.booking.travel_date, total_price=Decimal('1.00'),
+            booking_date=timezone.now(), modified_date=timezone.now(),
+        )
+        with self.assertRaises(IntegrityError):
+            archive.archive_old_records()
+        self.assertTrue(Booking.objects.filter(pk=self.booking.pk).exists())
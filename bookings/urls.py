@@ -4,8 +4,13 @@ from . import views
 urlpatterns = [
     # Booking related URLs
     path('book/<int:package_id>/', views.book_package, name='book_package'),
+    path('quote/<int:package_id>/', views.quote_preview, name='quote_preview'),
     path('book-confirm/<int:booking_id>/', views.booking_confirmation, name='booking_confirmation'),
     path('my-bookings/', views.user_bookings, name='bookings'),
     path('my-bookings/<int:booking_id>/', views.booking_detail, name='booking_detail'),
     path('cancel-booking/<int:booking_id>/', views.cancel_booking, name='cancel_booking'),
+    
+    # Staff reporting (reads bookings.analytics rollups)
+    path('reports/', views.booking_report, name='booking_report'),
+    path('reports/bookings.csv', views.booking_report_csv, name='booking_report_csv'),
 ]
\ No newline at end of file
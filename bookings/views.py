@@ -1,12 +1,48 @@
+import csv
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import cache
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponse, JsonResponse
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.dateparse import parse_date
 from django.urls import reverse
+from django.views.decorators.http import require_GET
 
+from sanskruti_travels.querybudget import query_budget
+from sanskruti_travels.ratelimit import rate_limit
+from travel import catalogue, currency, pricing
 from travel.models import Package
+from . import analytics
 from .models import Booking
+from .archive import get_user_booking, user_booking_list
+
+def _quote_params(data):
+    """(travel_date, adults, children, child_ages) from a booking form or query string"""
+    try:
+        travel_date = parse_date(data.get('travel_date') or '')
+    except ValueError:
+        travel_date = None
+    if travel_date is None:
+        raise pricing.QuoteError('Please choose a valid travel date.')
+    try:
+        adults = int(data.get('number_of_adults', 1))
+        children = int(data.get('number_of_children', 0))
+        ages = data.get('child_ages', '').strip()
+        if ages.count(',') >= settings.QUOTE_MAX_TRAVELLERS:
+            raise pricing.QuoteError('Too many child ages.')
+        child_ages = [int(age) for age in ages.split(',')] if ages else None
+    except ValueError:
+        raise pricing.QuoteError('Numbers of travellers and ages must be whole numbers.')
+    return travel_date, adults, children, child_ages
 
+@query_budget(13)
+@rate_limit('book_package')
 def book_package(request, package_id):
     """View for booking a package"""
     package = get_object_or_404(Package, id=package_id)
@@ -14,10 +50,10 @@ def book_package(request, package_id):
     if request.method == 'POST':
         # Process the booking form
         try:
-            # Calculate total price based on number of people
-            adults = int(request.POST.get('number_of_adults', 1))
-            children = int(request.POST.get('number_of_children', 0))
-            total_price = package.price * adults + (package.price * 0.5 * children)
+            # Price with the quote engine (seasons, child bands, group discounts, supplements)
+            travel_date, adults, children, child_ages = _quote_params(request.POST)
+            quote = pricing.quote(package.id, travel_date, adults, children, child_ages)
+            total_price = quote.total
             
             # Create booking
             booking = Booking.objects.create(
@@ -25,7 +61,7 @@ def book_package(request, package_id):
                 name=request.POST.get('name'),
                 email=request.POST.get('email'),
                 phone=request.POST.get('phone'),
-                travel_date=request.POST.get('travel_date'),
+                travel_date=travel_date,
                 number_of_adults=adults,
                 number_of_children=children,
                 special_requirements=request.POST.get('special_requirements', ''),
@@ -43,14 +79,51 @@ def book_package(request, package_id):
             
             messages.success(request, 'Your booking has been submitted successfully! You will receive a confirmation email shortly.')
             return redirect('booking_confirmation', booking_id=booking.id)
+        except pricing.QuoteError as e:
+            messages.error(request, str(e))
         except Exception as e:
             messages.error(request, f'There was an error processing your booking. Please try again. Error: {e}')
     
+    # Charged in the base currency; the converted price is for display only
+    package.display_price = currency.convert(package.price, currency.preferred(request))
+    
     context = {
         'package': package,
+        'quote_url': reverse('quote_preview', args=[package.id]),
     }
     return render(request, 'bookings/book_package.html', context)
 
+@query_budget(6)
+@require_GET
+def quote_preview(request, package_id):
+    """JSON price breakdown for the booking form, cached per catalogue version and inputs"""
+    try:
+        travel_date, adults, children, child_ages = _quote_params(request.GET)
+    except pricing.QuoteError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    display_currency = currency.preferred(request)
+    ages = ','.join(map(str, child_ages)) if child_ages is not None else ''
+    key = (f'quote:{catalogue.version()}:{package_id}:{travel_date.isoformat()}:{adults}:{children}:{ages}:'
+           f'{display_currency}:{catalogue.read_version(currency.FX_VERSION_KEY)}')
+    payload = cache.get(key)
+    if payload is None:
+        try:
+            quote = pricing.quote(package_id, travel_date, adults, children, child_ages)
+        except pricing.UnknownPackage:
+            raise Http404('No Package matches the given query.')
+        except pricing.QuoteError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        payload = quote.as_dict()
+        # The same total in the visitor's currency, for display next to the INR amount
+        payload['display_total'] = str(currency.convert(quote.total, display_currency))
+        cache.set(key, payload, settings.QUOTE_PREVIEW_CACHE_SECONDS)
+    
+    response = JsonResponse(payload)
+    patch_cache_control(response, private=True, max_age=60)
+    return response
+
+@query_budget(6)
 def booking_confirmation(request, booking_id):
     """View for displaying booking confirmation"""
     booking = get_object_or_404(Booking, id=booking_id)
@@ -68,26 +141,29 @@ def booking_confirmation(request, booking_id):
     }
     return render(request, 'bookings/booking_confirmation.html', context)
 
+@query_budget(6)
 @login_required
 def user_bookings(request):
     """View for displaying all bookings for the logged-in user"""
-    bookings = Booking.objects.filter(user=request.user).order_by('-booking_date')
+    bookings = user_booking_list(request.user)  # Includes archived bookings
     
     context = {
         'bookings': bookings,
     }
     return render(request, 'bookings/user_bookings.html', context)
 
+@query_budget(6)
 @login_required
 def booking_detail(request, booking_id):
     """View for displaying detailed information about a specific booking"""
-    booking = get_object_or_404(Booking, id=booking_id, user=request.user)
+    booking = get_user_booking(request.user, booking_id)  # Falls back to the archive
     
     context = {
         'booking': booking,
     }
     return render(request, 'bookings/booking_detail.html', context)
 
+@query_budget(6)
 @login_required
 def cancel_booking(request, booking_id):
     """View for cancelling a booking"""
@@ -107,4 +183,56 @@ def cancel_booking(request, booking_id):
     context = {
         'booking': booking,
     }
-    return render(request, 'bookings/cancel_booking.html', context)
\ No newline at end of file
+    return render(request, 'bookings/cancel_booking.html', context)
+
+def _safe_date(value):
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
+
+def _report_params(request):
+    """(group, first day, last day) for the booking reports; defaults to packages over the last 90 days"""
+    group = request.GET.get('group', 'package')
+    if group not in analytics.GROUPINGS:
+        group = 'package'
+    last = _safe_date(request.GET.get('end')) or timezone.localdate()
+    first = _safe_date(request.GET.get('start')) or last - timedelta(days=89)
+    return group, min(first, last), last
+
+@query_budget(8)
+@staff_member_required
+def booking_report(request):
+    """Staff dashboard of booking totals, read from the daily rollups only"""
+    group, first, last = _report_params(request)
+    rows = analytics.report(group, first, last)
+    totals = {name: sum(row[name] for row in rows) for name in ('bookings', 'travellers', 'revenue', 'cancelled')}
+    
+    context = {
+        'rows': rows,
+        'totals': totals,
+        'group': group,
+        'groupings': list(analytics.GROUPINGS),
+        'start': first,
+        'end': last,
+        'last_refreshed': analytics.last_refreshed(),
+    }
+    return render(request, 'bookings/booking_report.html', context)
+
+@query_budget(6)
+@staff_member_required
+def booking_report_csv(request):
+    """The booking report as CSV, with the same parameters as the dashboard"""
+    group, first, last = _report_params(request)
+    response = HttpResponse(content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="bookings-by-{group}-{first}-{last}.csv"'
+    
+    columns = ('bookings', 'adults', 'children', 'travellers', 'total_price', 'cancelled_price', 'revenue',
+               'pending', 'confirmed', 'completed', 'cancelled', 'cancellation_rate')
+    writer = csv.writer(response)
+    writer.writerow((group,) + columns)
+    for row in analytics.report(group, first, last):
+        writer.writerow([row['label']] + [
+            f'{row[name]:.4f}' if name == 'cancellation_rate' else row[name] for name in columns
+        ])
+    return response
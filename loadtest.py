@@ -0,0 +1,421 @@
+#!/usr/bin/env python
+"""
+Load generator for the browse-and-book journeys.
+
+Runs on one box against runserver, gunicorn or uvicorn using only the
+standard library (an asyncio HTTP/1.1 client with keep-alive and cookies).
+Virtual users replay weighted journeys:
+
+    browse   home -> package_list (filters/search) -> package_detail
+    book     browse -> book_package GET -> book_package POST -> booking_confirmation
+    account  login -> user_bookings
+
+Journeys start as a Poisson process at ``--rate`` per second (open model), or
+back to back per worker when ``--rate`` is 0 (closed model), capped at
+``--concurrency`` in flight. The report gives throughput, error rate and
+latency percentiles per URL name; ``--json`` saves it and ``--compare``
+prints the change against a previous run.
+
+The book and account journeys POST to rate-limited views (see
+``RATE_LIMITS``), so run the server under test with
+``RATE_LIMIT_ENABLED=False`` or most of those requests will record 429s.
+
+Example:
+    RATE_LIMIT_ENABLED=False python manage.py runserver --noreload &
+    python loadtest.py http://127.0.0.1:8000 --duration 60 --rate 20 --concurrency 50 \\
+        --user customer@example.com:secret --json run.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import statistics
+import sys
+import time
+from collections import defaultdict
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urljoin, urlsplit
+
+SEARCH_TERMS = ['goa', 'kerala', 'dubai', 'kashmir', 'beach', 'honeymoon', 'bali', 'temple']
+SORTS = ['-created_at', 'price', '-price', 'popular']
+DURATIONS = ['', 'short', 'medium', 'long']
+CSRF_INPUT_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+class HttpError(Exception):
+    pass
+
+
+class Response:
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    @property
+    def text(self):
+        return self.body.decode('utf-8', 'replace')
+
+
+class Session:
+    """One virtual user: a keep-alive connection plus a cookie jar"""
+
+    def __init__(self, base_url, stats, timeout):
+        parts = urlsplit(base_url)
+        self.base_url = base_url.rstrip('/')
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.ssl = parts.scheme == 'https'
+        self.stats = stats
+        self.timeout = timeout
+        self.cookies = {}
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+    async def _connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl or None)
+
+    async def request(self, name, method, path, form=None, headers=None, follow=True):
+        """Send a request, recording latency and outcome under ``name``"""
+        started = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(self._send(method, path, form, headers), self.timeout)
+            while follow and response.status in (301, 302, 303, 307) and 'location' in response.headers:
+                path = urljoin(path, response.headers['location'])
+                response = await asyncio.wait_for(self._send('GET', path, None, headers), self.timeout)
+        except (OSError, asyncio.TimeoutError, HttpError) as exc:
+            await self.close()
+            self.stats.record(name, time.perf_counter() - started, error=type(exc).__name__)
+            raise
+        error = f'HTTP {response.status}' if response.status >= 400 else None
+        self.stats.record(name, time.perf_counter() - started, error=error)
+        if error:
+            raise HttpError(error)
+        return response
+
+    async def _send(self, method, path, form, headers, retry=True):
+        if self.writer is None:
+            await self._connect()
+        body = urlencode(form).encode() if form is not None else b''
+        lines = [
+            f'{method} {path} HTTP/1.1',
+            f'Host: {self.host}:{self.port}',
+            'User-Agent: sanskruti-loadtest/1.0',
+            'Accept-Encoding: identity',
+            'Connection: keep-alive',
+        ]
+        if self.cookies:
+            lines.append('Cookie: ' + '; '.join(f'{key}={value}' for key, value in self.cookies.items()))
+        if form is not None:
+            lines.append('Content-Type: application/x-www-form-urlencoded')
+            lines.append(f'Content-Length: {len(body)}')
+            lines.append(f'Referer: {self.base_url}{path}')
+            if 'csrftoken' in self.cookies:
+                lines.append(f'X-CSRFToken: {self.cookies["csrftoken"]}')
+        for key, value in (headers or {}).items():
+            lines.append(f'{key}: {value}')
+        try:
+            self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + body)
+            await self.writer.drain()
+            return await self._read_response(method)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            # The server may close an idle keep-alive connection; reconnect once
+            await self.close()
+            if not retry:
+                raise
+            return await self._send(method, path, form, headers, retry=False)
+
+    async def _read_response(self, method):
+        status_line = await self.reader.readuntil(b'\r\n')
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise HttpError(f'Bad status line: {status_line[:80]!r}')
+
+        headers = {}
+        set_cookies = []
+        while True:
+            line = (await self.reader.readuntil(b'\r\n')).decode('latin-1').rstrip('\r\n')
+            if not line:
+                break
+            key, _, value = line.partition(':')
+            key, value = key.strip().lower(), value.strip()
+            if key == 'set-cookie':
+                set_cookies.append(value)
+            headers[key] = value
+
+        for header in set_cookies:
+            cookie = SimpleCookie()
+            cookie.load(header)
+            for key, morsel in cookie.items():
+                if morsel.value:
+                    self.cookies[key] = morsel.value
+                else:
+                    self.cookies.pop(key, None)
+
+        if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+            body = b''
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = await self._read_chunked()
+        elif 'content-length' in headers:
+            body = await self.reader.readexactly(int(headers['content-length']))
+        else:
+            body = await self.reader.read()
+            await self.close()
+
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return Response(status, headers, body)
+
+    async def _read_chunked(self):
+        chunks = []
+        while True:
+            size = int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16)
+            if size == 0:
+                # Skip trailers
+                while (await self.reader.readuntil(b'\r\n')) != b'\r\n':
+                    pass
+                return b''.join(chunks)
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readexactly(2)
+
+    def csrf_token(self, response=None):
+        if response is not None:
+            match = CSRF_INPUT_RE.search(response.text)
+            if match:
+                return match.group(1)
+        return self.cookies.get('csrftoken', '')
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(lambda: defaultdict(int))
+        self.journeys = defaultdict(int)
+        self.failed_journeys = defaultdict(int)
+        self.started = self.finished = None
+
+    def record(self, name, seconds, error=None):
+        self.latencies[name].append(seconds * 1000)
+        if error:
+            self.errors[name][error] += 1
+
+    def report(self):
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        rows = {}
+        for name, values in sorted(self.latencies.items()):
+            ordered = sorted(values)
+            errors = sum(self.errors[name].values())
+            rows[name] = {
+                'requests': len(values),
+                'rps': len(values) / elapsed,
+                'error_rate': errors / len(values),
+                'errors': dict(self.errors[name]),
+                'mean_ms': statistics.mean(ordered),
+                'p50_ms': _percentile(ordered, 50),
+                'p90_ms': _percentile(ordered, 90),
+                'p99_ms': _percentile(ordered, 99),
+                'max_ms': ordered[-1],
+            }
+        return {
+            'elapsed_s': elapsed,
+            'journeys': dict(self.journeys),
+            'failed_journeys': dict(self.failed_journeys),
+            'urls': rows,
+        }
+
+
+def _percentile(ordered, percent):
+    if not ordered:
+        return 0.0
+    # Nearest rank; round() would send halves to even and shift some ranks up by one
+    index = min(len(ordered) - 1, max(0, math.ceil(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def discover_packages(base_url, timeout):
+    """Fetch package ids and slugs from the JSON API so journeys hit real rows"""
+    session = Session(base_url, Stats(), timeout)
+    packages = []
+    path = '/api/v1/packages/?fields=id,slug&limit=100'
+    try:
+        while path and len(packages) < 1000:
+            response = await session.request('discover', 'GET', path)
+            payload = json.loads(response.body)
+            packages.extend((row['id'], row['slug']) for row in payload['data'])
+            path = payload.get('next')
+    finally:
+        await session.close()
+    return packages
+
+
+async def browse(session, ctx):
+    await session.request('home', 'GET', '/')
+    params = {}
+    if random.random() < 0.5:
+        params['type'] = random.choice(['national', 'international'])
+    if random.random() < 0.3:
+        params['q'] = random.choice(SEARCH_TERMS)
+    if random.random() < 0.3:
+        params['duration'] = random.choice(DURATIONS)
+    params['sort'] = random.choice(SORTS)
+    await session.request('package_list', 'GET', '/packages/?' + urlencode(params))
+    if random.random() < 0.3:
+        await session.request('package_list', 'GET', '/packages/?' + urlencode(dict(params, page=2)))
+    package = random.choice(ctx['packages'])
+    await session.request('package_detail', 'GET', f'/packages/{package[1]}/')
+    return package
+
+
+async def book(session, ctx):
+    package_id, _slug = await browse(session, ctx)
+    form_page = await session.request('book_package', 'GET', f'/bookings/book/{package_id}/')
+    travel_date = time.strftime('%Y-%m-%d', time.localtime(time.time() + random.randint(14, 180) * 86400))
+    form = {
+        'csrfmiddlewaretoken': session.csrf_token(form_page),
+        'name': 'Load Test',
+        'email': f'loadtest+{random.randint(1, 10 ** 6)}@example.com',
+        'phone': '9000000000',
+        'travel_date': travel_date,
+        'number_of_adults': random.randint(1, 4),
+        'number_of_children': random.randint(0, 2),
+    }
+    # The POST redirects to booking_confirmation; record the two legs separately
+    response = await session.request('book_package_post', 'POST', f'/bookings/book/{package_id}/', form=form, follow=False)
+    location = response.headers.get('location', '')
+    if '/book-confirm/' in location:
+        await session.request('booking_confirmation', 'GET', urljoin(f'/bookings/book/{package_id}/', location))
+    else:
+        session.stats.record('booking_confirmation', 0, error='no redirect')
+        raise HttpError('Booking POST did not redirect to confirmation')
+
+
+async def account(session, ctx):
+    if not ctx['users']:
+        return await browse(session, ctx)
+    email, password = random.choice(ctx['users'])
+    login_page = await session.request('login', 'GET', '/accounts/login/')
+    form = {'csrfmiddlewaretoken': session.csrf_token(login_page), 'username': email, 'password': password}
+    await session.request('login_post', 'POST', '/accounts/login/', form=form)
+    if 'sessionid' not in session.cookies:
+        raise HttpError('Login failed')
+    await session.request('user_bookings', 'GET', '/bookings/my-bookings/')
+
+
+JOURNEYS = {'browse': browse, 'book': book, 'account': account}
+
+
+async def run_journey(name, ctx, stats):
+    session = Session(ctx['base_url'], stats, ctx['timeout'])
+    stats.journeys[name] += 1
+    try:
+        await JOURNEYS[name](session, ctx)
+    except (OSError, asyncio.TimeoutError, HttpError, ValueError):
+        stats.failed_journeys[name] += 1
+    finally:
+        await session.close()
+
+
+async def main(args):
+    weights = {}
+    for item in args.weights.split(','):
+        name, _, weight = item.partition('=')
+        if name not in JOURNEYS:
+            sys.exit(f'Unknown journey {name!r}; choose from {", ".join(JOURNEYS)}')
+        weights[name] = float(weight or 1)
+
+    packages = await discover_packages(args.base_url, args.timeout)
+    if not packages:
+        sys.exit('No packages found via /api/v1/packages/; load some catalogue data first.')
+
+    ctx = {
+        'base_url': args.base_url,
+        'timeout': args.timeout,
+        'packages': packages,
+        'users': [tuple(user.split(':', 1)) for user in args.user],
+    }
+    stats = Stats()
+    names, probabilities = list(weights), list(weights.values())
+    limit = asyncio.Semaphore(args.concurrency)
+    deadline = time.perf_counter() + args.duration
+    tasks = set()
+
+    async def guarded(journey):
+        async with limit:
+            await run_journey(journey, ctx, stats)
+
+    stats.started = time.perf_counter()
+    if args.rate > 0:
+        # Open model: Poisson arrivals, independent of how fast the server answers
+        while time.perf_counter() < deadline:
+            task = asyncio.create_task(guarded(random.choices(names, probabilities)[0]))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            await asyncio.sleep(random.expovariate(args.rate))
+    else:
+        # Closed model: each worker starts its next journey as soon as the last one ends
+        async def worker():
+            while time.perf_counter() < deadline:
+                await run_journey(random.choices(names, probabilities)[0], ctx, stats)
+        tasks.update(asyncio.create_task(worker()) for _ in range(args.concurrency))
+    if tasks:
+        await asyncio.gather(*tasks)
+    stats.finished = time.perf_counter()
+    return stats.report()
+
+
+def print_report(report, previous=None):
+    print(f"\nElapsed {report['elapsed_s']:.1f}s   journeys {report['journeys']}   failed {report['failed_journeys']}\n")
+    header = f"{'url name':24}{'reqs':>8}{'rps':>9}{'err%':>7}{'mean':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}"
+    print(header)
+    print('-' * len(header))
+    for name, row in report['urls'].items():
+        print(f"{name:24}{row['requests']:>8}{row['rps']:>9.1f}{row['error_rate'] * 100:>6.1f}%"
+              f"{row['mean_ms']:>9.1f}{row['p50_ms']:>9.1f}{row['p90_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}")
+        if previous and name in previous['urls']:
+            before = previous['urls'][name]
+            print(f"{'  vs previous':24}{'':>8}{_delta(row['rps'], before['rps']):>9}{'':>7}"
+                  f"{_delta(row['mean_ms'], before['mean_ms']):>9}{_delta(row['p50_ms'], before['p50_ms']):>9}"
+                  f"{_delta(row['p90_ms'], before['p90_ms']):>9}{_delta(row['p99_ms'], before['p99_ms']):>9}")
+        for error, count in row['errors'].items():
+            print(f'    {count} x {error}')
+
+
+def _delta(now, before):
+    if not before:
+        return 'n/a'
+    return f'{(now - before) / before * 100:+.0f}%'
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0], formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('base_url', help='e.g. http://127.0.0.1:8000')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to generate load')
+    parser.add_argument('--rate', type=float, default=10, help='Journeys started per second (0 = closed model)')
+    parser.add_argument('--concurrency', type=int, default=20, help='Maximum journeys in flight')
+    parser.add_argument('--weights', default='browse=6,book=3,account=1', help='Journey mix, name=weight pairs')
+    parser.add_argument('--user', action='append', default=[], metavar='EMAIL:PASSWORD',
+                        help='Credentials for the account journey (repeatable)')
+    parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds')
+    parser.add_argument('--json', help='Write the report to this file')
+    parser.add_argument('--compare', help='Previous --json report to compare against')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    arguments = parse_args()
+    result = asyncio.run(main(arguments))
+    previous_report = None
+    if arguments.compare:
+        with open(arguments.compare) as handle:
+            previous_report = json.load(handle)
+    print_report(result, previous_report)
+    if arguments.json:
+        with open(arguments.json, 'w') as handle:
+            json.dump(result, handle, indent=2)
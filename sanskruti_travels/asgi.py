@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+from sanskruti_travels import startup
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sanskruti_travels.settings')
 
+startup.setup()
+
+from django.core.asgi import get_asgi_application  # noqa: E402
+
 application = get_asgi_application()
+
+# The server imports this inside its event loop; warm up off-loop and gate traffic on readiness
+startup.warmup(background=True)
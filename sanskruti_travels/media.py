@@ -0,0 +1,204 @@
+"""
+Production media delivery for MEDIA_ROOT and private uploads.
+
+MEDIA_SERVE_BACKEND picks how file bytes are sent:
+
+    'python'    FileResponse (sendfile via wsgi.file_wrapper) with Range support
+    'accel'     X-Accel-Redirect to an internal nginx location
+    'sendfile'  X-Sendfile for Apache mod_xsendfile / lighttpd
+
+Every backend answers conditional requests from ETag/Last-Modified before
+touching the file. Private files go through an access check first.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse,
+)
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe
+
+CHUNK_SIZE = 64 * 1024
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+# (path prefix, check(request, relative_path) -> bool), first match wins
+_access_rules = []
+
+
+def register_access_rule(prefix, check):
+    """Protect private files under ``prefix`` with ``check(request, path)``"""
+    _access_rules.append((prefix, check))
+
+
+def _staff_only(request, path):
+    return request.user.is_authenticated and request.user.is_staff
+
+
+def _booking_owner(request, path):
+    """bookings/<booking_id>/... is readable by the booking's owner and staff"""
+    if _staff_only(request, path):
+        return True
+    if not request.user.is_authenticated:
+        return False
+    booking_id = path.split('/')[1] if path.count('/') >= 2 else ''
+    if not booking_id.isdecimal() or len(booking_id) > 18:
+        return False
+    from bookings.models import ArchivedBooking, Booking
+    # Owners keep access to their files after bookings.archive moves the booking
+    return any(model.objects.filter(id=int(booking_id), user=request.user).exists()
+               for model in (Booking, ArchivedBooking))
+
+
+register_access_rule('bookings/', _booking_owner)
+
+
+def _etag(stat):
+    return f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+
+
+def _not_modified(request, etag, mtime):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+    modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return modified_since is not None and int(mtime) <= modified_since
+
+
+def _parse_range(header, size):
+    """Return (start, end) inclusive for a single satisfiable byte range, 'invalid', or None"""
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None  # Multi-range or malformed: ignore and send the whole file
+    first, last = match.groups()
+    if first == '' and last == '':
+        return None
+    if first == '':
+        length = int(last)
+        if length == 0:
+            return 'invalid'
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return 'invalid'
+    return start, end
+
+
+def _range_iterator(path, start, length):
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = handle.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _python_response(request, path, stat, content_type):
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    byte_range = None
+    if range_header and (if_range is None or if_range == _etag(stat)):
+        byte_range = _parse_range(range_header, stat.st_size)
+
+    if byte_range == 'invalid':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+    if byte_range is not None:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(_range_iterator(path, start, length), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = length
+        return response
+
+    # Whole file: FileResponse hands the handle to wsgi.file_wrapper, which uses sendfile
+    response = FileResponse(open(path, 'rb'), content_type=content_type)
+    response['Content-Length'] = stat.st_size
+    return response
+
+
+def _offload_response(path, root, internal_prefix, backend, content_type):
+    response = HttpResponse(content_type=content_type)
+    if backend == 'accel':
+        relative = os.path.relpath(path, root).replace(os.sep, '/')
+        response['X-Accel-Redirect'] = internal_prefix.rstrip('/') + '/' + quote(relative)
+    else:
+        response['X-Sendfile'] = path
+    return response
+
+
+def send_file(request, root, relative_path, internal_prefix, cache_control):
+    """Resolve ``relative_path`` under ``root`` and send it with the configured backend"""
+    try:
+        path = safe_join(root, relative_path)
+    except SuspiciousFileOperation:
+        raise Http404('File not found.')
+    try:
+        stat = os.stat(path)
+    except OSError:
+        raise Http404('File not found.')
+    if not os.path.isfile(path):
+        raise Http404('File not found.')
+
+    etag = _etag(stat)
+    if _not_modified(request, etag, stat.st_mtime):
+        response = HttpResponseNotModified()
+    else:
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        backend = getattr(settings, 'MEDIA_SERVE_BACKEND', 'python')
+        if backend in ('accel', 'sendfile'):
+            response = _offload_response(path, root, internal_prefix, backend, content_type)
+        else:
+            response = _python_response(request, path, stat, content_type)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = cache_control
+    return response
+
+
+def _clean_path(path):
+    """``path`` if it is already a normalised relative path, else 404"""
+    # Access rules match on the path text, so "bookings/5/../6/x" must never reach them
+    if (not path or path.startswith('/') or '\\' in path or posixpath.normpath(path) != path
+            or '..' in path.split('/')):
+        raise Http404('File not found.')
+    return path
+
+
+def serve_media(request, path):
+    """Public uploads under MEDIA_ROOT (package galleries, profile pictures)"""
+    return send_file(
+        request, settings.MEDIA_ROOT, _clean_path(path),
+        getattr(settings, 'MEDIA_ACCEL_PREFIX', '/internal-media/'),
+        f'public, max-age={getattr(settings, "MEDIA_MAX_AGE", 86400)}',
+    )
+
+
+def serve_private_media(request, path):
+    """Private uploads under PRIVATE_MEDIA_ROOT, only after an access rule allows it"""
+    path = _clean_path(path)
+    for prefix, check in _access_rules:
+        if path.startswith(prefix):
+            allowed = check(request, path)
+            break
+    else:
+        allowed = _staff_only(request, path)
+    if not allowed:
+        # Don't reveal whether the file exists
+        raise Http404('File not found.')
+    return send_file(
+        request, settings.PRIVATE_MEDIA_ROOT, path,
+        getattr(settings, 'PRIVATE_MEDIA_ACCEL_PREFIX', '/internal-private-media/'),
+        'private, no-cache',
+    )
@@ -0,0 +1,355 @@
+"""
+On-demand profiling of live requests.
+
+A request is profiled when it carries a staff token, either as an
+``X-Profile`` header or a ``_profile`` query parameter. The profile page
+issues tokens, and ``make_token`` does the same in a shell. A request is
+also profiled when it hits a URL name in ``PROFILE_SAMPLE_RATES``, e.g.
+``{'package_list': 0.01}``, and wins the draw.
+
+Overhead when inactive: requests without a token cost one random draw and,
+only when the draw is under the largest sample rate, one URL resolve.
+Tokens are ``TimestampSigner`` values, valid for ``PROFILE_TOKEN_MAX_AGE``
+and only while their user is still active staff.
+
+Profiling modes (``PROFILE_MODE``, or ``?_profile_mode=``):
+
+    sample    a thread samples the request's stack every
+              PROFILE_SAMPLE_INTERVAL_MS and writes folded stacks
+              (``<name>.folded``) for flamegraph.pl, speedscope or inferno
+    cprofile  deterministic cProfile, saved as ``<name>.prof`` for pstats,
+              snakeviz or flameprof
+
+Both record a SQL timeline of every statement, with its offset, duration
+and text, into ``<name>.json`` next to the request metadata. One request
+per process is profiled at a time. Files live in ``PROFILE_ROOT`` and only
+the newest ``PROFILE_KEEP`` are kept. Staff browse them at ``/profiles/``.
+The profiled response carries an ``X-Profile-Id`` header.
+"""
+import cProfile
+import json
+import logging
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import FileResponse, Http404
+from django.shortcuts import render
+from django.urls import Resolver404, resolve
+
+from .querybudget import query_budget
+
+logger = logging.getLogger(__name__)
+
+TOKEN_SALT = 'sanskruti_travels.profiling'
+HEADER = 'HTTP_X_PROFILE'
+QUERY_PARAM = '_profile'
+MODES = ('sample', 'cprofile')
+FILE_KINDS = {'json': 'application/json', 'folded': 'text/plain', 'prof': 'application/octet-stream'}
+_NAME_RE = re.compile(r'^[\w.-]+$')
+
+_active = threading.Lock()  # cProfile and the SQL wrappers assume one profiled request at a time
+_labels = {}  # code object -> frame label
+
+
+def make_token(user):
+    """Signed token that lets ``user`` profile requests until it expires"""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(str(user.pk))
+
+
+def _token_user(token):
+    """Id of the user a valid token was issued to, if they are still active staff"""
+    max_age = getattr(settings, 'PROFILE_TOKEN_MAX_AGE', 3600)
+    try:
+        user_id = signing.TimestampSigner(salt=TOKEN_SALT).unsign(token, max_age=max_age)
+    except signing.BadSignature:
+        logger.info('Ignoring invalid or expired profiling token')
+        return None
+    # One query, paid only by requests that carry a token
+    if not get_user_model().objects.filter(pk=user_id, is_active=True, is_staff=True).exists():
+        logger.info('Ignoring profiling token of user %s, who is no longer active staff', user_id)
+        return None
+    return user_id
+
+
+def _profile_root():
+    return str(getattr(settings, 'PROFILE_ROOT', os.path.join(settings.BASE_DIR, 'profiles')))
+
+
+def _frame_label(code):
+    label = _labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        if os.sep + 'site-packages' + os.sep in filename:
+            filename = filename.split(os.sep + 'site-packages' + os.sep, 1)[1]
+        elif filename.startswith(str(settings.BASE_DIR)):
+            filename = os.path.relpath(filename, settings.BASE_DIR)
+        label = _labels[code] = f'{code.co_name} ({filename}:{code.co_firstlineno})'.replace(';', ':')
+    return label
+
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval into folded-stack counts"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.counts[tuple(reversed(stack))] += 1
+
+    def folded(self):
+        return ''.join(f'{";".join(stack)} {count}\n' for stack, count in self.counts.most_common())
+
+
+class ProfileSession:
+    """Profiler plus SQL timeline for one request; used as a context manager around the response"""
+
+    def __init__(self, mode, reason):
+        self.mode = mode
+        self.reason = reason
+        self.queries = []  # [(offset ms, duration ms, sql, many)]
+        self._stack = ExitStack()
+
+    def __enter__(self):
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self._record_sql))
+        if self.mode == 'cprofile':
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        else:
+            interval = getattr(settings, 'PROFILE_SAMPLE_INTERVAL_MS', 5) / 1000
+            self.profiler = StackSampler(threading.get_ident(), interval)
+            self.profiler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.mode == 'cprofile':
+            self.profiler.disable()
+        else:
+            self.profiler.stop()
+        self.duration = time.perf_counter() - self.started
+        self._stack.close()
+
+    def _record_sql(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((
+                round((start - self.started) * 1000, 3),
+                round((time.perf_counter() - start) * 1000, 3),
+                sql[:4000], many,
+            ))
+
+    def save(self, request, response):
+        """Write the profile files and return their shared name"""
+        match = getattr(request, 'resolver_match', None)
+        view_name = (match.view_name if match else '') or 'unresolved'
+        name = '{}-{}-{}'.format(
+            time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started_at)),
+            re.sub(r'[^\w.-]', '_', view_name)[:60], secrets.token_hex(3),
+        )
+        root = _profile_root()
+        os.makedirs(root, exist_ok=True)
+        base = os.path.join(root, name)
+        if self.mode == 'cprofile':
+            self.profiler.dump_stats(base + '.prof')
+        else:
+            with open(base + '.folded', 'w', encoding='utf-8') as handle:
+                handle.write(self.profiler.folded())
+
+        user = getattr(request, 'user', None)
+        metadata = {
+            'name': name,
+            'mode': self.mode,
+            'reason': self.reason,
+            'started_at': self.started_at,
+            'duration_ms': round(self.duration * 1000, 3),
+            'method': request.method,
+            'path': _public_path(request),
+            'view': view_name,
+            'status': response.status_code,
+            'user_id': user.pk if user is not None and user.is_authenticated else None,
+            'query_count': len(self.queries),
+            'query_ms': round(sum(duration for offset, duration, sql, many in self.queries), 3),
+            'queries': self.queries,
+        }
+        with open(base + '.json', 'w', encoding='utf-8') as handle:
+            json.dump(metadata, handle)
+        _prune(root)
+        return name
+
+
+def _public_path(request):
+    """Request path and query string without the profiling token"""
+    query = request.GET.copy()
+    query.pop(QUERY_PARAM, None)
+    return request.path + ('?' + query.urlencode() if query else '')
+
+
+def _prune(root):
+    keep = getattr(settings, 'PROFILE_KEEP', 500)
+    names = sorted({entry.name.rsplit('.', 1)[0] for entry in os.scandir(root) if entry.name.endswith('.json')})
+    # Allow some slack so pruning runs once per 50 profiles rather than on every one
+    if len(names) <= keep + 50:
+        return
+    for name in names[:len(names) - keep]:
+        for kind in FILE_KINDS:
+            try:
+                os.unlink(os.path.join(root, f'{name}.{kind}'))
+            except FileNotFoundError:
+                pass
+
+
+class ProfilingMiddleware:
+    """Profile requests carrying a staff token, or a sample of requests to configured URL names"""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.rates = getattr(settings, 'PROFILE_SAMPLE_RATES', {})
+        self.max_rate = max(self.rates.values(), default=0)
+        self.default_mode = getattr(settings, 'PROFILE_MODE', 'sample')
+
+    def __call__(self, request):
+        reason = self._trigger(request)
+        if reason is None or not _active.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            mode = request.GET.get('_profile_mode', self.default_mode) if reason != 'sampled' else self.default_mode
+            with ProfileSession(mode if mode in MODES else self.default_mode, reason) as session:
+                response = self.get_response(request)
+            try:
+                response['X-Profile-Id'] = session.save(request, response)
+            except OSError:
+                logger.exception('Could not write profile for %s', request.path)
+        finally:
+            _active.release()
+        return response
+
+    def _trigger(self, request):
+        token = request.META.get(HEADER)
+        if token is None and QUERY_PARAM + '=' in request.META.get('QUERY_STRING', ''):
+            token = request.GET.get(QUERY_PARAM)
+        if token:
+            user_id = _token_user(token)
+            return f'token:{user_id}' if user_id is not None else None
+        if self.max_rate and random.random() < self.max_rate:
+            # Decide against the largest rate first so most requests never pay for the resolve
+            try:
+                url_name = resolve(request.path_info).view_name
+            except Resolver404:
+                return None
+            # Scale so the overall chance for this URL name is exactly its own rate
+            if random.random() * self.max_rate < self.rates.get(url_name, 0):
+                return 'sampled'
+        return None
+
+
+def _load(name):
+    if not _NAME_RE.match(name):
+        raise Http404('No such profile.')
+    try:
+        with open(os.path.join(_profile_root(), name + '.json'), encoding='utf-8') as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        raise Http404('No such profile.')
+
+
+def _hot_functions(name, limit=30):
+    """[(frame, self samples, total samples)] from a folded profile, hottest first"""
+    own, total = Counter(), Counter()
+    try:
+        with open(os.path.join(_profile_root(), name + '.folded'), encoding='utf-8') as handle:
+            for line in handle:
+                stack, _, count = line.rstrip('\n').rpartition(' ')
+                frames = stack.split(';')
+                own[frames[-1]] += int(count)
+                for frame in set(frames):
+                    total[frame] += int(count)
+    except OSError:
+        return []
+    return [(frame, own[frame], count) for frame, count in total.most_common(limit)]
+
+
+@query_budget(4)
+@staff_member_required
+def profile_list(request):
+    """Recent profiles, newest first, and a token for profiling more requests"""
+    root = _profile_root()
+    names = []
+    if os.path.isdir(root):
+        names = sorted((entry.name[:-5] for entry in os.scandir(root) if entry.name.endswith('.json')), reverse=True)
+    profiles = []
+    for name in names[:200]:
+        try:
+            profile = _load(name)
+        except Http404:
+            continue
+        profile.pop('queries', None)
+        profiles.append(profile)
+
+    context = {
+        'profiles': profiles,
+        'token': make_token(request.user),
+        'token_max_age': getattr(settings, 'PROFILE_TOKEN_MAX_AGE', 3600),
+        'sample_rates': getattr(settings, 'PROFILE_SAMPLE_RATES', {}),
+    }
+    return render(request, 'profiling/profile_list.html', context)
+
+
+@query_budget(4)
+@staff_member_required
+def profile_detail(request, name):
+    """One profile: request details, hottest functions and the SQL timeline"""
+    profile = _load(name)
+    context = {
+        'profile': profile,
+        'hot_functions': _hot_functions(name) if profile['mode'] == 'sample' else [],
+        'files': [kind for kind in FILE_KINDS if os.path.exists(os.path.join(_profile_root(), f'{name}.{kind}'))],
+    }
+    return render(request, 'profiling/profile_detail.html', context)
+
+
+@query_budget(4)
+@staff_member_required
+def profile_download(request, name, kind):
+    if not _NAME_RE.match(name) or kind not in FILE_KINDS:
+        raise Http404('No such profile.')
+    path = os.path.join(_profile_root(), f'{name}.{kind}')
+    if not os.path.exists(path):
+        raise Http404('No such profile.')
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=f'{name}.{kind}', content_type=FILE_KINDS[kind])
@@ -0,0 +1,160 @@
+"""
+Per-view query budgets and N+1 detection.
+
+Budgets are declared with the ``@query_budget(n)`` decorator or, for views
+we don't own (class-based auth views), by URL name in ``QUERY_BUDGETS``.
+``QueryBudgetMiddleware`` counts every SQL statement a request runs and
+fingerprints it with its parameters stripped. Identical fingerprints seen
+``QUERY_BUDGET_REPEAT_THRESHOLD`` times are reported as an N+1 signature
+along with the template line or Python call site that issued them.
+
+Violations in budgeted views raise ``QueryBudgetExceeded`` when
+``QUERY_BUDGET_RAISE`` is on (the default under DEBUG); everything else is
+logged. Tests can use
+``assert_max_queries`` directly.
+"""
+import logging
+import os
+import re
+import sys
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_PROJECT_ROOT = str(settings.BASE_DIR)
+_TEMPLATE_BASE = os.path.join('django', 'template', 'base.py')
+
+_IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_budget(max_queries):
+    """Declare the maximum number of SQL queries a view may run"""
+    def decorator(view_func):
+        view_func.query_budget = max_queries
+        return view_func
+    return decorator
+
+
+def fingerprint(sql):
+    """Normalize SQL so statements differing only in parameters compare equal"""
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _LITERAL_RE.sub('?', sql)
+
+
+def _call_site():
+    """Best-effort location of the code that issued a query: template line, else project frame"""
+    frame = sys._getframe(2)
+    project_site = None
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.endswith(_TEMPLATE_BASE):
+            node = frame.f_locals.get('self')
+            token = getattr(node, 'token', None)
+            origin = getattr(node, 'origin', None)
+            if token is not None and origin is not None:
+                return f'{origin.template_name}:{token.lineno}'
+        elif (project_site is None and filename.startswith(_PROJECT_ROOT)
+              and os.sep + 'site-packages' + os.sep not in filename
+              and not filename.endswith('querybudget.py')):
+            project_site = f'{os.path.relpath(filename, _PROJECT_ROOT)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return project_site or 'unknown'
+
+
+class QueryRecorder:
+    """``execute_wrapper`` that counts and fingerprints queries"""
+
+    def __init__(self, repeat_threshold):
+        self.repeat_threshold = repeat_threshold
+        self.count = 0
+        self.fingerprints = {}
+        self.sites = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        key = fingerprint(sql)
+        seen = self.fingerprints.get(key, 0) + 1
+        self.fingerprints[key] = seen
+        if seen == self.repeat_threshold:
+            # Only pay for stack inspection once a statement actually looks like an N+1
+            self.sites[key] = _call_site()
+        return execute(sql, params, many, context)
+
+    def repeated(self):
+        return [
+            (key, count, self.sites.get(key, 'unknown'))
+            for key, count in self.fingerprints.items()
+            if count >= self.repeat_threshold
+        ]
+
+    def problems(self, budget):
+        problems = []
+        if budget is not None and self.count > budget:
+            problems.append(f'{self.count} queries exceeds the budget of {budget}')
+        for key, count, site in self.repeated():
+            problems.append(f'N+1 suspected: {count}x at {site}: {key[:200]}')
+        return problems
+
+
+@contextmanager
+def record_queries(repeat_threshold=None):
+    """Record queries on every database connection for the duration of the block"""
+    if repeat_threshold is None:
+        repeat_threshold = getattr(settings, 'QUERY_BUDGET_REPEAT_THRESHOLD', 5)
+    recorder = QueryRecorder(repeat_threshold)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+
+
+@contextmanager
+def assert_max_queries(max_queries, repeat_threshold=None):
+    """Test helper: fail if the block runs more than ``max_queries`` queries or an N+1"""
+    with record_queries(repeat_threshold) as recorder:
+        yield recorder
+    problems = recorder.problems(max_queries)
+    if problems:
+        raise QueryBudgetExceeded('\n'.join(problems))
+
+
+class QueryBudgetMiddleware:
+    """Enforce per-view query budgets and flag N+1 query patterns"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.url_budgets = getattr(settings, 'QUERY_BUDGETS', {})
+        self.should_raise = getattr(settings, 'QUERY_BUDGET_RAISE', settings.DEBUG)
+
+    def __call__(self, request):
+        with record_queries() as recorder:
+            response = self.get_response(request)
+        if response.status_code >= 500:
+            # The count includes whatever rendering the error page took; raising would hide the real error
+            return response
+
+        budget = getattr(request, '_query_budget', None)
+        problems = recorder.problems(budget)
+        if problems:
+            view = getattr(request, 'resolver_match', None)
+            label = view.view_name if view else request.path
+            message = f'Query budget violation in {label}:\n  ' + '\n  '.join(problems)
+            # Only views that opted into a budget fail hard; everything else (admin etc.) just logs
+            if self.should_raise and budget is not None:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        budget = getattr(view_func, 'query_budget', None)
+        if budget is None and request.resolver_match is not None:
+            budget = self.url_budgets.get(request.resolver_match.view_name)
+        request._query_budget = budget
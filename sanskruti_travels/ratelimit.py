@@ -0,0 +1,198 @@
+"""
+Rate limiting for form and authentication endpoints.
+
+Views opt in by policy name::
+
+    @rate_limit('contact')
+    def contact(request): ...
+
+and ``RATE_LIMITS`` maps each policy to its limits, e.g.
+``[('ip', '5/m'), ('field:email', '3/h')]``. A key is one of:
+
+    ip            client address (REMOTE_ADDR, or the hop in RATE_LIMIT_IP_HEADER
+                  added by the outermost of RATE_LIMIT_TRUSTED_PROXIES proxies)
+    session       session key, falling back to the IP for new visitors
+    user          user id, falling back to the IP for anonymous visitors
+    field:<name>  a POSTed value such as the email, case-insensitive
+
+Limits use a sliding window counter: the current fixed window's count plus
+the previous window's count weighted by how much of it still overlaps the
+sliding window. Each check is one atomic ``incr`` and one ``get`` on the
+shared cache (``RATE_LIMIT_CACHE``). If that cache errors, counters move to
+a per-process store so limiting degrades rather than failing open.
+
+Rejections get a plain 429 with ``Retry-After`` and are counted per policy
+and hour in the shared cache (see the ``rate_limit_stats`` command).
+"""
+import functools
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+_RATE_RE = re.compile(r'^(\d+)/(\d*)([smhd])$')
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+METRICS_TTL = 8 * 86400
+
+
+@functools.lru_cache(maxsize=None)
+def parse_rate(rate):
+    """'5/m' -> (5, 60); '10/15m' -> (10, 900)"""
+    match = _RATE_RE.match(rate.replace(' ', ''))
+    if match is None:
+        raise ValueError(f'Invalid rate {rate!r}; expected e.g. "5/m" or "10/15m"')
+    count, multiplier, unit = match.groups()
+    return int(count), int(multiplier or 1) * _UNITS[unit]
+
+
+class LocalCounters:
+    """Process-local stand-in for the cache's add/incr/get, used while the shared cache is down"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}  # key -> (value, expires_at)
+
+    def incr(self, key, timeout):
+        now = time.monotonic()
+        with self._lock:
+            value, expires = self._values.get(key, (0, 0))
+            if expires <= now:
+                value, expires = 0, now + timeout
+                if len(self._values) > 10000:
+                    self._values = {k: v for k, v in self._values.items() if v[1] > now}
+            self._values[key] = (value + 1, expires)
+            return value + 1
+
+    def get(self, key):
+        value, expires = self._values.get(key, (0, 0))
+        return value if expires > time.monotonic() else 0
+
+
+_local = LocalCounters()
+
+
+def _shared_cache():
+    return caches[getattr(settings, 'RATE_LIMIT_CACHE', 'default')]
+
+
+def _incr(key, timeout):
+    cache = _shared_cache()
+    try:
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # First hit in this window; add() loses the race harmlessly to a concurrent request
+            if cache.add(key, 1, timeout):
+                return 1
+            return cache.incr(key)
+    except Exception:
+        logger.warning('Rate limit cache unavailable, using process-local counters', exc_info=True)
+        return _local.incr(key, timeout)
+
+
+def _get(key):
+    try:
+        return _shared_cache().get(key) or 0
+    except Exception:
+        return _local.get(key)
+
+
+def client_ip(request):
+    header = getattr(settings, 'RATE_LIMIT_IP_HEADER', 'REMOTE_ADDR')
+    value = request.META.get(header)
+    if not value:
+        return request.META.get('REMOTE_ADDR', '')
+    # A forwarding header reads "<anything the client sent>, client, proxy1, ...": each proxy appends
+    # the address it saw. Only hops added by our own proxies can be trusted, so count from the right.
+    hops = [hop.strip() for hop in value.split(',') if hop.strip()]
+    trusted = max(getattr(settings, 'RATE_LIMIT_TRUSTED_PROXIES', 1), 1)
+    return hops[-min(trusted, len(hops))] if hops else request.META.get('REMOTE_ADDR', '')
+
+
+def _identity(request, key):
+    if key == 'ip':
+        return client_ip(request)
+    if key == 'session':
+        session_key = getattr(request, 'session', None) and request.session.session_key
+        return session_key or client_ip(request)
+    if key == 'user':
+        user = getattr(request, 'user', None)
+        return str(user.pk) if user is not None and user.is_authenticated else client_ip(request)
+    if key.startswith('field:'):
+        return request.POST.get(key[6:], '').strip().lower() or None
+    raise ValueError(f'Unknown rate limit key {key!r}')
+
+
+def check(request, policy):
+    """Count this request against ``policy``; returns seconds to wait if it is over a limit, else None"""
+    retry_after = None
+    now = time.time()
+    for key, rate in getattr(settings, 'RATE_LIMITS', {}).get(policy, ()):
+        identity = _identity(request, key)
+        if identity is None:
+            continue  # e.g. the form omitted the field; the other limits still apply
+        limit, window = parse_rate(rate)
+        digest = hashlib.blake2b(identity.encode(), digest_size=8).hexdigest()
+        index, elapsed = divmod(now, window)
+        base = f'rl:{policy}:{key}:{window}:{digest}'
+        current = _incr(f'{base}:{int(index)}', window * 2)
+        previous = _get(f'{base}:{int(index) - 1}')
+        weight = 1 - elapsed / window
+        if previous * weight + current > limit:
+            if current > limit:
+                wait = window - elapsed
+            else:
+                # Time until the previous window's share drops enough: previous * (1 - t / window) <= limit - current
+                wait = window * (1 - (limit - current) / previous) - elapsed
+            retry_after = max(retry_after or 0, math.ceil(wait), 1)
+    return retry_after
+
+
+def _record_rejection(policy):
+    hour = int(time.time() // 3600)
+    _incr(f'rl:metrics:{policy}:{hour}', METRICS_TTL)
+
+
+def rejections(policy, hours=24):
+    """[(hour start timestamp, rejected count)] for the last ``hours`` hours, oldest first"""
+    current = int(time.time() // 3600)
+    hour_keys = {hour: f'rl:metrics:{policy}:{hour}' for hour in range(current - hours + 1, current + 1)}
+    try:
+        counts = _shared_cache().get_many(list(hour_keys.values()))
+    except Exception:
+        counts = {key: _local.get(key) for key in hour_keys.values()}
+    return [(hour * 3600, counts.get(key, 0)) for hour, key in hour_keys.items()]
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse(
+        'Too many requests. Please wait a moment and try again.\n',
+        status=429, content_type='text/plain; charset=utf-8',
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def rate_limit(policy, methods=('POST',)):
+    """Apply the ``RATE_LIMITS[policy]`` limits to a view for the given HTTP methods"""
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods and getattr(settings, 'RATE_LIMIT_ENABLED', True):
+                retry_after = check(request, policy)
+                if retry_after is not None:
+                    _record_rejection(policy)
+                    logger.info('Rate limit %s exceeded by %s on %s', policy, client_ip(request), request.path)
+                    return too_many_requests(retry_after)
+            return view_func(request, *args, **kwargs)
+        wrapper.rate_limit_policy = policy
+        return wrapper
+    return decorator
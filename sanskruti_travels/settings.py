@@ -14,9 +14,11 @@ import os
 from pathlib import Path
 import environ
 
-# Initialize environment variables
+# Initialize environment variables. Deployments that inject the environment
+# directly can skip parsing the .env file with DJANGO_READ_DOT_ENV_FILE=False.
 env = environ.Env()
-environ.Env.read_env()
+if env.bool('DJANGO_READ_DOT_ENV_FILE', default=True):
+    environ.Env.read_env()
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -47,7 +49,6 @@ INSTALLED_APPS = [
     # Third-party apps
     'crispy_forms',
     'django_bootstrap5',
-    'tailwind',
     
     # Project apps
     'accounts',
@@ -55,6 +56,11 @@ INSTALLED_APPS = [
     'bookings',
 ]
 
+# django-tailwind only provides the `tailwind` build/watch commands, so production
+# workers don't pay for importing it (see sanskruti_travels.startup for timings)
+if env.bool('TAILWIND_ENABLED', default=DEBUG):
+    INSTALLED_APPS.append('tailwind')
+
 # Tailwind app
 TAILWIND_APP_NAME = 'theme'
 
@@ -63,6 +69,9 @@ CRISPY_TEMPLATE_PACK = 'bootstrap5'
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'sanskruti_travels.profiling.ProfilingMiddleware',  # Outermost, so a profile covers the whole stack
+    'sanskruti_travels.staticfiles.StaticFilesMiddleware',
+    'sanskruti_travels.querybudget.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -77,7 +86,6 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -85,6 +93,16 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'django.template.context_processors.media',
+                'travel.context_processors.navigation',
+                'travel.context_processors.currencies',
+            ],
+            # Templates are compiled once per process; under runserver the autoreloader
+            # still clears this cache when a template file changes
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
             ],
         },
     },
@@ -104,6 +122,16 @@ DATABASES = {
 }
 
 
+# Cache
+# Use a shared backend in production (e.g. CACHE_URL=redis://...) so invalidation reaches every worker
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+    # Used by {% cache %} for header, footer and package card fragments
+    'template_fragments': env.cache('TEMPLATE_CACHE_URL', default='locmemcache://template-fragments'),
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -142,10 +170,30 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
 ]
 
+# Hashed filenames plus gzip/brotli variants, served by StaticFilesMiddleware (see sanskruti_travels.staticfiles)
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'sanskruti_travels.staticfiles.CompressedManifestStaticFilesStorage'
+        if not DEBUG else 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+STATIC_UNHASHED_MAX_AGE = 300  # Cache lifetime in seconds for files without a content hash
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Media delivery outside DEBUG (see sanskruti_travels.media)
+# 'python' streams with FileResponse/Range, 'accel' uses nginx X-Accel-Redirect, 'sendfile' uses X-Sendfile
+MEDIA_SERVE_BACKEND = env('MEDIA_SERVE_BACKEND', default='python')
+MEDIA_ACCEL_PREFIX = '/internal-media/'  # nginx "internal" location aliased to MEDIA_ROOT
+MEDIA_MAX_AGE = 86400
+PRIVATE_MEDIA_ROOT = os.path.join(BASE_DIR, 'private_media')  # Never exposed directly by the web server
+PRIVATE_MEDIA_ACCEL_PREFIX = '/internal-private-media/'
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -162,3 +210,119 @@ WHATSAPP_NUMBER = '917977527874'  # Add country code without + for Sanskruti Tra
 
 # Email settings - using console for development
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')  # Used by the filebased backend
+DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL', default='Sanskruti Travels <noreply@sanskrutitravels.com>')
+
+# Newsletter campaigns (see accounts.newsletter)
+NEWSLETTER_BASE_URL = env('NEWSLETTER_BASE_URL', default='http://localhost:8000')  # Used for links in emails
+NEWSLETTER_BATCH_SIZE = env.int('NEWSLETTER_BATCH_SIZE', default=100)  # Messages per SMTP batch
+NEWSLETTER_SEND_RATE = env.float('NEWSLETTER_SEND_RATE', default=10)  # Messages per second, 0 = unthrottled
+
+
+# Package popularity - buffered view counters (see travel.popularity)
+PACKAGE_VIEW_FLUSH_INTERVAL = env.int('PACKAGE_VIEW_FLUSH_INTERVAL', default=30)  # seconds
+PACKAGE_VIEW_FLUSH_THRESHOLD = env.int('PACKAGE_VIEW_FLUSH_THRESHOLD', default=500)  # buffered views
+PACKAGE_POPULARITY_HALF_LIFE_DAYS = env.float('PACKAGE_POPULARITY_HALF_LIFE_DAYS', default=7)
+
+# Admin changelists switch to the planner's row estimate above this many rows (see travel.paginator)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = env.int('ADMIN_ESTIMATED_COUNT_THRESHOLD', default=100000)
+
+# Retention - rows older than this are moved to the archive tables (see bookings.archive)
+RETENTION_BOOKING_DAYS = env.int('RETENTION_BOOKING_DAYS', default=730)
+RETENTION_INQUIRY_DAYS = env.int('RETENTION_INQUIRY_DAYS', default=365)
+RETENTION_BATCH_SIZE = env.int('RETENTION_BATCH_SIZE', default=500)
+
+# Number of price buckets precomputed for the package list price slider (see travel.catalogue)
+PRICE_HISTOGRAM_BUCKETS = env.int('PRICE_HISTOGRAM_BUCKETS', default=10)
+
+# JSON catalogue API (see travel.api)
+API_MAX_PAGE_SIZE = env.int('API_MAX_PAGE_SIZE', default=100)
+
+# Nearby destinations (see travel.geo). The KD-tree holds every geocoded city in memory;
+# turn it off on memory-constrained workers to query the geohash buckets in SQL instead.
+GEO_INDEX_ENABLED = env.bool('GEO_INDEX_ENABLED', default=True)
+GEO_NEAR_RADIUS_KM = 150  # Default radius for ?near= on the package list
+GEO_MAX_RADIUS_KM = 2000
+GEO_NEAR_MAX_CITIES = 500  # Nearest cities passed to the package query for ?near=
+GEO_NEARBY_RADIUS_KM = 300  # Nearby-destinations block on package pages
+GEO_NEARBY_COUNT = 6
+GEO_HOME_COUNTRY = 'India'  # Country of the State rows, used when geocoding national cities
+GEO_HOME_COUNTRY_CODE = 'IN'
+
+# Prices are stored and charged in BASE_CURRENCY; others are display conversions (see travel.currency)
+BASE_CURRENCY = 'INR'
+BASE_CURRENCY_SYMBOL = '₹'
+CURRENCY_QUANTA = {  # Rounding step for currencies without minor units; everything else rounds to 0.01
+    'JPY': '1',
+    'KRW': '1',
+    'IDR': '1',
+    'VND': '1',
+}
+
+# Quote engine (see travel.pricing)
+QUOTE_CALENDAR_DAYS = 540  # Days from today precompiled into each package's rate calendar
+QUOTE_CHILD_PERCENT = 50  # Child price as % of adult when no season or age band says otherwise
+QUOTE_PRICING_CACHE_SIZE = 512  # Compiled packages kept per process
+QUOTE_PREVIEW_CACHE_SECONDS = 300
+QUOTE_MAX_TRAVELLERS = env.int('QUOTE_MAX_TRAVELLERS', default=50)  # Adults plus children per quote or booking
+
+# Rate limits for form and auth POSTs (see sanskruti_travels.ratelimit). Each policy is a
+# list of (key, rate) pairs; a request is rejected with 429 when any of them is exceeded.
+RATE_LIMIT_ENABLED = env.bool('RATE_LIMIT_ENABLED', default=True)
+RATE_LIMIT_CACHE = 'default'  # Must be shared between workers (CACHE_URL) to limit across processes
+RATE_LIMIT_IP_HEADER = env('RATE_LIMIT_IP_HEADER', default='REMOTE_ADDR')  # e.g. HTTP_X_FORWARDED_FOR behind a proxy
+RATE_LIMIT_TRUSTED_PROXIES = env.int('RATE_LIMIT_TRUSTED_PROXIES', default=1)  # Proxies that append to that header
+RATE_LIMITS = {
+    'contact': [('ip', '5/10m'), ('field:email', '3/h')],
+    'newsletter': [('ip', '10/h'), ('field:email', '3/d')],
+    'custom_tour': [('ip', '5/h'), ('field:email', '3/h')],
+    'book_package': [('ip', '10/h'), ('session', '5/10m')],
+    'register': [('ip', '5/h')],
+    'login': [('ip', '20/10m'), ('field:username', '5/15m')],  # Also caps password hashing per account
+}
+
+# Query budgets (see sanskruti_travels.querybudget). Views declare theirs with @query_budget;
+# views we don't own are budgeted here by URL name. Violations raise under DEBUG and log otherwise.
+QUERY_BUDGET_RAISE = env.bool('QUERY_BUDGET_RAISE', default=DEBUG)
+QUERY_BUDGET_REPEAT_THRESHOLD = 5  # Identical statements per request before an N+1 is reported
+QUERY_BUDGETS = {
+    'logout': 5,
+    'password_reset': 6,
+    'password_reset_done': 4,
+    'password_reset_confirm': 6,
+    'password_reset_complete': 4,
+}
+
+# Startup warm-up (see sanskruti_travels.startup). The readiness probe at /health/ready/
+# reports 503 until warm-up finishes; with this off it reports ready straight away.
+STARTUP_WARMUP = env.bool('STARTUP_WARMUP', default=True)
+
+# Duplicate and spam detection for contact and custom tour submissions (see bookings.spam).
+# Similarities are estimated Jaccard over word 3-grams, between 0 and 1.
+SPAM_CHECK_ENABLED = env.bool('SPAM_CHECK_ENABLED', default=True)
+SPAM_DUPLICATE_SIMILARITY = 0.6  # Same sender, this similar: a duplicate of the earlier one
+SPAM_SIMILARITY = 0.8  # This similar from SPAM_MIN_SENDERS different senders: spam
+SPAM_MIN_SENDERS = 3
+SPAM_MIN_SHINGLES = 10  # Word 3-grams a text needs before similarity alone can make it spam
+SPAM_MAX_LINKS = 3  # Submissions with this many links are spam outright
+SPAM_MAX_CANDIDATES = 200  # Earlier submissions compared per new one
+
+# Static export of the public catalogue (see travel.export and the export_static command).
+# Pages are rendered as if requested on STATIC_EXPORT_HOST (default: first ALLOWED_HOSTS entry).
+STATIC_EXPORT_ROOT = env('STATIC_EXPORT_ROOT', default=os.path.join(BASE_DIR, 'static_export'))
+STATIC_EXPORT_HOST = env('STATIC_EXPORT_HOST', default='')
+
+# Booking analytics rollups (see bookings.analytics). Run `rollup_bookings` every few minutes;
+# source scans can go to a read replica by naming its DATABASES alias here.
+ANALYTICS_SOURCE_DATABASE = env('ANALYTICS_SOURCE_DATABASE', default='default')
+ANALYTICS_WATERMARK_OVERLAP = 300  # Seconds re-read before the watermark to catch late commits
+
+# On-demand request profiling (see sanskruti_travels.profiling). Staff get tokens at /profiles/;
+# sampling by URL name, e.g. {'package_list': 0.01}, profiles that share of requests automatically.
+PROFILING_ENABLED = env.bool('PROFILING_ENABLED', default=True)
+PROFILE_ROOT = env('PROFILE_ROOT', default=os.path.join(BASE_DIR, 'profiles'))
+PROFILE_MODE = 'sample'  # 'sample' (folded stacks for flamegraphs) or 'cprofile'
+PROFILE_SAMPLE_INTERVAL_MS = 5
+PROFILE_SAMPLE_RATES = {}
+PROFILE_TOKEN_MAX_AGE = 3600
+PROFILE_KEEP = 500  # Newest profiles kept on disk
@@ -0,0 +1,276 @@
+"""
+Process startup: timed Django setup, warm-up and readiness.
+
+``wsgi.py``/``asgi.py`` call ``setup()`` instead of letting the handler run
+``django.setup()`` implicitly, so import time is recorded per top-level
+package (exclusive of nested packages) along with each app's ``ready()``.
+``warmup()`` then runs the warmers before the module finishes importing,
+i.e. before the server hands the worker any traffic:
+
+    database    open and check every configured connection
+    urls        populate the URL resolver
+    templates   compile project templates into the cached loader
+    <apps>      anything registered with ``register_warmer`` (catalogue caches)
+
+``readiness`` answers 503 until warm-up has finished. Run
+``python -m sanskruti_travels.startup`` to print the timings for a cold
+process without serving anything.
+
+Django itself is imported lazily in this module so the import timer sees it.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+# name -> func(), run in registration order after the built-in warmers
+_warmers = []
+_ready = threading.Event()
+
+report = {
+    'phases': {},    # phase -> seconds
+    'imports': {},   # top-level package -> seconds spent executing its modules
+    'ready': {},     # app label -> seconds spent in AppConfig.ready()
+    'warmers': {},   # warmer -> seconds
+    'errors': {},    # warmer -> error message
+}
+
+
+def register_warmer(name, func):
+    """Run ``func()`` during warm-up, after the database, URL and template warmers"""
+    _warmers.append((name, func))
+
+
+class ImportTimer:
+    """Meta path hook timing module execution, grouped by top-level package"""
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self._stack = []
+
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        loader = spec.loader
+        # Builtin and frozen importers are classes shared by every module; leave them alone.
+        # A zipimporter is shared by its archive's modules, so wrap each loader only once.
+        if (loader is not None and not isinstance(loader, type) and hasattr(loader, '__dict__')
+                and 'exec_module' not in vars(loader)):
+            loader.exec_module = self._timed(loader.exec_module)
+        return spec
+
+    def _timed(self, exec_module):
+        def timed_exec_module(module):
+            package = module.__name__.partition('.')[0]
+            started = time.perf_counter()
+            self._stack.append(0.0)
+            try:
+                exec_module(module)
+            finally:
+                elapsed = time.perf_counter() - started
+                nested = self._stack.pop()
+                self.totals[package] += elapsed - nested
+                if self._stack:
+                    self._stack[-1] += elapsed
+        return timed_exec_module
+
+    def __enter__(self):
+        sys.meta_path.insert(0, self)
+        return self
+
+    def __exit__(self, *exc_info):
+        sys.meta_path.remove(self)
+
+
+def _time_ready_calls():
+    """Wrap each AppConfig.ready() created during populate() with a timer; returns an undo callable"""
+    from django.apps import AppConfig
+
+    original = AppConfig.__dict__['create']
+
+    def create(cls, entry):
+        app_config = original.__func__(cls, entry)
+        ready = app_config.ready
+
+        def timed_ready():
+            started = time.perf_counter()
+            try:
+                ready()
+            finally:
+                report['ready'][app_config.label] = time.perf_counter() - started
+        app_config.ready = timed_ready
+        return app_config
+
+    AppConfig.create = classmethod(create)
+    return lambda: setattr(AppConfig, 'create', original)
+
+
+def setup():
+    """``django.setup()`` with per-package import and per-app ready() timings"""
+    started = time.perf_counter()
+    with ImportTimer() as timer:
+        import django
+        from django.conf import settings
+
+        settings_started = time.perf_counter()
+        settings.INSTALLED_APPS  # Reads .env and evaluates the settings module
+        report['phases']['settings'] = time.perf_counter() - settings_started
+
+        undo = _time_ready_calls()
+        try:
+            django.setup(set_prefix=False)
+        finally:
+            undo()
+    report['imports'] = dict(sorted(timer.totals.items(), key=lambda item: -item[1]))
+    report['phases']['setup'] = time.perf_counter() - started
+
+    slowest = ', '.join(f'{name} {seconds * 1000:.0f}ms' for name, seconds in list(report['imports'].items())[:8])
+    logger.info('Django setup took %.0fms; slowest imports: %s', report['phases']['setup'] * 1000, slowest)
+
+
+def _warm_database():
+    from django.db import connections
+
+    for connection in connections.all():
+        connection.ensure_connection()
+    if threading.current_thread() is not threading.main_thread():
+        # Connections are per thread; one opened here would never serve a request
+        connections.close_all()
+    else:
+        # With a preloading server (gunicorn --preload) this process forks after warm-up
+        os.register_at_fork(after_in_child=_forget_inherited_connections)
+
+
+def _forget_inherited_connections():
+    from django.db import connections
+
+    for connection in connections.all(initialized_only=True):
+        # The socket still belongs to the parent; drop it without sending a close
+        connection.connection = None
+
+
+def _warm_urls():
+    from django.urls import get_resolver
+
+    get_resolver().reverse_dict  # Populates every pattern, including included URLconfs
+
+
+def _warm_templates():
+    from django.conf import settings
+    from django.template import TemplateSyntaxError, engines
+    from django.template.backends.django import DjangoTemplates
+
+    project_root = str(settings.BASE_DIR)
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for directory in engine.template_dirs:
+            directory = str(directory)
+            # Third-party templates (admin etc.) compile on first use as before
+            if not directory.startswith(project_root) or os.sep + 'site-packages' + os.sep in directory:
+                continue
+            for root, dirs, files in os.walk(directory):
+                for filename in files:
+                    if not filename.endswith(('.html', '.txt')):
+                        continue
+                    name = os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/')
+                    try:
+                        engine.get_template(name)
+                    except TemplateSyntaxError as exc:
+                        logger.warning('Template %s failed to compile during warm-up: %s', name, exc)
+
+
+def _run_warmers():
+    from django.conf import settings
+
+    started = time.perf_counter()
+    if getattr(settings, 'STARTUP_WARMUP', True):
+        warmers = [('database', _warm_database), ('urls', _warm_urls), ('templates', _warm_templates)]
+        for name, func in warmers + _warmers:
+            warmer_started = time.perf_counter()
+            try:
+                func()
+            except Exception as exc:
+                # A failed warmer only costs the first request its speed-up
+                logger.exception('Warm-up step %s failed', name)
+                report['errors'][name] = str(exc)
+            report['warmers'][name] = time.perf_counter() - warmer_started
+    report['phases']['warmup'] = time.perf_counter() - started
+    logger.info('Warm-up took %.0fms', report['phases']['warmup'] * 1000)
+    _ready.set()
+
+
+def warmup(background=False):
+    """Run all warmers, then mark the process ready
+
+    ASGI servers import the application inside a running event loop, where
+    blocking database calls are refused, so ``asgi.py`` passes
+    ``background=True`` and relies on the readiness check instead.
+    """
+    if background:
+        threading.Thread(target=_run_warmers, name='warmup', daemon=True).start()
+    else:
+        _run_warmers()
+
+
+def is_ready():
+    return _ready.is_set()
+
+
+def readiness(request):
+    """Readiness probe: 200 once warm-up has finished, 503 before"""
+    from django.conf import settings
+    from django.http import JsonResponse
+
+    payload = {
+        'status': 'ready' if is_ready() else 'starting',
+        'phases': {name: round(seconds, 4) for name, seconds in report['phases'].items()},
+        # Names only: exception text can carry hosts or credentials, and the details are in the log
+        'failed': sorted(report['errors']),
+    }
+    if settings.DEBUG:
+        payload['errors'] = report['errors']
+        payload['imports'] = {name: round(seconds, 4) for name, seconds in report['imports'].items()}
+        payload['ready'] = {name: round(seconds, 4) for name, seconds in report['ready'].items()}
+        payload['warmers'] = {name: round(seconds, 4) for name, seconds in report['warmers'].items()}
+    response = JsonResponse(payload, status=200 if is_ready() else 503)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+# Same as @query_budget(0); querybudget reads settings at import, which is too early here
+readiness.query_budget = 0
+
+
+def main():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sanskruti_travels.settings')
+    setup()
+    warmup()
+
+    def table(title, timings, limit=None):
+        print(title)
+        for name, seconds in list(timings.items())[:limit]:
+            print(f'  {name:<32} {seconds * 1000:9.1f} ms')
+
+    table('Phases', report['phases'])
+    table('Imports (exclusive, slowest first)', report['imports'], limit=25)
+    table('AppConfig.ready()', report['ready'])
+    table('Warmers', report['warmers'])
+    for name, error in report['errors'].items():
+        print(f'warmer {name} failed: {error}')
+
+
+if __name__ == '__main__':
+    # Run through the importable module so warmers registered by apps land in the same registry
+    from sanskruti_travels.startup import main as run
+    run()
@@ -0,0 +1,183 @@
+"""
+Static file pipeline: hashed, precompressed files served straight from Django.
+
+``CompressedManifestStaticFilesStorage`` writes ``.gz`` (and ``.br`` when the
+brotli package is installed) next to each hashed file at collectstatic time.
+``StaticFilesMiddleware`` serves STATIC_ROOT with Accept-Encoding negotiation,
+far-future immutable caching for hashed names and ``FileResponse`` so the WSGI
+server can use sendfile. No separate web server is needed on small deployments.
+"""
+import gzip
+import mimetypes
+import os
+import posixpath
+from urllib.parse import unquote, urlparse
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli variants are optional
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.mjs', '.map', '.svg', '.json', '.txt', '.xml', '.html', '.ico', '.eot', '.ttf', '.otf')
+MIN_COMPRESS_SIZE = 256
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage that also writes gzip and brotli variants of hashed files"""
+    # Missing files fall back to their unhashed name instead of erroring at render time
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.add(hashed_name)
+            yield name, hashed_name, processed
+
+        if dry_run:
+            return
+        for hashed_name in sorted(hashed_names):
+            if hashed_name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self._compress(hashed_name)
+
+    def _compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            data = source.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+
+        variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(data, quality=11)))
+        for suffix, compressed in variants:
+            # Only keep variants that actually save bytes
+            if len(compressed) < len(data):
+                with open(path + suffix, 'wb') as target:
+                    target.write(compressed)
+
+
+def _accepted_encodings(header):
+    """Codings from an Accept-Encoding header, ignoring any with q=0"""
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _not_modified(request, etag, mtime):
+    """RFC 7232 §6: If-Modified-Since only counts when there is no If-None-Match"""
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        # Weak comparison: W/"x" matches "x"
+        tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+        return etag in tags or '*' in tags
+    modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return modified_since is not None and int(mtime) <= modified_since
+
+
+class _StaticFile:
+    __slots__ = ('path', 'size', 'mtime', 'content_type', 'encodings', 'immutable')
+
+    def __init__(self, path, content_type, immutable):
+        stat = os.stat(path)
+        self.path = path
+        self.size = stat.st_size
+        self.mtime = int(stat.st_mtime)
+        self.content_type = content_type
+        self.immutable = immutable
+        self.encodings = {}
+        for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if os.path.exists(path + suffix):
+                self.encodings[encoding] = (path + suffix, os.path.getsize(path + suffix))
+
+    def etag(self, encoding=None):
+        # Each encoded representation gets its own validator
+        suffix = f'-{encoding}' if encoding else ''
+        return f'"{self.mtime:x}-{self.size:x}{suffix}"'
+
+
+class StaticFilesMiddleware:
+    """Serve collected static files before the rest of the middleware stack runs"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = urlparse(settings.STATIC_URL).path
+        self.root = settings.STATIC_ROOT
+        self._files = None
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD') and request.path_info.startswith(self.prefix):
+            static_file = self.lookup(request.path_info[len(self.prefix):])
+            if static_file is not None:
+                return self.serve(request, static_file)
+        return self.get_response(request)
+
+    def lookup(self, name):
+        if self._files is None:
+            self._files = self._scan()
+        return self._files.get(posixpath.normpath(unquote(name)).lstrip('/'))
+
+    def _scan(self):
+        """Index STATIC_ROOT once so requests never touch the filesystem to find files"""
+        files = {}
+        if not self.root or not os.path.isdir(self.root):
+            return files
+        hashed = self._hashed_names()
+        for directory, _dirs, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith(('.gz', '.br')):
+                    continue
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, self.root).replace(os.sep, '/')
+                content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+                files[name] = _StaticFile(path, content_type, immutable=name in hashed)
+        return files
+
+    def _hashed_names(self):
+        try:
+            storage = CompressedManifestStaticFilesStorage()
+            return set(storage.hashed_files.values())
+        except Exception:
+            return set()
+
+    def serve(self, request, static_file):
+        path, size, encoding = static_file.path, static_file.size, None
+        accepted = _accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        for candidate in ('br', 'gzip'):
+            if candidate in static_file.encodings and candidate in accepted:
+                (path, size), encoding = static_file.encodings[candidate], candidate
+                break
+
+        if _not_modified(request, static_file.etag(encoding), static_file.mtime):
+            return self._headers(HttpResponseNotModified(), static_file, encoding)
+
+        response = FileResponse(open(path, 'rb'), content_type=static_file.content_type)
+        if response.has_header('Content-Disposition'):
+            # FileResponse derives this from the on-disk (possibly .gz/.br) name
+            del response['Content-Disposition']
+        response['Content-Length'] = size
+        if encoding:
+            response['Content-Encoding'] = encoding
+        return self._headers(response, static_file, encoding)
+
+    def _headers(self, response, static_file, encoding):
+        response['ETag'] = static_file.etag(encoding)
+        response['Last-Modified'] = http_date(static_file.mtime)
+        if static_file.encodings:
+            response['Vary'] = 'Accept-Encoding'
+        if static_file.immutable:
+            response['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        else:
+            response['Cache-Control'] = f'public, max-age={getattr(settings, "STATIC_UNHASHED_MAX_AGE", 300)}'
+        return response
@@ -5,18 +5,36 @@ The `urlpatterns` list routes URLs to views. For more information please see:
     https://docs.djangoproject.com/en/5.2/topics/http/urls/
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from . import media, profiling, startup
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('travel.urls')),
     path('bookings/', include('bookings.urls')),
     path('accounts/', include('accounts.urls')),
+    
+    # Access-checked uploads (booking documents etc.)
+    path('private-media/<path:path>', media.serve_private_media, name='private_media'),
+
+    # Load balancer / orchestrator readiness probe
+    path('health/ready/', startup.readiness, name='readiness'),
+    
+    # Staff browser for request profiles
+    path('profiles/', profiling.profile_list, name='profile_list'),
+    path('profiles/<str:name>/', profiling.profile_detail, name='profile_detail'),
+    path('profiles/<str:name>/<str:kind>/', profiling.profile_download, name='profile_download'),
 ]
 
 # Serve media files in development
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+else:
+    # Static files are handled by StaticFilesMiddleware; media goes through sanskruti_travels.media
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'), media.serve_media, name='media'),
+    ]
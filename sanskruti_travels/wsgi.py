@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
-from django.core.wsgi import get_wsgi_application
+from sanskruti_travels import startup
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sanskruti_travels.settings')
 
+startup.setup()
+
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+
 application = get_wsgi_application()
+
+# Runs before the server gets this module back, so workers accept traffic warm
+startup.warmup()
@@ -1,3 +1,117 @@
 from django.contrib import admin
+from django.utils import timezone
 
-# Register your models here.
+from . import catalogue
+from .models import (
+    State, Country, City, PackageCategory, Package, PackageImage, Itinerary, Testimonial, ExchangeRate,
+    SeasonalRate, ChildAgeBand, GroupDiscount,
+)
+from .paginator import EstimatedCountPaginator
+
+
+@admin.register(State)
+class StateAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug')
+    search_fields = ('name',)
+    prepopulated_fields = {'slug': ('name',)}
+
+
+@admin.register(Country)
+class CountryAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug')
+    search_fields = ('name',)
+    prepopulated_fields = {'slug': ('name',)}
+
+
+@admin.register(City)
+class CityAdmin(admin.ModelAdmin):
+    list_display = ('name', 'state', 'country', 'latitude', 'longitude')
+    list_select_related = ('state', 'country')
+    list_filter = ('country',)
+    search_fields = ('name',)
+    autocomplete_fields = ('state', 'country')
+    prepopulated_fields = {'slug': ('name',)}
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(PackageCategory)
+class PackageCategoryAdmin(admin.ModelAdmin):
+    list_display = ('name',)
+    search_fields = ('name',)
+
+
+class PackageImageInline(admin.TabularInline):
+    model = PackageImage
+    extra = 0
+
+
+class ItineraryInline(admin.StackedInline):
+    model = Itinerary
+    extra = 0
+
+
+class SeasonalRateInline(admin.TabularInline):
+    model = SeasonalRate
+    extra = 0
+
+
+@admin.register(Package)
+class PackageAdmin(admin.ModelAdmin):
+    list_display = ('title', 'type', 'price', 'duration', 'state', 'country', 'featured', 'best_seller', 'rating')
+    list_select_related = ('state', 'country')
+    list_filter = ('type', 'featured', 'best_seller', 'category')
+    list_editable = ('featured', 'best_seller')
+    search_fields = ('title',)
+    prepopulated_fields = {'slug': ('title',)}
+    autocomplete_fields = ('state', 'country', 'category', 'destinations')
+    readonly_fields = ('view_count', 'popularity', 'created_at', 'updated_at')
+    inlines = [ItineraryInline, PackageImageInline, SeasonalRateInline]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ['mark_featured', 'unmark_featured']
+
+    @admin.action(description='Mark selected packages as featured')
+    def mark_featured(self, request, queryset):
+        # update() sends no signals; touch updated_at for the card fragments and bump the catalogue version
+        updated = queryset.update(featured=True, updated_at=timezone.now())
+        catalogue.invalidate()
+        self.message_user(request, f'{updated} packages marked as featured.')
+
+    @admin.action(description='Remove selected packages from featured')
+    def unmark_featured(self, request, queryset):
+        # update() sends no signals; touch updated_at for the card fragments and bump the catalogue version
+        updated = queryset.update(featured=False, updated_at=timezone.now())
+        catalogue.invalidate()
+        self.message_user(request, f'{updated} packages removed from featured.')
+
+
+@admin.register(Testimonial)
+class TestimonialAdmin(admin.ModelAdmin):
+    list_display = ('name', 'location', 'package', 'rating', 'created_at')
+    list_select_related = ('package',)
+    list_filter = ('rating',)
+    search_fields = ('name', 'location')
+    autocomplete_fields = ('package',)
+
+
+@admin.register(ExchangeRate)
+class ExchangeRateAdmin(admin.ModelAdmin):
+    list_display = ('currency', 'symbol', 'rate', 'quantum', 'active', 'updated_at')
+    list_editable = ('rate', 'active')
+    list_filter = ('active',)
+    search_fields = ('currency',)
+
+
+@admin.register(ChildAgeBand)
+class ChildAgeBandAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'package')
+    list_select_related = ('package',)
+    autocomplete_fields = ('package',)
+
+
+@admin.register(GroupDiscount)
+class GroupDiscountAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'package')
+    list_select_related = ('package',)
+    autocomplete_fields = ('package',)
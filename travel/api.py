@@ -0,0 +1,293 @@
+"""
+Read-only JSON catalogue API (v1).
+
+Rows are read with ``.values()`` so no model instances are built, related
+rows are fetched with one query per relation for the whole page, and pages
+use an id cursor instead of OFFSET. Responses carry an ETag derived from the
+catalogue version, so unchanged pages are answered with 304.
+
+Query parameters:
+    fields   comma-separated subset of the resource's fields
+    include  comma-separated relations to embed (packages only)
+    cursor   opaque cursor from the previous page's ``next``
+    limit    page size (max API_MAX_PAGE_SIZE)
+"""
+import base64
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.views.decorators.http import condition, require_GET
+
+from sanskruti_travels.querybudget import query_budget
+
+from . import catalogue
+from .models import City, Country, Itinerary, Package, PackageImage, State
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None
+
+# Public field name -> values() lookup
+PACKAGE_FIELDS = {
+    'id': 'id',
+    'slug': 'slug',
+    'title': 'title',
+    'type': 'type',
+    'price': 'price',
+    'duration': 'duration',
+    'days': 'days',
+    'nights': 'nights',
+    'rating': 'rating',
+    'review_count': 'review_count',
+    'featured': 'featured',
+    'best_seller': 'best_seller',
+    'main_image': 'main_image',
+    'state': 'state__name',
+    'country': 'country__name',
+    'category': 'category__name',
+    'description': 'description',
+    'includes': 'includes',
+    'excludes': 'excludes',
+    'updated_at': 'updated_at',
+}
+PACKAGE_LIST_DEFAULT = ('id', 'slug', 'title', 'type', 'price', 'duration', 'days', 'rating',
+                        'review_count', 'main_image', 'state', 'country')
+PACKAGE_RELATIONS = ('destinations', 'itinerary', 'images')
+
+STATE_FIELDS = {'id': 'id', 'name': 'name', 'description': 'description', 'image': 'image'}
+COUNTRY_FIELDS = STATE_FIELDS
+CITY_FIELDS = {'id': 'id', 'name': 'name', 'state': 'state__name', 'country': 'country__name',
+               'description': 'description', 'image': 'image', 'latitude': 'latitude', 'longitude': 'longitude'}
+
+IMAGE_FIELDS = ('main_image', 'image')
+MAX_ID = 2 ** 63 - 1  # Larger ids overflow the database's integer columns
+
+
+_encoder = DjangoJSONEncoder()
+
+
+def _default(value):
+    # orjson handles most types natively; Decimal and passed-through datetimes land here
+    return _encoder.default(value)
+
+
+def _dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_PASSTHROUGH_DATETIME, default=_default)
+    return json.dumps(payload, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+
+
+def _json_response(payload, status=200):
+    return HttpResponse(_dumps(payload), status=status, content_type='application/json')
+
+
+def _error(message, status=400):
+    return _json_response({'error': message}, status=status)
+
+
+def _catalogue_etag(request, *args, **kwargs):
+    digest = hashlib.sha1(f'{catalogue.version()}:{request.get_full_path()}'.encode()).hexdigest()
+    return f'v1-{digest[:20]}'
+
+
+def _select_fields(request, available, default=None):
+    """Resolve ?fields= against the available fields; returns None for unknown names"""
+    requested = request.GET.get('fields')
+    if not requested:
+        return list(default or available)
+    names = [name.strip() for name in requested.split(',') if name.strip()]
+    if any(name not in available for name in names):
+        return None
+    return names
+
+
+def _encode_cursor(last_id):
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value = base64.urlsafe_b64decode(padded.encode()).decode()
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return int(value) if value.isdecimal() and int(value) <= MAX_ID else None
+
+
+def _page_size(request):
+    maximum = getattr(settings, 'API_MAX_PAGE_SIZE', 100)
+    try:
+        return max(1, min(int(request.GET.get('limit', 20)), maximum))
+    except ValueError:
+        return 20
+
+
+def _rows(queryset, field_map, names):
+    """Fetch rows as dicts keyed by public field names; always includes id"""
+    lookups = [field_map[name] for name in names]
+    if 'id' not in lookups:
+        lookups.append('id')
+    rename = {field_map[name]: name for name in names}
+    rows = []
+    for values in queryset.values(*lookups):
+        row = {rename.get(key, key): value for key, value in values.items()}
+        for image_field in IMAGE_FIELDS:
+            if image_field in row:
+                row[image_field] = default_storage.url(row[image_field]) if row[image_field] else None
+        rows.append(row)
+    return rows
+
+
+def _paginate(request, queryset, field_map, names):
+    """Cursor pagination by descending id; returns (rows, next_url) or None for a bad cursor"""
+    queryset = queryset.order_by('-id')
+    cursor = request.GET.get('cursor')
+    if cursor:
+        last_id = _decode_cursor(cursor)
+        if last_id is None:
+            return None
+        queryset = queryset.filter(id__lt=last_id)
+
+    limit = _page_size(request)
+    rows = _rows(queryset[:limit + 1], field_map, names)
+    next_url = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        params = request.GET.copy()
+        params['cursor'] = _encode_cursor(rows[-1]['id'])
+        next_url = f'{request.path}?{params.urlencode()}'
+    return rows, next_url
+
+
+def _embed_relations(rows, relations):
+    """Attach related rows for a page of packages with one query per relation"""
+    if not rows or not relations:
+        return
+    by_id = {row['id']: row for row in rows}
+    for row in rows:
+        for relation in relations:
+            row[relation] = []
+
+    if 'destinations' in relations:
+        through = Package.destinations.through.objects.filter(package_id__in=by_id)
+        for values in through.values('package_id', 'city_id', 'city__name', 'city__state__name', 'city__country__name'):
+            by_id[values['package_id']]['destinations'].append({
+                'id': values['city_id'],
+                'name': values['city__name'],
+                'state': values['city__state__name'],
+                'country': values['city__country__name'],
+            })
+    if 'itinerary' in relations:
+        days = Itinerary.objects.filter(package_id__in=by_id).order_by('package_id', 'day')
+        for values in days.values('package_id', 'day', 'title', 'description'):
+            package_id = values.pop('package_id')
+            by_id[package_id]['itinerary'].append(values)
+    if 'images' in relations:
+        images = PackageImage.objects.filter(package_id__in=by_id).order_by('package_id', 'order')
+        for values in images.values('package_id', 'image', 'caption'):
+            package_id = values.pop('package_id')
+            values['image'] = default_storage.url(values['image']) if values['image'] else None
+            by_id[package_id]['images'].append(values)
+
+
+def _id_filters(request, params):
+    """Build ``<param>_id`` filters from integer query parameters; None if any is malformed"""
+    filters = {}
+    for param in params:
+        value = request.GET.get(param)
+        if value:
+            # isdecimal(), unlike isdigit(), rejects characters such as '²' that int() can't parse
+            if not value.isdecimal() or int(value) > MAX_ID:
+                return None
+            filters[f'{param}_id'] = int(value)
+    return filters
+
+
+def _includes(request, default=()):
+    requested = request.GET.get('include')
+    if requested is None:
+        return list(default)
+    names = [name.strip() for name in requested.split(',') if name.strip()]
+    if any(name not in PACKAGE_RELATIONS for name in names):
+        return None
+    return names
+
+
+@query_budget(4)  # The page plus one query per embedded relation
+@require_GET
+@condition(etag_func=_catalogue_etag)
+def package_list(request):
+    """Paginated packages, filterable by type, state, country and featured"""
+    names = _select_fields(request, PACKAGE_FIELDS, PACKAGE_LIST_DEFAULT)
+    relations = _includes(request)
+    if names is None:
+        return _error(f'Unknown field. Available fields: {", ".join(PACKAGE_FIELDS)}')
+    if relations is None:
+        return _error(f'Unknown relation. Available relations: {", ".join(PACKAGE_RELATIONS)}')
+
+    filters = _id_filters(request, ('state', 'country'))
+    if filters is None:
+        return _error('state and country must be numeric ids.')
+    packages = Package.objects.filter(**filters)
+    if request.GET.get('type'):
+        packages = packages.filter(type=request.GET['type'])
+    if request.GET.get('featured') == 'true':
+        packages = packages.filter(featured=True)
+
+    page = _paginate(request, packages, PACKAGE_FIELDS, names)
+    if page is None:
+        return _error('Invalid cursor.')
+    rows, next_url = page
+    _embed_relations(rows, relations)
+    return _json_response({'data': rows, 'next': next_url})
+
+
+@query_budget(4)
+@require_GET
+@condition(etag_func=_catalogue_etag)
+def package_detail(request, slug):
+    """A single package with all relations embedded by default"""
+    names = _select_fields(request, PACKAGE_FIELDS)
+    relations = _includes(request, default=PACKAGE_RELATIONS)
+    if names is None:
+        return _error(f'Unknown field. Available fields: {", ".join(PACKAGE_FIELDS)}')
+    if relations is None:
+        return _error(f'Unknown relation. Available relations: {", ".join(PACKAGE_RELATIONS)}')
+
+    rows = _rows(Package.objects.filter(slug=slug), PACKAGE_FIELDS, names)
+    if not rows:
+        return _error('Package not found.', status=404)
+    _embed_relations(rows, relations)
+    return _json_response({'data': rows[0]})
+
+
+def _simple_list(model, field_map, filters=()):
+    @query_budget(1)
+    @require_GET
+    @condition(etag_func=_catalogue_etag)
+    def view(request):
+        names = _select_fields(request, field_map)
+        if names is None:
+            return _error(f'Unknown field. Available fields: {", ".join(field_map)}')
+        lookups = _id_filters(request, filters)
+        if lookups is None:
+            return _error(f'{" and ".join(filters)} must be numeric ids.')
+        queryset = model.objects.filter(**lookups)
+        page = _paginate(request, queryset, field_map, names)
+        if page is None:
+            return _error('Invalid cursor.')
+        rows, next_url = page
+        return _json_response({'data': rows, 'next': next_url})
+
+    view.__doc__ = f'Paginated {model._meta.verbose_name_plural}'
+    return view
+
+
+state_list = _simple_list(State, STATE_FIELDS)
+country_list = _simple_list(Country, COUNTRY_FIELDS)
+city_list = _simple_list(City, CITY_FIELDS, filters=('state', 'country'))
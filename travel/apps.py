@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class TravelConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'travel'
+
+    def ready(self):
+        from sanskruti_travels import startup
+        from . import catalogue, signals  # noqa: F401
+
+        startup.register_warmer('catalogue', catalogue.warm)
@@ -0,0 +1,108 @@
+"""
+Catalogue-wide derived data that is expensive to compute per request.
+
+Values are cached without expiry and dropped by the signal handlers in
+travel.signals whenever the catalogue changes, so the next read rebuilds
+them. ``version()`` gives a cheap token that changes with every edit.
+"""
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, IntegerField, Max, Min
+from django.db.models.functions import Cast, Floor
+
+PRICE_HISTOGRAM_KEY = 'travel:price_histogram'
+VERSION_KEY = 'travel:catalogue_version'
+
+
+def _build_price_histogram(bucket_count):
+    from .models import Package
+
+    bounds = Package.objects.aggregate(
+        low=Min('price'), high=Max('price'), min_days=Min('days'), max_days=Max('days'),
+    )
+    low, high = bounds['low'], bounds['high']
+    histogram = {
+        'min_price': low,
+        'max_price': high,
+        'min_days': bounds['min_days'],
+        'max_days': bounds['max_days'],
+        'buckets': [],
+    }
+    if low is None:
+        return histogram
+
+    width = max((high - low) / bucket_count, Decimal('1'))
+    counts = dict(
+        Package.objects
+        .annotate(bucket=Cast(Floor((F('price') - low) / width), IntegerField()))
+        .values_list('bucket')
+        .annotate(count=Count('id'))
+        .order_by()
+        .values_list('bucket', 'count')
+    )
+    for index in range(bucket_count):
+        start = low + width * index
+        # The maximum price lands exactly on the upper edge; fold it into the last bucket
+        count = counts.get(index, 0) + (counts.get(bucket_count, 0) if index == bucket_count - 1 else 0)
+        histogram['buckets'].append({
+            'min': start.quantize(Decimal('1')),
+            'max': (start + width).quantize(Decimal('1')),
+            'count': count,
+        })
+    return histogram
+
+
+def price_histogram():
+    """Price buckets and day/price bounds for range-slider UIs"""
+    histogram = cache.get(PRICE_HISTOGRAM_KEY)
+    if histogram is None:
+        histogram = _build_price_histogram(getattr(settings, 'PRICE_HISTOGRAM_BUCKETS', 10))
+        cache.set(PRICE_HISTOGRAM_KEY, histogram, None)
+    return histogram
+
+
+def read_version(key):
+    """Current value of a cache-held version counter, seeding it if missing"""
+    current = cache.get(key)
+    if current is None:
+        # Seed with the clock so a cache flush never reuses an old version. Seeds are 1000 apart
+        # per millisecond: an old seed plus its bumps can't reach a new one unless it was bumped
+        # more than 1000 times for every millisecond since it was seeded
+        current = int(time.time() * 1000) * 1000
+        cache.add(key, current, None)
+        current = cache.get(key, current)
+    return current
+
+
+def bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        read_version(key)
+
+
+def version():
+    """Counter bumped on every catalogue change, for ETags and cache keys"""
+    return read_version(VERSION_KEY)
+
+
+def invalidate():
+    """Drop cached catalogue data; called whenever the catalogue changes"""
+    cache.delete(PRICE_HISTOGRAM_KEY)
+    bump_version(VERSION_KEY)
+
+
+def warm():
+    """Prime the catalogue caches, slug maps, FX table and spatial index; registered as a startup warmer"""
+    from . import currency, geo, slugs
+
+    version()
+    price_histogram()
+    currency.rates.load()
+    for resolver in (slugs.states, slugs.countries, slugs.cities):
+        resolver.load()
+    if getattr(settings, 'GEO_INDEX_ENABLED', True):
+        geo.cities.load()
@@ -0,0 +1,22 @@
+from functools import partial
+
+from . import catalogue, currency
+
+
+def navigation(request):
+    """Active top-level nav section, so the cached header only varies on this value"""
+    path = request.path
+    if path == '/':
+        section = 'home'
+    else:
+        section = next((name for name in ('custom-tour', 'about', 'contact') if name in path), '')
+    return {'nav_section': section}
+
+
+def currencies(request):
+    """Display currency and the currencies on offer; evaluated only by templates that use them"""
+    return {
+        'currency': partial(currency.preferred, request),
+        'currencies': currency.rates.currencies,
+        'fx_version': partial(catalogue.read_version, currency.FX_VERSION_KEY),  # For fragment cache keys
+    }
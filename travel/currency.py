@@ -0,0 +1,126 @@
+"""
+Display prices in the visitor's currency.
+
+Prices are stored and charged in ``BASE_CURRENCY`` (INR). ExchangeRate rows,
+edited in the admin or loaded with ``load_fx_rates``, are held in memory as
+one immutable table that is swapped out whenever the FX version in the cache
+moves. Every worker therefore picks up a rate change on its next lookup,
+without polling the database.
+
+``convert_many`` converts a whole page of amounts with a single table
+lookup. Each currency rounds to its own quantum (0.01 USD, 1 JPY, ...) with
+ROUND_HALF_UP on exact Decimals. The visitor's choice lives in the session
+under ``SESSION_KEY``.
+"""
+import threading
+from dataclasses import dataclass
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+
+from . import catalogue
+
+FX_VERSION_KEY = 'travel:fx_version'
+SESSION_KEY = 'currency'
+
+
+@dataclass(frozen=True)
+class Money:
+    amount: Decimal
+    currency: str
+    symbol: str = ''
+
+    def __str__(self):
+        places = max(-self.amount.as_tuple().exponent, 0)
+        formatted = f'{self.amount:,.{places}f}'
+        return f'{self.symbol}{formatted}' if self.symbol else f'{formatted} {self.currency}'
+
+
+@dataclass(frozen=True)
+class Rate:
+    currency: str
+    symbol: str
+    rate: Decimal
+    quantum: Decimal
+
+    def convert(self, amount):
+        # Round to a multiple of the quantum (0.05 CHF), not just to its number of places
+        steps = (amount * self.rate / self.quantum).quantize(Decimal('1'), rounding=ROUND_HALF_UP)
+        return Money(steps * self.quantum, self.currency, self.symbol)
+
+
+def base_rate():
+    return Rate(
+        settings.BASE_CURRENCY, getattr(settings, 'BASE_CURRENCY_SYMBOL', ''), Decimal('1'), Decimal('0.01'),
+    )
+
+
+def invalidate():
+    """Make every worker reload the rate table on its next lookup"""
+    catalogue.bump_version(FX_VERSION_KEY)
+
+
+class RateTable:
+    """In-memory currency -> Rate map, reloaded when the FX version changes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._rates = {}
+
+    def _ensure_loaded(self):
+        current = catalogue.read_version(FX_VERSION_KEY)
+        if self._version == current:
+            return self._rates
+        with self._lock:
+            if self._version != current:
+                from .models import ExchangeRate
+
+                base = base_rate()
+                rates = {base.currency: base}
+                for code, symbol, rate, quantum in (
+                    ExchangeRate.objects.filter(active=True).values_list('currency', 'symbol', 'rate', 'quantum')
+                ):
+                    # normalize() so a stored 1.0000 rounds to whole units and prints without decimals
+                    rates[code] = Rate(code, symbol, rate, quantum.normalize())
+                self._rates = rates
+                self._version = current
+        return self._rates
+
+    def load(self):
+        """Read the table now rather than on the first lookup"""
+        self._ensure_loaded()
+
+    def currencies(self):
+        return sorted(self._ensure_loaded())
+
+    def get(self, code):
+        """Rate for ``code``, falling back to the base currency for unknown codes"""
+        rates = self._ensure_loaded()
+        return rates.get((code or '').upper()) or rates[settings.BASE_CURRENCY]
+
+
+rates = RateTable()
+
+
+def convert(amount, code):
+    return rates.get(code).convert(amount)
+
+
+def convert_many(amounts, code):
+    """Convert an iterable of base-currency Decimals, looking the rate up once"""
+    rate = rates.get(code)
+    return [rate.convert(amount) for amount in amounts]
+
+
+def apply(objects, code, source='price', target='display_price'):
+    """Set ``target`` to the converted ``source`` on each object; returns the objects as a list"""
+    objects = list(objects)
+    for obj, money in zip(objects, convert_many((getattr(obj, source) for obj in objects), code)):
+        setattr(obj, target, money)
+    return objects
+
+
+def preferred(request):
+    """The visitor's display currency code"""
+    return rates.get(request.session.get(SESSION_KEY)).currency
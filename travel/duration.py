@@ -0,0 +1,32 @@
+import re
+
+_DAYS_RE = re.compile(r'(\d+)\s*(?:days?|d)\b', re.IGNORECASE)
+_NIGHTS_RE = re.compile(r'(\d+)\s*(?:nights?|n)\b', re.IGNORECASE)
+
+
+def parse_duration(text):
+    """Parse free-text durations like "7 Days / 6 Nights" or "6N/7D" into (days, nights).
+
+    A missing half is inferred (nights = days - 1). Returns (None, None) if
+    nothing recognisable is found.
+    """
+    text = text or ''
+    days_match = _DAYS_RE.search(text)
+    nights_match = _NIGHTS_RE.search(text)
+    days = int(days_match.group(1)) if days_match else None
+    nights = int(nights_match.group(1)) if nights_match else None
+
+    if days is None and nights is None:
+        return None, None
+    if days is None:
+        days = nights + 1
+    elif nights is None:
+        nights = max(days - 1, 0)
+    return days, nights
+
+
+def normalize_durations(packages):
+    """Fill days/nights on unsaved packages, for callers using bulk_create/bulk_update"""
+    for package in packages:
+        package.days, package.nights = parse_duration(package.duration)
+    return packages
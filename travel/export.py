@@ -0,0 +1,337 @@
+"""
+Static export of the public catalogue for a CDN or plain file server.
+
+``plan()`` lists every exportable page with a digest of what it is built
+from: row hashes of the Package, State, Country and Testimonial rows it
+shows plus the project templates. Package pages also hash the package's
+images, itinerary days and destination cities. ``export()`` renders only
+pages whose digest differs from the previous manifest (or whose file is
+missing) in a process pool. Each worker renders through the full Django stack as an
+anonymous visitor, and writes its page atomically next to precompressed
+``.gz``/``.br`` variants. The manifest is replaced atomically last, so it
+always describes files that exist.
+
+Pages map to ``<url path>/index.html``. Later package list pages
+(``/packages/?page=N``) are written to ``packages/page/N/index.html``.
+Everything else stays on Django. ``DYNAMIC_PREFIXES`` is recorded in the
+manifest, and so is the rule that ``/packages/`` with any other query
+string (filters, search) goes to Django.
+
+Row hashes skip ``popularity``, ``view_count`` and ``updated_at``, so
+popularity updates do not rebuild the site. Nearby-destination blocks
+on package pages refresh when that package changes or with ``force``.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import math
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import connections
+from django.urls import reverse
+from django.utils import timezone
+
+from sanskruti_travels.staticfiles import MIN_COMPRESS_SIZE, brotli
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+PACKAGES_PER_PAGE = 9  # Must match the Paginator in views.package_list
+IGNORED_FIELDS = {'popularity', 'view_count', 'updated_at'}
+TEMPLATE_ONLY_ROUTES = ('about', 'terms', 'privacy_policy')
+# Mirrors sanskruti_travels.urls and travel.urls: forms, accounts, bookings, API and admin
+DYNAMIC_PREFIXES = (
+    '/admin/', '/bookings/', '/accounts/', '/api/', '/private-media/', '/health/', '/profiles/',
+    '/contact/', '/custom-tour/', '/newsletter-subscribe/', '/currency/',
+)
+QUERY_ROUTES = ('/packages/',)  # Served statically only without a query string (or with ?page=N)
+
+# True in export workers, so renders don't count as package views
+rendering = False
+
+
+@dataclass
+class Page:
+    path: str  # Relative to the export root
+    url: str
+    digest: str
+
+
+@dataclass
+class ExportReport:
+    rendered: list = field(default_factory=list)
+    unchanged: int = 0
+    removed: list = field(default_factory=list)
+    failed: dict = field(default_factory=dict)  # path -> error
+
+
+def _digest(*parts):
+    return hashlib.blake2b('\x1f'.join(map(str, parts)).encode(), digest_size=16).hexdigest()
+
+
+def _combine(digests):
+    return _digest(*sorted(digests))
+
+
+def _digest_fields(model):
+    return ['pk'] + [f.attname for f in model._meta.concrete_fields
+                     if not f.primary_key and f.attname not in IGNORED_FIELDS]
+
+
+def _row_digests(model, extra=None):
+    """{pk: digest of the row's concrete fields}, plus ``extra[pk]`` when given"""
+    digests = {}
+    for row in model.objects.order_by().values_list(*_digest_fields(model)):
+        digests[row[0]] = _digest(*row, *(extra or {}).get(row[0], ()))
+    return digests
+
+
+def _child_digests(model, parent_field):
+    """{parent id: [row digests]} for child rows such as a package's images"""
+    names = _digest_fields(model)
+    index = names.index(parent_field)
+    grouped = {}
+    for row in model.objects.order_by().values_list(*names):
+        grouped.setdefault(row[index], []).append(_digest(*row))
+    return grouped
+
+
+def template_digest():
+    """Digest of the project's template files (names, sizes and mtimes)"""
+    from django.template import engines
+    from django.template.backends.django import DjangoTemplates
+
+    project_root = str(settings.BASE_DIR)
+    entries = []
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        for directory in map(str, engine.template_dirs):
+            if not directory.startswith(project_root) or os.sep + 'site-packages' + os.sep in directory:
+                continue
+            for root, dirs, files in os.walk(directory):
+                for filename in files:
+                    stat = os.stat(os.path.join(root, filename))
+                    entries.append(f'{os.path.join(root, filename)}:{stat.st_size}:{stat.st_mtime_ns}')
+    return _combine(entries)
+
+
+def _file_path(url):
+    """'/packages/goa/' -> 'packages/goa/index.html'"""
+    return (url.strip('/') + '/index.html').lstrip('/')
+
+
+def plan():
+    """Every exportable page and its digest, in twelve queries however large the catalogue"""
+    from .models import City, Country, Itinerary, Package, PackageImage, State, Testimonial
+
+    templates = template_digest()
+
+    destinations = {}
+    for package_id, city_id in Package.destinations.through.objects.values_list('package_id', 'city_id'):
+        destinations.setdefault(package_id, []).append(city_id)
+    package_rows = _row_digests(Package, {pk: sorted(ids) for pk, ids in destinations.items()})
+    state_rows = _row_digests(State)
+    country_rows = _row_digests(Country)
+    testimonial_rows = _row_digests(Testimonial)
+    city_rows = _row_digests(City)
+    images_by_package = _child_digests(PackageImage, 'package_id')
+    itinerary_by_package = _child_digests(Itinerary, 'package_id')
+
+    by_state, by_country, by_category, testimonials_by_package = {}, {}, {}, {}
+    packages = list(Package.objects.order_by().values_list('pk', 'slug', 'state_id', 'country_id', 'category_id'))
+    for pk, slug, state_id, country_id, category_id in packages:
+        by_state.setdefault(state_id, []).append(package_rows[pk])
+        by_country.setdefault(country_id, []).append(package_rows[pk])
+        by_category.setdefault(category_id, []).append(package_rows[pk])
+    for pk, package_id in Testimonial.objects.order_by().values_list('pk', 'package_id'):
+        testimonials_by_package.setdefault(package_id, []).append(testimonial_rows[pk])
+
+    all_packages = _combine(package_rows.values())
+    all_states = _combine(state_rows.values())
+    all_countries = _combine(country_rows.values())
+    all_testimonials = _combine(testimonial_rows.values())
+
+    def page(url, *parts):
+        return Page(_file_path(url.split('?')[0]), url, _digest(templates, url, *parts))
+
+    pages = [
+        page(reverse('home'), all_packages, all_states, all_countries, all_testimonials),
+        page(reverse('sitemap'), all_packages, all_states, all_countries),
+        page(reverse('state_list'), all_states),
+        page(reverse('country_list'), all_countries),
+    ]
+    pages += [page(reverse(name)) for name in TEMPLATE_ONLY_ROUTES]
+
+    list_url = reverse('package_list')
+    pages.append(page(list_url, all_packages))
+    for number in range(2, math.ceil(len(packages) / PACKAGES_PER_PAGE) + 1):
+        entry = page(f'{list_url}?page={number}', all_packages)
+        entry.path = _file_path(f'{list_url}page/{number}/')
+        pages.append(entry)
+
+    for pk, slug, state_id, country_id, category_id in packages:
+        if not slug:
+            continue
+        pages.append(page(
+            reverse('package_detail', kwargs={'slug': slug}),
+            package_rows[pk], state_rows.get(state_id), country_rows.get(country_id),
+            # Related packages are drawn from the same category, state and country
+            _combine(by_category.get(category_id, [])) if category_id else '',
+            _combine(by_state.get(state_id, [])) if state_id else '',
+            _combine(by_country.get(country_id, [])) if country_id else '',
+            _combine(testimonials_by_package.get(pk, [])),
+            _combine(images_by_package.get(pk, [])),
+            _combine(itinerary_by_package.get(pk, [])),
+            _combine(city_rows[city_id] for city_id in destinations.get(pk, [])),
+        ))
+    for slug, pk in State.objects.exclude(slug__isnull=True).exclude(slug='').values_list('slug', 'pk'):
+        pages.append(page(reverse('state_detail', kwargs={'slug': slug}),
+                          state_rows[pk], _combine(by_state.get(pk, []))))
+    for slug, pk in Country.objects.exclude(slug__isnull=True).exclude(slug='').values_list('slug', 'pk'):
+        pages.append(page(reverse('country_detail', kwargs={'slug': slug}),
+                          country_rows[pk], _combine(by_country.get(pk, []))))
+    return pages
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(handle, 'wb') as temp:
+            temp.write(data)
+        os.chmod(temp_path, 0o644)  # mkstemp creates 0600; the file server must be able to read it
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def _write_page(path, content):
+    """Write a page and its compressed variants; variants that don't save bytes are removed"""
+    variants = {}
+    if len(content) >= MIN_COMPRESS_SIZE:
+        variants['.gz'] = gzip.compress(content, compresslevel=9, mtime=0)
+        if brotli is not None:
+            variants['.br'] = brotli.compress(content, quality=11)
+    for suffix in ('.gz', '.br'):
+        compressed = variants.get(suffix)
+        if compressed is not None and len(compressed) < len(content):
+            _write_atomic(path + suffix, compressed)
+        elif os.path.exists(path + suffix):
+            os.unlink(path + suffix)
+    # The plain file goes last, so it is never newer than a stale variant
+    _write_atomic(path, content)
+
+
+def _remove_page(root, path):
+    for suffix in ('', '.gz', '.br'):
+        try:
+            os.unlink(os.path.join(root, path + suffix))
+        except FileNotFoundError:
+            pass
+    directory = os.path.dirname(os.path.join(root, path))
+    while directory != root and os.path.isdir(directory) and not os.listdir(directory):
+        os.rmdir(directory)
+        directory = os.path.dirname(directory)
+
+
+_client = None
+
+
+def _init_worker(host):
+    global _client, rendering
+    import django
+    from django.apps import apps
+
+    if not apps.ready:  # spawn/forkserver start methods
+        django.setup()
+    from django.test import Client
+
+    rendering = True
+    _client = Client(HTTP_HOST=host, raise_request_exception=True)
+
+
+def _render(task):
+    """Render one page in a worker; returns (path, {etag, bytes}, error)"""
+    root, path, url = task
+    try:
+        response = _client.get(url)
+        if response.status_code != 200:
+            return path, None, f'HTTP {response.status_code}'
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        _write_page(os.path.join(root, path), content)
+    except Exception as exc:
+        logger.exception('Static export of %s failed', url)
+        return path, None, f'{type(exc).__name__}: {exc}'
+    return path, {'etag': hashlib.sha256(content).hexdigest()[:32], 'bytes': len(content)}, None
+
+
+def read_manifest(root):
+    try:
+        with open(os.path.join(root, MANIFEST_NAME), encoding='utf-8') as handle:
+            manifest = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get('version') == MANIFEST_VERSION else None
+
+
+def export(root, workers=None, force=False, dry_run=False):
+    """Render changed pages into ``root`` and replace its manifest; returns an ExportReport"""
+    root = os.path.abspath(root)
+    previous = (read_manifest(root) or {}).get('pages', {}) if not force else {}
+    pages = plan()
+    report = ExportReport()
+
+    entries, todo = {}, []
+    for page in pages:
+        old = previous.get(page.path)
+        if old and old['digest'] == page.digest and os.path.exists(os.path.join(root, page.path)):
+            entries[page.path] = old
+            report.unchanged += 1
+        else:
+            todo.append(page)
+    planned = {page.path for page in pages}
+    report.removed = sorted(path for path in previous if path not in planned)
+    if dry_run:
+        report.rendered = [page.path for page in todo]
+        return report
+
+    if todo:
+        host = getattr(settings, 'STATIC_EXPORT_HOST', '') or next(
+            (host.lstrip('.') for host in settings.ALLOWED_HOSTS if '*' not in host), 'localhost',
+        )
+        by_path = {page.path: page for page in todo}
+        # Workers open their own connections; a forked child must not reuse the parent's socket
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker,
+                                 initargs=(host,)) as pool:
+            tasks = [(root, page.path, page.url) for page in todo]
+            for path, result, error in pool.map(_render, tasks, chunksize=max(1, len(tasks) // 64)):
+                page = by_path[path]
+                if error is None:
+                    entries[path] = {'url': page.url, 'digest': page.digest, **result}
+                    report.rendered.append(path)
+                else:
+                    report.failed[path] = error
+                    if path in previous:
+                        entries[path] = previous[path]  # Keep serving the last good render
+
+    for path in report.removed:
+        _remove_page(root, path)
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'generated_at': timezone.now().isoformat(),
+        'dynamic_prefixes': list(DYNAMIC_PREFIXES),
+        'query_routes': list(QUERY_ROUTES),
+        'pages': dict(sorted(entries.items())),
+    }
+    _write_atomic(os.path.join(root, MANIFEST_NAME), json.dumps(manifest, indent=1).encode())
+    return report
@@ -0,0 +1,346 @@
+"""
+Spatial lookups over City coordinates.
+
+Cities store latitude/longitude plus a geohash (indexed) so the database can
+bucket nearby rows with a prefix match. Request-time queries go through an
+in-memory KD-tree instead: points are kept as unit vectors on the sphere, so
+straight-line (chord) distance orders exactly like great-circle distance and
+there is no special case at the antimeridian or the poles.
+
+The index is built on first use with one query and rebuilt only when
+``GEO_VERSION_KEY`` moves, which travel.signals bumps on City, State and
+Country changes only, so package edits never force a rebuild. With ``GEO_INDEX_ENABLED``
+off, ``cities_within`` falls back to the geohash buckets in SQL and
+``resolve_place`` reads single cities or one region's cities from the database.
+"""
+import heapq
+import math
+import threading
+
+from django.conf import settings
+
+from . import catalogue
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_PRECISION = 6  # ~1.2 km x 0.6 km cells
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+MAX_COVERING_CELLS = 64  # Upper bound on OR-ed prefix filters in the SQL fallback
+GEO_VERSION_KEY = 'travel:geo_version'
+
+
+def geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Encode a coordinate as a base32 geohash"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        target, value = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (target[0] + target[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            target[0] = middle
+        else:
+            target[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def _cell_degrees(precision):
+    """(height, width) of a geohash cell in degrees; longitude gets the odd bit"""
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+
+def _steps(start, stop, step):
+    values = []
+    while start < stop:
+        values.append(start)
+        start += step
+    values.append(stop)
+    return values
+
+
+def covering_prefixes(latitude, longitude, radius_km):
+    """Geohash prefixes whose cells together cover the circle around a point"""
+    angle = min(radius_km / EARTH_RADIUS_KM, math.pi)
+    lat_delta = math.degrees(angle)
+    south, north = max(-90.0, latitude - lat_delta), min(90.0, latitude + lat_delta)
+    if south <= -90.0 or north >= 90.0 or math.sin(angle) >= math.cos(math.radians(latitude)):
+        lon_delta = 180.0  # The circle contains a pole, so it spans every longitude
+    else:
+        lon_delta = math.degrees(math.asin(math.sin(angle) / math.cos(math.radians(latitude))))
+
+    # Finest precision whose cells are no shorter than the radius, coarsened until the cover stays small
+    precision = GEOHASH_PRECISION
+    while precision > 1:
+        lat_step, lon_step = _cell_degrees(precision)
+        cells = ((north - south) / lat_step + 2) * (2 * lon_delta / lon_step + 2)
+        if lat_step >= lat_delta and cells <= MAX_COVERING_CELLS:
+            break
+        precision -= 1
+    lat_step, lon_step = _cell_degrees(precision)
+
+    # Sampling no further apart than a cell hits every cell the bounding box touches
+    prefixes = set()
+    for lat in _steps(south, north, lat_step):
+        for lon in _steps(longitude - lon_delta, longitude + lon_delta, lon_step):
+            prefixes.add(geohash(lat, (lon + 180.0) % 360.0 - 180.0, precision))
+    return prefixes
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _unit_vector(latitude, longitude):
+    lat, lon = math.radians(latitude), math.radians(longitude)
+    cos_lat = math.cos(lat)
+    return (cos_lat * math.cos(lon), cos_lat * math.sin(lon), math.sin(lat))
+
+
+def _chord(km):
+    return 2 * math.sin(min(km, math.pi * EARTH_RADIUS_KM) / (2 * EARTH_RADIUS_KM))
+
+
+def _km(chord):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+class KDTree:
+    """Static 3-d tree over (point, key) pairs with radius and k-nearest queries"""
+
+    def __init__(self, points, keys):
+        self.points = points
+        self.keys = keys
+        # Node: (index, axis, left, right)
+        self.root = self._build(list(range(len(points))), 0)
+
+    def _build(self, indexes, depth):
+        if not indexes:
+            return None
+        axis = depth % 3
+        indexes.sort(key=lambda i: self.points[i][axis])
+        middle = len(indexes) // 2
+        return (
+            indexes[middle], axis,
+            self._build(indexes[:middle], depth + 1),
+            self._build(indexes[middle + 1:], depth + 1),
+        )
+
+    def within(self, point, radius):
+        """[(distance, key)] for all points within ``radius``, nearest first"""
+        found = []
+        limit = radius * radius
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            index, axis, left, right = node
+            candidate = self.points[index]
+            distance = sum((a - b) ** 2 for a, b in zip(point, candidate))
+            if distance <= limit:
+                found.append((math.sqrt(distance), self.keys[index]))
+            offset = point[axis] - candidate[axis]
+            stack.append(left if offset < 0 else right)
+            if offset * offset <= limit:
+                stack.append(right if offset < 0 else left)
+        found.sort()
+        return found
+
+    def nearest(self, point, k, max_distance=math.inf, exclude=()):
+        """[(distance, key)] for the ``k`` nearest points not in ``exclude``, nearest first"""
+        heap = []  # Max-heap of (-distance², key) holding the best k so far
+        bound = max_distance * max_distance
+
+        def visit(node):
+            nonlocal bound
+            if node is None:
+                return
+            index, axis, left, right = node
+            candidate = self.points[index]
+            distance = sum((a - b) ** 2 for a, b in zip(point, candidate))
+            key = self.keys[index]
+            if distance <= bound and key not in exclude:
+                heapq.heappush(heap, (-distance, key))
+                if len(heap) > k:
+                    heapq.heappop(heap)
+                if len(heap) == k:
+                    bound = -heap[0][0]
+            offset = point[axis] - candidate[axis]
+            near, far = (left, right) if offset < 0 else (right, left)
+            visit(near)
+            if offset * offset <= bound:
+                visit(far)
+
+        if k > 0:
+            visit(self.root)
+        return sorted((math.sqrt(-distance), key) for distance, key in heap)
+
+
+def invalidate():
+    """Make every worker rebuild the city index on its next lookup"""
+    catalogue.bump_version(GEO_VERSION_KEY)
+
+
+class CityIndex:
+    """Lazy KD-tree over geocoded cities, reloaded when the geo version changes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._tree = None
+        self._cities = {}  # id -> (latitude, longitude, state_id, country_id)
+        self._centroids = {}  # ('state' | 'country', id) -> (latitude, longitude)
+
+    def _ensure_loaded(self):
+        current = catalogue.read_version(GEO_VERSION_KEY)
+        if self._version == current:
+            return
+        with self._lock:
+            if self._version == current:
+                return
+            from .models import City
+
+            cities = {}
+            for pk, lat, lon, state_id, country_id in (
+                City.objects.filter(latitude__isnull=False, longitude__isnull=False)
+                .values_list('pk', 'latitude', 'longitude', 'state_id', 'country_id')
+                .iterator(chunk_size=5000)
+            ):
+                cities[pk] = (lat, lon, state_id, country_id)
+            keys = list(cities)
+            vectors = [_unit_vector(*cities[pk][:2]) for pk in keys]
+            self._tree = KDTree(vectors, keys)
+            groups = {}
+            for pk, vector in zip(keys, vectors):
+                state_id, country_id = cities[pk][2:]
+                for group in (('state', state_id), ('country', country_id)):
+                    if group[1] is not None:
+                        groups.setdefault(group, []).append(vector)
+            self._centroids = {group: _mean_position(members) for group, members in groups.items()}
+            self._cities = cities
+            self._version = current
+
+    def load(self):
+        """Build the tree now rather than on the first lookup"""
+        self._ensure_loaded()
+
+    def location(self, city_id):
+        """(latitude, longitude) of a geocoded city, or None"""
+        self._ensure_loaded()
+        city = self._cities.get(city_id)
+        return city[:2] if city else None
+
+    def centroid(self, state_id=None, country_id=None):
+        """Mean position of the geocoded cities in a state or country, or None"""
+        self._ensure_loaded()
+        return self._centroids.get(('state', state_id) if state_id is not None else ('country', country_id))
+
+    def within(self, latitude, longitude, radius_km):
+        """[(km, city_id)] within ``radius_km``, nearest first"""
+        self._ensure_loaded()
+        found = self._tree.within(_unit_vector(latitude, longitude), _chord(radius_km))
+        return [(_km(chord), pk) for chord, pk in found]
+
+    def nearest(self, latitude, longitude, k, max_km=None, exclude=()):
+        """[(km, city_id)] for the ``k`` nearest cities, nearest first"""
+        self._ensure_loaded()
+        limit = _chord(max_km) if max_km is not None else math.inf
+        found = self._tree.nearest(_unit_vector(latitude, longitude), k, limit, set(exclude))
+        return [(_km(chord), pk) for chord, pk in found]
+
+
+def _mean_position(vectors):
+    """(latitude, longitude) of the mean of unit vectors, or None for none"""
+    if not vectors:
+        return None
+    x, y, z = (sum(axis) for axis in zip(*vectors))
+    return math.degrees(math.atan2(z, math.hypot(x, y))), math.degrees(math.atan2(y, x))
+
+
+cities = CityIndex()
+
+
+def _city_location(city_id):
+    """``cities.location`` without the in-memory index: one primary key lookup"""
+    from .models import City
+
+    return City.objects.filter(
+        pk=city_id, latitude__isnull=False, longitude__isnull=False,
+    ).values_list('latitude', 'longitude').first()
+
+
+def _region_centroid(**filters):
+    """``cities.centroid`` without the in-memory index: reads only the region's cities"""
+    from .models import City
+
+    return _mean_position([
+        _unit_vector(lat, lon) for lat, lon in City.objects.filter(
+            latitude__isnull=False, longitude__isnull=False, **filters,
+        ).values_list('latitude', 'longitude')
+    ])
+
+
+def cities_within(latitude, longitude, radius_km):
+    """[(km, city_id)] within ``radius_km``, from the in-memory index or the geohash buckets"""
+    if getattr(settings, 'GEO_INDEX_ENABLED', True):
+        return cities.within(latitude, longitude, radius_km)
+
+    from django.db.models import Q
+
+    from .models import City
+
+    buckets = Q()
+    for prefix in covering_prefixes(latitude, longitude, radius_km):
+        buckets |= Q(geohash__startswith=prefix)
+    found = []
+    for pk, lat, lon in City.objects.filter(buckets).values_list('pk', 'latitude', 'longitude'):
+        distance = haversine_km(latitude, longitude, lat, lon)
+        if distance <= radius_km:
+            found.append((distance, pk))
+    found.sort()
+    return found
+
+
+def resolve_place(value):
+    """(latitude, longitude) for "lat,lon" or a city, state or country slug; None if unknown"""
+    from . import slugs
+
+    lat, sep, lon = value.partition(',')
+    if sep:
+        try:
+            latitude, longitude = float(lat), float(lon)
+        except ValueError:
+            return None
+        if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+            return latitude, longitude
+        return None
+
+    if getattr(settings, 'GEO_INDEX_ENABLED', True):
+        lookups = (
+            (slugs.cities, cities.location),
+            (slugs.states, lambda pk: cities.centroid(state_id=pk)),
+            (slugs.countries, lambda pk: cities.centroid(country_id=pk)),
+        )
+    else:
+        lookups = (
+            (slugs.cities, _city_location),
+            (slugs.states, lambda pk: _region_centroid(state_id=pk)),
+            (slugs.countries, lambda pk: _region_centroid(country_id=pk)),
+        )
+    for resolver, locate in lookups:
+        pk = resolver.resolve(value)
+        if pk is None:
+            # Accept names as well as slugs ("near=Goa")
+            pk = resolver.resolve(resolver.canonical_for_legacy(value) or '')
+        if pk is not None:
+            return locate(pk)
+    return None
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from travel import catalogue
+from travel.duration import normalize_durations
+from travel.models import Package
+
+
+class Command(BaseCommand):
+    help = 'Parse Package.duration text into the structured days/nights columns'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--all', action='store_true',
+                            help='Re-parse every package, not only those missing days')
+
+    def handle(self, *args, **options):
+        packages = Package.objects.only('id', 'duration', 'days', 'nights').order_by('id')
+        if not options['all']:
+            packages = packages.filter(days__isnull=True)
+
+        batch_size = options['batch_size']
+        updated = unparsed = 0
+        # Page by id rather than offset: unparseable rows keep days NULL and would repeat
+        last_id = 0
+        while True:
+            batch = list(packages.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            normalize_durations(batch)
+            Package.objects.bulk_update(batch, ['days', 'nights'])
+            updated += len(batch)
+            unparsed += sum(1 for package in batch if package.days is None)
+
+        # bulk_update skips signals, so refresh derived catalogue data explicitly
+        catalogue.invalidate()
+        self.stdout.write(self.style.SUCCESS(f'Updated {updated} packages ({unparsed} durations could not be parsed).'))
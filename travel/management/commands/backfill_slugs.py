@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from travel import catalogue
+from travel.models import City, Country, State
+from travel.slugs import unique_slug
+
+
+class Command(BaseCommand):
+    help = 'Generate stored slugs for states, countries and cities that do not have one'
+
+    def handle(self, *args, **options):
+        for model in (State, Country, City):
+            missing = model.objects.filter(Q(slug__isnull=True) | Q(slug='')).order_by('pk')
+            count = 0
+            with transaction.atomic():
+                for instance in missing.iterator():
+                    # Saved one by one so unique_slug sees the slugs assigned earlier in the run
+                    instance.slug = unique_slug(instance, instance.name)
+                    model.objects.filter(pk=instance.pk).update(slug=instance.slug)
+                    count += 1
+            self.stdout.write(f'{model._meta.verbose_name_plural.title()}: {count} slugs generated')
+
+        # update() skips signals, so drop the cached slug maps explicitly
+        catalogue.invalidate()
+        self.stdout.write(self.style.SUCCESS('Slug backfill complete.'))
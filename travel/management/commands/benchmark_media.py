@@ -0,0 +1,67 @@
+import os
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.views.static import serve as django_static_serve
+
+from sanskruti_travels import media
+
+
+class Command(BaseCommand):
+    help = "Compare Django's static() view with sanskruti_travels.media for a file under MEDIA_ROOT"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File path relative to MEDIA_ROOT')
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--backends', default='python,accel,sendfile',
+                            help='Comma-separated media backends to time')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.isfile(os.path.join(settings.MEDIA_ROOT, path)):
+            raise CommandError(f'{path} does not exist under MEDIA_ROOT')
+
+        factory = RequestFactory()
+        url = settings.MEDIA_URL + path
+        iterations = options['iterations']
+
+        self._report('django.views.static.serve', iterations, lambda: django_static_serve(
+            factory.get(url), path, document_root=settings.MEDIA_ROOT,
+        ))
+
+        original = getattr(settings, 'MEDIA_SERVE_BACKEND', 'python')
+        try:
+            for backend in options['backends'].split(','):
+                settings.MEDIA_SERVE_BACKEND = backend.strip()
+                self._report(f'media.serve_media ({backend})', iterations,
+                             lambda: media.serve_media(factory.get(url), path))
+                self._report(f'media.serve_media ({backend}, 304)', iterations,
+                             lambda: media.serve_media(factory.get(url, HTTP_IF_NONE_MATCH=self._etag(url, path)), path))
+            settings.MEDIA_SERVE_BACKEND = 'python'
+            self._report('media.serve_media (python, 64KiB range)', iterations,
+                         lambda: media.serve_media(factory.get(url, HTTP_RANGE='bytes=0-65535'), path))
+        finally:
+            settings.MEDIA_SERVE_BACKEND = original
+
+    def _etag(self, url, path):
+        return media.serve_media(RequestFactory().get(url), path)['ETag']
+
+    def _report(self, label, iterations, call):
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            response = call()
+            # Drain the body so streamed responses are measured end to end
+            if getattr(response, 'streaming', False):
+                for _chunk in response.streaming_content:
+                    pass
+                response.close()
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        self.stdout.write(
+            f'{label:45} mean {statistics.mean(timings):7.3f} ms   '
+            f'p50 {timings[len(timings) // 2]:7.3f} ms   p95 {timings[int(len(timings) * 0.95) - 1]:7.3f} ms'
+        )
@@ -0,0 +1,87 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+
+from travel.models import Country, Package, State, Testimonial
+
+
+class Command(BaseCommand):
+    help = 'Time template rendering with the old uncached path against the cached loader and fragment caches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('templates', nargs='*', default=['travel/home.html'])
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def handle(self, *args, **options):
+        context = self._context()
+        request = self._request()
+        fragments = caches['template_fragments']
+
+        for template_name in options['templates']:
+            uncached = self._uncached_engine().get_template
+
+            def render_uncached():
+                fragments.clear()
+                uncached(template_name).render(context, request)
+
+            before = self._time(options['iterations'], render_uncached)
+
+            cached = engines['django'].get_template
+            cached(template_name).render(context, request)  # Warm loader and fragments
+            after = self._time(options['iterations'], lambda: cached(template_name).render(context, request))
+
+            self.stdout.write(f'{template_name}')
+            self.stdout.write(f'  before (uncached loader, cold fragments)  {self._summary(before)}')
+            self.stdout.write(f'  after  (cached loader, warm fragments)    {self._summary(after)}')
+            self.stdout.write(f'  speedup x{statistics.mean(before) / statistics.mean(after):.1f}')
+
+    def _uncached_engine(self):
+        """A Django engine configured like the original settings: no cached loader"""
+        params = dict(settings.TEMPLATES[0])
+        options = dict(params.get('OPTIONS', {}))
+        options['loaders'] = [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]
+        params.update(NAME='benchmark_uncached', APP_DIRS=False, OPTIONS=options)
+        params.pop('BACKEND', None)
+        return DjangoTemplates(params)
+
+    def _context(self):
+        # Querysets are evaluated up front so only rendering is timed
+        return {
+            'featured_packages': list(Package.objects.filter(featured=True).prefetch_related('destinations')[:6]),
+            'national_packages': list(Package.objects.filter(type='national', best_seller=True)[:3]),
+            'international_packages': list(Package.objects.filter(type='international', best_seller=True)[:3]),
+            'testimonials': list(Testimonial.objects.order_by('-created_at')[:6]),
+            'states': list(State.objects.all()),
+            'countries': list(Country.objects.all()),
+        }
+
+    def _request(self):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        request.session = SessionStore()
+        request._messages = FallbackStorage(request)
+        return request
+
+    def _time(self, iterations, render):
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            render()
+            timings.append((time.perf_counter() - started) * 1000)
+        return sorted(timings)
+
+    def _summary(self, timings):
+        return (f'mean {statistics.mean(timings):7.3f} ms   p50 {timings[len(timings) // 2]:7.3f} ms   '
+                f'p95 {timings[int(len(timings) * 0.95) - 1]:7.3f} ms')
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from travel import export
+
+
+class Command(BaseCommand):
+    help = 'Render the public catalogue to static files, rebuilding only pages whose data changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=None, help='Export directory (default STATIC_EXPORT_ROOT)')
+        parser.add_argument('--workers', type=int, default=None, help='Render processes (default: CPU count)')
+        parser.add_argument('--force', action='store_true', help='Re-render every page')
+        parser.add_argument('--dry-run', action='store_true', help='List pages that would be rendered or removed')
+
+    def handle(self, *args, **options):
+        root = options['output'] or settings.STATIC_EXPORT_ROOT
+        report = export.export(root, workers=options['workers'], force=options['force'], dry_run=options['dry_run'])
+
+        verbose = options['verbosity'] > 1 or options['dry_run']
+        prefix = 'Would render' if options['dry_run'] else 'Rendered'
+        if verbose:
+            for path in report.rendered:
+                self.stdout.write(f'  {path}')
+            for path in report.removed:
+                self.stdout.write(f'  removed {path}')
+        for path, error in sorted(report.failed.items()):
+            self.stderr.write(f'  {path}: {error}')
+        self.stdout.write(
+            f'{prefix} {len(report.rendered)} pages, {report.unchanged} unchanged, '
+            f'{len(report.removed)} removed, into {root}.'
+        )
+        if report.failed:
+            raise CommandError(f'{len(report.failed)} pages failed; their previous versions were kept.')
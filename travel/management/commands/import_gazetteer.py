@@ -0,0 +1,150 @@
+import csv
+import unicodedata
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from travel import catalogue
+from travel.models import City
+
+# Column positions in GeoNames dumps (cities500.txt, IN.txt, allCountries.txt, ...)
+GEONAMES_NAME, GEONAMES_ASCII_NAME, GEONAMES_ALTERNATE_NAMES = 1, 2, 3
+GEONAMES_LATITUDE, GEONAMES_LONGITUDE = 4, 5
+GEONAMES_COUNTRY_CODE, GEONAMES_POPULATION = 8, 14
+
+
+def normalize(name):
+    """Case- and accent-insensitive key for matching place names"""
+    decomposed = unicodedata.normalize('NFKD', name or '')
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold().strip()
+
+
+class Command(BaseCommand):
+    help = 'Geocode cities from a local gazetteer file (GeoNames dump or CSV); makes no network calls'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='GeoNames tab-separated dump, or CSV with name,latitude,longitude columns')
+        parser.add_argument('--format', choices=['geonames', 'csv'], default=None,
+                            help='Defaults to csv for *.csv files and geonames otherwise')
+        parser.add_argument('--country-info', help='GeoNames countryInfo.txt, to match country codes to Country names')
+        parser.add_argument('--alternate-names', action='store_true',
+                            help='Also match on GeoNames alternate names')
+        parser.add_argument('--overwrite', action='store_true', help='Replace coordinates that are already set')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or ('csv' if options['path'].lower().endswith('.csv') else 'geonames')
+        cities = City.objects.select_related('state', 'country').order_by('id')
+        if not options['overwrite']:
+            cities = cities.filter(latitude__isnull=True)
+
+        # name -> [(city, expected country key, expected state key)]
+        wanted = {}
+        for city in cities:
+            expected_country = normalize(city.country.name) if city.country else None
+            if expected_country is None and city.state is not None:
+                # States are Indian states (national packages)
+                expected_country = normalize(getattr(settings, 'GEO_HOME_COUNTRY', 'India'))
+            expected_state = normalize(city.state.name) if city.state else None
+            wanted.setdefault(normalize(city.name), []).append((city, expected_country, expected_state))
+        if not wanted:
+            self.stdout.write('No cities need geocoding.')
+            return
+
+        country_names = self._country_names(options['country_info'])
+        best = {}  # city id -> (score, population, latitude, longitude)
+        if fmt == 'geonames':
+            records = self._geonames(options['path'], options['alternate_names'], country_names)
+        else:
+            records = self._csv(options['path'])
+        for names, latitude, longitude, country, state, population in records:
+            for key in names:
+                for city, expected_country, expected_state in wanted.get(key, ()):
+                    if expected_country and country and country != expected_country:
+                        continue
+                    score = 0
+                    if expected_country and country == expected_country:
+                        score += 2
+                    if expected_state and state == expected_state:
+                        score += 1
+                    candidate = (score, population, latitude, longitude)
+                    if city.id not in best or candidate[:2] > best[city.id][:2]:
+                        best[city.id] = candidate
+
+        matched = []
+        for entries in wanted.values():
+            for city, _, _ in entries:
+                if city.id in best:
+                    city.latitude, city.longitude = best[city.id][2:]
+                    city.geohash = city.compute_geohash()
+                    matched.append(city)
+        unmatched = sorted(city.name for entries in wanted.values() for city, _, _ in entries if city.id not in best)
+
+        if not options['dry_run']:
+            City.objects.bulk_update(matched, ['latitude', 'longitude', 'geohash'], batch_size=options['batch_size'])
+            # bulk_update skips signals, so rebuild the spatial index and other derived data explicitly
+            catalogue.invalidate()
+
+        for name in unmatched:
+            self.stdout.write(f'  not found: {name}')
+        verb = 'Would geocode' if options['dry_run'] else 'Geocoded'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {len(matched)} cities ({len(unmatched)} not found).'))
+
+    def _country_names(self, path):
+        """ISO code -> normalized country name from GeoNames countryInfo.txt"""
+        if not path:
+            return {}
+        names = {}
+        with open(path, encoding='utf-8') as handle:
+            for line in handle:
+                if line.startswith('#'):
+                    continue
+                columns = line.rstrip('\n').split('\t')
+                if len(columns) > 4:
+                    names[columns[0]] = normalize(columns[4])
+        return names
+
+    def _geonames(self, path, alternate_names, country_names):
+        home_code = getattr(settings, 'GEO_HOME_COUNTRY_CODE', 'IN')
+        country_names = {home_code: normalize(getattr(settings, 'GEO_HOME_COUNTRY', 'India')), **country_names}
+        try:
+            handle = open(path, encoding='utf-8')
+        except OSError as exc:
+            raise CommandError(f'Cannot read {path}: {exc}')
+        with handle:
+            # Streamed: full dumps are far larger than the handful of cities we look up
+            for line in handle:
+                columns = line.rstrip('\n').split('\t')
+                if len(columns) <= GEONAMES_POPULATION:
+                    continue
+                names = {normalize(columns[GEONAMES_NAME]), normalize(columns[GEONAMES_ASCII_NAME])}
+                if alternate_names and columns[GEONAMES_ALTERNATE_NAMES]:
+                    names.update(normalize(name) for name in columns[GEONAMES_ALTERNATE_NAMES].split(','))
+                try:
+                    latitude, longitude = float(columns[GEONAMES_LATITUDE]), float(columns[GEONAMES_LONGITUDE])
+                    population = int(columns[GEONAMES_POPULATION] or 0)
+                except ValueError:
+                    continue
+                # An unknown country code can't rule a record out, so leave it unset
+                country = country_names.get(columns[GEONAMES_COUNTRY_CODE])
+                yield names, latitude, longitude, country, None, population
+
+    def _csv(self, path):
+        try:
+            handle = open(path, encoding='utf-8', newline='')
+        except OSError as exc:
+            raise CommandError(f'Cannot read {path}: {exc}')
+        with handle:
+            reader = csv.DictReader(handle)
+            missing = {'name', 'latitude', 'longitude'} - set(reader.fieldnames or ())
+            if missing:
+                raise CommandError(f'CSV is missing columns: {", ".join(sorted(missing))}')
+            for row in reader:
+                try:
+                    latitude, longitude = float(row['latitude']), float(row['longitude'])
+                    population = int(row.get('population') or 0)
+                except ValueError:
+                    continue
+                yield ({normalize(row['name'])}, latitude, longitude,
+                       normalize(row.get('country')) or None, normalize(row.get('state')) or None, population)
@@ -0,0 +1,84 @@
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from travel import currency
+from travel.models import ExchangeRate
+
+
+class Command(BaseCommand):
+    help = 'Load display exchange rates from a local JSON or CSV file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='JSON {"base": "INR", "rates": {"USD": "0.012", ...}} '
+                                         'or CSV with currency,rate[,symbol,quantum] columns')
+        parser.add_argument('--deactivate-missing', action='store_true',
+                            help='Deactivate currencies that are not in the file')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            rows = self._csv(path) if path.lower().endswith('.csv') else self._json(path)
+        except (OSError, ValueError, KeyError, InvalidOperation) as exc:
+            raise CommandError(f'Cannot read rates from {path}: {exc}')
+        rows.pop(settings.BASE_CURRENCY, None)
+
+        quanta = getattr(settings, 'CURRENCY_QUANTA', {})
+        existing = {rate.currency: rate for rate in ExchangeRate.objects.all()}
+        to_create, to_update = [], []
+        for code, values in rows.items():
+            rate = existing.get(code)
+            if rate is None:
+                rate = ExchangeRate(currency=code, quantum=Decimal(quanta.get(code, '0.01')))
+                to_create.append(rate)
+            else:
+                to_update.append(rate)
+            rate.rate = values['rate']
+            rate.active = True
+            if values.get('symbol'):
+                rate.symbol = values['symbol']
+            if values.get('quantum'):
+                rate.quantum = values['quantum']
+
+        with transaction.atomic():
+            ExchangeRate.objects.bulk_create(to_create)
+            ExchangeRate.objects.bulk_update(to_update, ['rate', 'active', 'symbol', 'quantum'])
+            deactivated = 0
+            if options['deactivate_missing']:
+                deactivated = ExchangeRate.objects.exclude(currency__in=rows).update(active=False)
+        # Bulk writes skip signals, so move the FX version explicitly
+        currency.invalidate()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(to_create)} rates added, {len(to_update)} updated, {deactivated} deactivated.'
+        ))
+
+    def _json(self, path):
+        with open(path, encoding='utf-8') as handle:
+            data = json.load(handle)
+        rates = {code.upper(): Decimal(str(rate)) for code, rate in data['rates'].items()}
+        base = data.get('base', settings.BASE_CURRENCY).upper()
+        if base != settings.BASE_CURRENCY:
+            # Rebase e.g. USD-quoted rates onto INR: X per INR = (X per USD) / (INR per USD)
+            pivot = rates.get(settings.BASE_CURRENCY)
+            if not pivot:
+                raise ValueError(f'rates are quoted in {base} but have no {settings.BASE_CURRENCY} entry')
+            rates = {code: rate / pivot for code, rate in rates.items()}
+            rates[base] = 1 / pivot
+        return {code: {'rate': rate.quantize(Decimal('1E-8'))} for code, rate in rates.items()}
+
+    def _csv(self, path):
+        rows = {}
+        with open(path, encoding='utf-8', newline='') as handle:
+            for row in csv.DictReader(handle):
+                code = row['currency'].strip().upper()
+                rows[code] = {
+                    'rate': Decimal(row['rate']).quantize(Decimal('1E-8')),
+                    'symbol': (row.get('symbol') or '').strip(),
+                    'quantum': Decimal(row['quantum']) if row.get('quantum') else None,
+                }
+        return rows
@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from sanskruti_travels import ratelimit
+
+
+class Command(BaseCommand):
+    help = 'Show requests rejected by each rate limit policy, per hour'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24)
+        parser.add_argument('--policy', action='append', help='Limit to these policies (repeatable)')
+
+    def handle(self, *args, **options):
+        policies = options['policy'] or sorted(settings.RATE_LIMITS)
+        for policy in policies:
+            rows = ratelimit.rejections(policy, options['hours'])
+            total = sum(count for hour, count in rows)
+            limits = ', '.join(f'{key} {rate}' for key, rate in settings.RATE_LIMITS.get(policy, ()))
+            self.stdout.write(f'{policy}: {total} rejected in the last {options["hours"]}h  ({limits})')
+            for hour, count in rows:
+                if count:
+                    self.stdout.write(f'  {datetime.fromtimestamp(hour):%Y-%m-%d %H:00}  {count}')
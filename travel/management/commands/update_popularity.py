@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from travel import popularity
+
+
+class Command(BaseCommand):
+    help = 'Decay popularity scores for the time since the last run and optionally recompute best sellers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--best-sellers', type=int, default=0, metavar='N',
+                            help='Mark the top N packages of each type as best sellers')
+        parser.add_argument('--days', type=int, default=90,
+                            help='Booking window in days used for best seller ranking')
+
+    def handle(self, *args, **options):
+        # View counts are buffered in each web worker and flushed there; this process has none of its own
+        decayed = popularity.decay_popularity()
+        self.stdout.write(f'Decayed {decayed} scores.')
+
+        if options['best_sellers']:
+            best_ids = popularity.recompute_best_sellers(
+                per_type=options['best_sellers'], days=options['days'],
+            )
+            self.stdout.write(f'Marked {len(best_ids)} packages as best sellers.')
+
+        self.stdout.write(self.style.SUCCESS('Popularity update complete.'))
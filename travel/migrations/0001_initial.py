@@ -0,0 +1,213 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:09
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Country',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(blank=True, max_length=120, null=True, unique=True)),
+                ('description', models.TextField(blank=True)),
+                ('image', models.ImageField(blank=True, upload_to='countries/')),
+            ],
+            options={
+                'verbose_name_plural': 'Countries',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ExchangeRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(max_length=3, unique=True)),
+                ('symbol', models.CharField(blank=True, max_length=5)),
+                ('rate', models.DecimalField(decimal_places=8, max_digits=18)),
+                ('quantum', models.DecimalField(decimal_places=4, default=Decimal('0.01'), max_digits=10)),
+                ('active', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['currency'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PackageCategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Package Categories',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='State',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(blank=True, max_length=120, null=True, unique=True)),
+                ('description', models.TextField(blank=True)),
+                ('image', models.ImageField(blank=True, upload_to='states/')),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='City',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(blank=True, max_length=120, null=True, unique=True)),
+                ('description', models.TextField(blank=True)),
+                ('image', models.ImageField(blank=True, upload_to='cities/')),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('geohash', models.CharField(blank=True, db_index=True, editable=False, max_length=12)),
+                ('country', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cities', to='travel.country')),
+                ('state', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cities', to='travel.state')),
+            ],
+            options={
+                'verbose_name_plural': 'Cities',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Package',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('slug', models.SlugField(blank=True, max_length=250, unique=True)),
+                ('description', models.TextField()),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('duration', models.CharField(max_length=100)),
+                ('days', models.PositiveSmallIntegerField(blank=True, editable=False, null=True)),
+                ('nights', models.PositiveSmallIntegerField(blank=True, editable=False, null=True)),
+                ('type', models.CharField(choices=[('national', 'National'), ('international', 'International')], max_length=20)),
+                ('featured', models.BooleanField(default=False)),
+                ('best_seller', models.BooleanField(default=False)),
+                ('main_image', models.ImageField(upload_to='packages/')),
+                ('single_supplement', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=10)),
+                ('rating', models.DecimalField(decimal_places=1, default=0.0, max_digits=3)),
+                ('review_count', models.IntegerField(default=0)),
+                ('view_count', models.PositiveIntegerField(default=0)),
+                ('popularity', models.FloatField(db_index=True, default=0.0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('includes', models.TextField(blank=True)),
+                ('excludes', models.TextField(blank=True)),
+                ('country', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='packages', to='travel.country')),
+                ('destinations', models.ManyToManyField(related_name='packages', to='travel.city')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='travel.packagecategory')),
+                ('state', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='packages', to='travel.state')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Itinerary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.IntegerField()),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('package', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='itinerary_days', to='travel.package')),
+            ],
+            options={
+                'verbose_name_plural': 'Itineraries',
+                'ordering': ['package', 'day'],
+            },
+        ),
+        migrations.CreateModel(
+            name='GroupDiscount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('min_travellers', models.PositiveSmallIntegerField()),
+                ('percent', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('package', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='group_discounts', to='travel.package')),
+            ],
+            options={
+                'ordering': ['min_travellers'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ChildAgeBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('min_age', models.PositiveSmallIntegerField()),
+                ('max_age', models.PositiveSmallIntegerField()),
+                ('percent', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('package', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='child_age_bands', to='travel.package')),
+            ],
+            options={
+                'ordering': ['min_age'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PackageImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.ImageField(upload_to='packages/')),
+                ('caption', models.CharField(blank=True, max_length=200)),
+                ('order', models.IntegerField(default=0)),
+                ('package', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='images', to='travel.package')),
+            ],
+            options={
+                'ordering': ['order'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Testimonial',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('location', models.CharField(max_length=100)),
+                ('content', models.TextField()),
+                ('rating', models.IntegerField(default=5)),
+                ('image', models.ImageField(blank=True, null=True, upload_to='testimonials/')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('package', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='testimonials', to='travel.package')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SeasonalRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('adult_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('child_percent', models.DecimalField(decimal_places=2, default=Decimal('50'), max_digits=5)),
+                ('single_supplement', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=10)),
+                ('priority', models.IntegerField(default=0)),
+                ('package', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seasonal_rates', to='travel.package')),
+            ],
+            options={
+                'ordering': ['package', 'start_date'],
+                'indexes': [models.Index(fields=['package', 'end_date'], name='travel_seas_package_7c02f1_idx')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='package',
+            index=models.Index(fields=['days'], name='travel_pack_days_9abc97_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='package',
+            index=models.Index(fields=['price'], name='travel_pack_price_f648b8_idx'),
+        ),
+    ]
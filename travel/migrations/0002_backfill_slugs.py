@@ -0,0 +1,30 @@
+from django.db import migrations
+from django.db.models import Q
+from django.utils.text import slugify
+
+
+def backfill_slugs(apps, schema_editor):
+    """Same rules as travel.slugs.unique_slug, against the historical models"""
+    for model_name in ('State', 'Country', 'City'):
+        model = apps.get_model('travel', model_name)
+        taken = set(model.objects.exclude(Q(slug__isnull=True) | Q(slug='')).values_list('slug', flat=True))
+        for pk, name in model.objects.filter(Q(slug__isnull=True) | Q(slug='')).order_by('pk').values_list('pk', 'name'):
+            base = slugify(name)[:120] or 'item'
+            candidate, suffix = base, 2
+            while candidate in taken:
+                tail = f'-{suffix}'
+                candidate = base[:120 - len(tail)] + tail
+                suffix += 1
+            taken.add(candidate)
+            model.objects.filter(pk=pk).update(slug=candidate)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('travel', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_slugs, migrations.RunPython.noop),
+    ]
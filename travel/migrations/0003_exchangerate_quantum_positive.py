@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:12
+
+import django.core.validators
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def reset_invalid_quanta(apps, schema_editor):
+    """Rows saved with a zero or negative step would fail the new constraint"""
+    ExchangeRate = apps.get_model('travel', 'ExchangeRate')
+    ExchangeRate.objects.filter(quantum__lte=0).update(quantum=Decimal('0.01'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('travel', '0002_backfill_slugs'),
+    ]
+
+    operations = [
+        migrations.RunPython(reset_invalid_quanta, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='exchangerate',
+            name='quantum',
+            field=models.DecimalField(decimal_places=4, default=Decimal('0.01'), max_digits=10, validators=[django.core.validators.MinValueValidator(Decimal('0.0001'))]),
+        ),
+        migrations.AddConstraint(
+            model_name='exchangerate',
+            constraint=models.CheckConstraint(condition=models.Q(('quantum__gt', 0)), name='exchangerate_quantum_positive'),
+        ),
+    ]
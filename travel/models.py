@@ -1,13 +1,29 @@
+from decimal import Decimal
+
+from django.core.validators import MinValueValidator
 from django.db import models
 from django.utils.text import slugify
 from django.urls import reverse
 
+from . import geo
+from .duration import parse_duration
+from .slugs import unique_slug
+
 class State(models.Model):
     """Model for Indian states for national packages"""
     name = models.CharField(max_length=100)
+    slug = models.SlugField(max_length=120, unique=True, null=True, blank=True)  # NULL until backfilled
     description = models.TextField(blank=True)
     image = models.ImageField(upload_to='states/', blank=True)
     
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = unique_slug(self, self.name)
+        super().save(*args, **kwargs)
+    
+    def get_absolute_url(self):
+        return reverse('state_detail', kwargs={'slug': self.slug})
+    
     def __str__(self):
         return self.name
     
@@ -17,9 +33,18 @@ class State(models.Model):
 class Country(models.Model):
     """Model for countries for international packages"""
     name = models.CharField(max_length=100)
+    slug = models.SlugField(max_length=120, unique=True, null=True, blank=True)  # NULL until backfilled
     description = models.TextField(blank=True)
     image = models.ImageField(upload_to='countries/', blank=True)
     
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = unique_slug(self, self.name)
+        super().save(*args, **kwargs)
+    
+    def get_absolute_url(self):
+        return reverse('country_detail', kwargs={'slug': self.slug})
+    
     def __str__(self):
         return self.name
     
@@ -32,9 +57,26 @@ class City(models.Model):
     name = models.CharField(max_length=100)
     state = models.ForeignKey(State, on_delete=models.CASCADE, null=True, blank=True, related_name='cities')
     country = models.ForeignKey(Country, on_delete=models.CASCADE, null=True, blank=True, related_name='cities')
+    slug = models.SlugField(max_length=120, unique=True, null=True, blank=True)  # NULL until backfilled
     description = models.TextField(blank=True)
     image = models.ImageField(upload_to='cities/', blank=True)
     
+    # Coordinates (see travel.geo and the import_gazetteer command)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, editable=False)
+    
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = unique_slug(self, self.name)
+        self.geohash = self.compute_geohash()
+        super().save(*args, **kwargs)
+    
+    def compute_geohash(self):
+        if self.latitude is None or self.longitude is None:
+            return ''
+        return geo.geohash(self.latitude, self.longitude)
+    
     def __str__(self):
         if self.state:
             return f"{self.name}, {self.state.name}"
@@ -70,6 +112,8 @@ class Package(models.Model):
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
     duration = models.CharField(max_length=100)  # e.g., "7 Days / 6 Nights"
+    days = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)  # Parsed from duration
+    nights = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
     type = models.CharField(max_length=20, choices=PACKAGE_TYPE_CHOICES)
     
     # Locations
@@ -85,10 +129,17 @@ class Package(models.Model):
     # Images
     main_image = models.ImageField(upload_to='packages/')
     
+    # Pricing (per adult; seasonal overrides live in SeasonalRate, see travel.pricing)
+    single_supplement = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0'))
+    
     # Reviews
     rating = models.DecimalField(max_digits=3, decimal_places=1, default=0.0)
     review_count = models.IntegerField(default=0)
     
+    # Popularity (maintained by travel.popularity, never written per request)
+    view_count = models.PositiveIntegerField(default=0)
+    popularity = models.FloatField(default=0.0, db_index=True)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -100,6 +151,7 @@ class Package(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
+        self.days, self.nights = parse_duration(self.duration)
         super().save(*args, **kwargs)
     
     def get_absolute_url(self):
@@ -110,6 +162,55 @@ class Package(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['days']),
+            models.Index(fields=['price']),
+        ]
+
+class SeasonalRate(models.Model):
+    """Per-adult price for a date range (peak season, festival week, ...)"""
+    package = models.ForeignKey(Package, on_delete=models.CASCADE, related_name='seasonal_rates')
+    name = models.CharField(max_length=100)
+    start_date = models.DateField()
+    end_date = models.DateField()  # Inclusive
+    adult_price = models.DecimalField(max_digits=10, decimal_places=2)
+    child_percent = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('50'))  # Of the adult price
+    single_supplement = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0'))
+    priority = models.IntegerField(default=0)  # Higher wins where ranges overlap
+    
+    def __str__(self):
+        return f"{self.name} ({self.start_date} to {self.end_date}) - {self.package.title}"
+    
+    class Meta:
+        ordering = ['package', 'start_date']
+        indexes = [
+            models.Index(fields=['package', 'end_date']),
+        ]
+
+class ChildAgeBand(models.Model):
+    """Child price as a percentage of the adult price for an age range"""
+    package = models.ForeignKey(Package, on_delete=models.CASCADE, null=True, blank=True, related_name='child_age_bands')  # Empty = all packages
+    min_age = models.PositiveSmallIntegerField()
+    max_age = models.PositiveSmallIntegerField()  # Inclusive
+    percent = models.DecimalField(max_digits=5, decimal_places=2)
+    
+    def __str__(self):
+        return f"Ages {self.min_age}-{self.max_age}: {self.percent}%"
+    
+    class Meta:
+        ordering = ['min_age']
+
+class GroupDiscount(models.Model):
+    """Percentage off the whole quote from a party size upwards"""
+    package = models.ForeignKey(Package, on_delete=models.CASCADE, null=True, blank=True, related_name='group_discounts')  # Empty = all packages
+    min_travellers = models.PositiveSmallIntegerField()
+    percent = models.DecimalField(max_digits=5, decimal_places=2)
+    
+    def __str__(self):
+        return f"{self.percent}% off for {self.min_travellers}+ travellers"
+    
+    class Meta:
+        ordering = ['min_travellers']
 
 class PackageImage(models.Model):
     """Additional images for a package"""
@@ -149,4 +250,28 @@ class Testimonial(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
-        return f"Review by {self.name} for {self.package.title if self.package else 'General'}"
\ No newline at end of file
+        return f"Review by {self.name} for {self.package.title if self.package else 'General'}"
+
+class ExchangeRate(models.Model):
+    """Display rate from the base currency (INR) to another currency"""
+    currency = models.CharField(max_length=3, unique=True)  # ISO 4217 code, e.g. "USD"
+    symbol = models.CharField(max_length=5, blank=True)
+    rate = models.DecimalField(max_digits=18, decimal_places=8)  # Units of `currency` per 1 base unit
+    quantum = models.DecimalField(  # Round to this step, e.g. 1 for JPY; conversion divides by it
+        max_digits=10, decimal_places=4, default=Decimal('0.01'), validators=[MinValueValidator(Decimal('0.0001'))],
+    )
+    active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def save(self, *args, **kwargs):
+        self.currency = self.currency.upper()
+        super().save(*args, **kwargs)
+    
+    def __str__(self):
+        return f"1 INR = {self.rate} {self.currency}"
+    
+    class Meta:
+        ordering = ['currency']
+        constraints = [
+            models.CheckConstraint(condition=models.Q(quantum__gt=0), name='exchangerate_quantum_positive'),
+        ]
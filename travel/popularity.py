@@ -0,0 +1,155 @@
+"""
+Buffered package view counters and time-decayed popularity scores.
+
+Views are accumulated in process and flushed as batched
+``UPDATE ... SET view_count = view_count + n`` statements, so the
+package_detail read path never writes a row per request. Each process
+flushes only its own buffer (on a timer, a threshold or at exit); the
+update_popularity command cannot reach other workers' buffers.
+
+Decay is applied for the real time since the previous run, recorded as a
+RollupWatermark, so a skipped or doubled cron run does not skew scores.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Q
+from django.utils import timezone
+
+from . import catalogue
+
+logger = logging.getLogger(__name__)
+
+DECAY_WATERMARK = 'popularity_decay'
+
+_lock = threading.Lock()
+_pending = defaultdict(int)
+_last_flush = time.monotonic()
+
+
+def _flush_interval():
+    return getattr(settings, 'PACKAGE_VIEW_FLUSH_INTERVAL', 30)
+
+
+def _flush_threshold():
+    return getattr(settings, 'PACKAGE_VIEW_FLUSH_THRESHOLD', 500)
+
+
+def record_view(package_id):
+    """Count one view of a package, flushing the buffer when it is due"""
+    with _lock:
+        _pending[package_id] += 1
+        due = (
+            sum(_pending.values()) >= _flush_threshold()
+            or time.monotonic() - _last_flush >= _flush_interval()
+        )
+    if due:
+        try:
+            flush_views()
+        except Exception:
+            # The counts stay buffered for the next flush; a failed write must not fail the page
+            logger.exception('Could not flush package view counts')
+
+
+def flush_views():
+    """Write all buffered view counts to the database, returning rows updated"""
+    global _last_flush
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    if not pending:
+        return 0
+
+    from .models import Package
+
+    # Group packages by increment so each distinct n is a single UPDATE
+    by_increment = defaultdict(list)
+    for package_id, count in pending.items():
+        by_increment[count].append(package_id)
+
+    updated = 0
+    try:
+        with transaction.atomic():
+            for count, ids in by_increment.items():
+                updated += Package.objects.filter(id__in=ids).update(
+                    view_count=F('view_count') + count,
+                    popularity=F('popularity') + count,
+                )
+    except Exception:
+        # Put the counts back so the next flush retries them
+        with _lock:
+            for package_id, count in pending.items():
+                _pending[package_id] += count
+        raise
+    return updated
+
+
+def decay_popularity(now=None):
+    """Decay every popularity score for the time elapsed since the previous decay; returns rows updated"""
+    from bookings.models import RollupWatermark
+
+    from .models import Package
+
+    now = now or timezone.now()
+    with transaction.atomic():
+        # Locked so two overlapping runs cannot both apply the same interval
+        watermark, created = RollupWatermark.objects.select_for_update().get_or_create(name=DECAY_WATERMARK)
+        if watermark.value is not None and now <= watermark.value:
+            return 0
+        decayed = 0
+        if watermark.value is not None:  # The first run only starts the clock
+            hours = (now - watermark.value).total_seconds() / 3600
+            half_life = getattr(settings, 'PACKAGE_POPULARITY_HALF_LIFE_DAYS', 7) * 24
+            factor = 0.5 ** (hours / half_life)
+            decayed = Package.objects.filter(popularity__gt=0).update(popularity=F('popularity') * factor)
+        watermark.value = now
+        watermark.save(update_fields=['value', 'updated_at'])
+    return decayed
+
+
+def recompute_best_sellers(per_type=3, days=90, booking_weight=10):
+    """Flag the top packages of each type by recent bookings and popularity"""
+    from .models import Package
+
+    since = timezone.now() - timedelta(days=days)
+    recent_bookings = Count(
+        'bookings',
+        filter=Q(bookings__booking_date__gte=since) & ~Q(bookings__status='cancelled'),
+    )
+
+    best_ids = []
+    for package_type, _label in Package.PACKAGE_TYPE_CHOICES:
+        ranked = (
+            Package.objects.filter(type=package_type)
+            .annotate(score=ExpressionWrapper(
+                recent_bookings * booking_weight + F('popularity'),
+                output_field=FloatField(),
+            ))
+            .order_by('-score', '-created_at')
+            .values_list('id', flat=True)[:per_type]
+        )
+        best_ids.extend(ranked)
+
+    # update() sends no signals; touch updated_at for the card fragments and bump the catalogue version
+    now = timezone.now()
+    with transaction.atomic():
+        Package.objects.filter(best_seller=True).exclude(id__in=best_ids).update(best_seller=False, updated_at=now)
+        Package.objects.filter(id__in=best_ids, best_seller=False).update(best_seller=True, updated_at=now)
+    catalogue.invalidate()
+    return best_ids
+
+
+@atexit.register
+def _flush_on_exit():
+    # Don't lose the tail of the buffer when a worker shuts down cleanly
+    try:
+        flush_views()
+    except Exception:
+        pass
@@ -0,0 +1,277 @@
+"""
+Quote engine: seasonal rates, child age bands, group discounts and single supplements.
+
+Each package's rules are compiled into a ``RateCalendar``: one small array
+slot per day for ``QUOTE_CALENDAR_DAYS`` from today, pointing into a table of
+the distinct (adult price, child %, single supplement) rates. Pricing a
+date is an index lookup; dates beyond the horizon are resolved from the
+seasons directly. Compiled pricing is kept per process in an LRU and thrown
+away when ``catalogue.version()`` moves (the rule models are catalogue
+models).
+
+``quote_many`` and ``price_calendars`` load the rules for any number of
+packages in four queries. All arithmetic is Decimal, rounded half-up to
+paise per line.
+"""
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from . import catalogue
+
+CENT = Decimal('0.01')
+HUNDRED = Decimal('100')
+MAX_CHILD_AGE = 17
+
+
+class QuoteError(ValueError):
+    pass
+
+
+class UnknownPackage(QuoteError):
+    pass
+
+
+def _money(value):
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _percent_of(amount, percent):
+    return amount * percent / HUNDRED
+
+
+class RateCalendar:
+    """Day-indexed (adult price, child %, single supplement) for one package"""
+
+    def __init__(self, default, seasons, start, days):
+        self.default = default
+        self.seasons = seasons  # Sorted so later entries win
+        self.start = start
+        table, index = [default], {default: 0}
+        slots = array('H', [0]) * days
+        for season in seasons:
+            low = max((season.start_date - start).days, 0)
+            high = min((season.end_date - start).days + 1, days)
+            if low >= high:
+                continue
+            rate = (season.adult_price, season.child_percent, season.single_supplement)
+            if rate not in index:
+                index[rate] = len(table)
+                table.append(rate)
+            slots[low:high] = array('H', [index[rate]]) * (high - low)
+        self.table = table
+        self.slots = slots
+
+    def rate(self, day):
+        offset = (day - self.start).days
+        if 0 <= offset < len(self.slots):
+            return self.table[self.slots[offset]]
+        # Outside the precompiled horizon: the last matching season wins, as in the calendar
+        for season in reversed(self.seasons):
+            if season.start_date <= day <= season.end_date:
+                return season.adult_price, season.child_percent, season.single_supplement
+        return self.default
+
+
+@dataclass
+class PackagePricing:
+    package_id: int
+    calendar: RateCalendar
+    child_bands: list  # [(min_age, max_age, percent)], package-specific bands first
+    group_discounts: list  # [(min_travellers, percent)]
+
+    def child_percent(self, age, default):
+        for min_age, max_age, percent in self.child_bands:
+            if min_age <= age <= max_age:
+                return percent
+        return default
+
+    def group_percent(self, travellers):
+        return max((percent for minimum, percent in self.group_discounts if travellers >= minimum), default=None)
+
+
+@dataclass
+class Quote:
+    package_id: int
+    travel_date: date
+    adults: int
+    children: int
+    lines: list = field(default_factory=list)  # [(label, amount)]
+    subtotal: Decimal = Decimal('0.00')
+    discount: Decimal = Decimal('0.00')
+    total: Decimal = Decimal('0.00')
+
+    def as_dict(self):
+        return {
+            'package_id': self.package_id,
+            'travel_date': self.travel_date.isoformat(),
+            'adults': self.adults,
+            'children': self.children,
+            'currency': settings.BASE_CURRENCY,
+            'lines': [{'label': label, 'amount': str(amount)} for label, amount in self.lines],
+            'subtotal': str(self.subtotal),
+            'discount': str(self.discount),
+            'total': str(self.total),
+        }
+
+
+class PricingCache:
+    """Per-process LRU of compiled package pricing, invalidated by the catalogue version"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._entries = OrderedDict()
+
+    def get_many(self, package_ids):
+        """{package_id: PackagePricing} for the packages that exist"""
+        current = catalogue.version()
+        today = timezone.localdate()
+        found, missing = {}, []
+        with self._lock:
+            if self._version != current:
+                self._entries.clear()
+                self._version = current
+            for package_id in package_ids:
+                pricing = self._entries.get(package_id)
+                # A calendar compiled yesterday would start in the past; recompile from today
+                if pricing is not None and pricing.calendar.start == today:
+                    self._entries.move_to_end(package_id)
+                    found[package_id] = pricing
+                else:
+                    missing.append(package_id)
+        if missing:
+            compiled = _compile(missing, today)
+            with self._lock:
+                if self._version == current:
+                    self._entries.update(compiled)
+                    limit = getattr(settings, 'QUOTE_PRICING_CACHE_SIZE', 512)
+                    while len(self._entries) > limit:
+                        self._entries.popitem(last=False)
+            found.update(compiled)
+        return found
+
+
+_cache = PricingCache()
+
+
+def _compile(package_ids, today):
+    from .models import ChildAgeBand, GroupDiscount, Package, SeasonalRate
+
+    days = getattr(settings, 'QUOTE_CALENDAR_DAYS', 540)
+    default_child = Decimal(getattr(settings, 'QUOTE_CHILD_PERCENT', 50))
+
+    seasons = {}
+    for season in SeasonalRate.objects.filter(package_id__in=package_ids, end_date__gte=today).order_by(
+        'priority', 'start_date', 'id',
+    ):
+        seasons.setdefault(season.package_id, []).append(season)
+
+    bands = {}
+    for package_id, min_age, max_age, percent in ChildAgeBand.objects.filter(
+        Q(package_id__in=package_ids) | Q(package__isnull=True),
+    ).order_by('package_id', 'min_age').values_list('package_id', 'min_age', 'max_age', 'percent'):
+        bands.setdefault(package_id, []).append((min_age, max_age, percent))
+
+    discounts = {}
+    for package_id, min_travellers, percent in GroupDiscount.objects.filter(
+        Q(package_id__in=package_ids) | Q(package__isnull=True),
+    ).values_list('package_id', 'min_travellers', 'percent'):
+        discounts.setdefault(package_id, []).append((min_travellers, percent))
+
+    compiled = {}
+    for package_id, price, supplement in Package.objects.filter(id__in=package_ids).values_list(
+        'id', 'price', 'single_supplement',
+    ):
+        compiled[package_id] = PackagePricing(
+            package_id=package_id,
+            calendar=RateCalendar((price, default_child, supplement), seasons.get(package_id, []), today, days),
+            # Package bands are checked before the site-wide ones
+            child_bands=bands.get(package_id, []) + bands.get(None, []),
+            group_discounts=discounts.get(package_id, []) + discounts.get(None, []),
+        )
+    return compiled
+
+
+def _build_quote(pricing, travel_date, adults, children=0, child_ages=None, single_rooms=None):
+    if adults < 1:
+        raise QuoteError('At least one adult is required.')
+    if children < 0:
+        raise QuoteError('Number of children cannot be negative.')
+    max_travellers = getattr(settings, 'QUOTE_MAX_TRAVELLERS', 50)
+    if adults + children > max_travellers:
+        raise QuoteError(f'Bookings are limited to {max_travellers} travellers; please contact us for larger groups.')
+    if child_ages is not None and len(child_ages) != children:
+        raise QuoteError('Give an age for every child.')
+    if child_ages is not None and any(not 0 <= age <= MAX_CHILD_AGE for age in child_ages):
+        raise QuoteError(f'Child ages must be between 0 and {MAX_CHILD_AGE}.')
+    if travel_date < timezone.localdate():
+        raise QuoteError('Travel date cannot be in the past.')
+
+    adult_price, child_percent, supplement = pricing.calendar.rate(travel_date)
+    result = Quote(pricing.package_id, travel_date, adults, children)
+    result.lines.append((f'{adults} x adult', _money(adult_price * adults)))
+
+    if children:
+        # Group children by the percentage they pay so each band is one line
+        by_percent = OrderedDict()
+        if child_ages is None:
+            by_percent[child_percent] = children
+        for age in child_ages or ():
+            percent = pricing.child_percent(age, child_percent)
+            by_percent[percent] = by_percent.get(percent, 0) + 1
+        for percent, count in by_percent.items():
+            result.lines.append((
+                f'{count} x child ({percent.normalize():f}%)',
+                _money(_percent_of(adult_price, percent) * count),
+            ))
+
+    if single_rooms is None:
+        single_rooms = 1 if adults == 1 and not children else 0
+    if single_rooms and supplement:
+        result.lines.append((f'{single_rooms} x single supplement', _money(supplement * single_rooms)))
+
+    result.subtotal = sum((amount for label, amount in result.lines), Decimal('0.00'))
+    group_percent = pricing.group_percent(adults + children)
+    if group_percent:
+        result.discount = _money(_percent_of(result.subtotal, group_percent))
+    result.total = result.subtotal - result.discount
+    return result
+
+
+def quote(package_id, travel_date, adults, children=0, child_ages=None, single_rooms=None):
+    """Price one booking; raises QuoteError for invalid input or an unknown package"""
+    pricing = _cache.get_many([package_id]).get(package_id)
+    if pricing is None:
+        raise UnknownPackage('Unknown package.')
+    return _build_quote(pricing, travel_date, adults, children, child_ages, single_rooms)
+
+
+def quote_many(requests):
+    """Price many (package_id, travel_date, adults, children) requests; invalid ones yield None"""
+    requests = list(requests)
+    pricing = _cache.get_many({request[0] for request in requests})
+    quotes = []
+    for package_id, travel_date, adults, children in requests:
+        try:
+            quotes.append(_build_quote(pricing[package_id], travel_date, adults, children))
+        except (KeyError, QuoteError):
+            quotes.append(None)
+    return quotes
+
+
+def price_calendars(package_ids, start, days):
+    """{package_id: [(date, adult price)]} for ``days`` days from ``start``, for date pickers and listings"""
+    pricing = _cache.get_many(package_ids)
+    dates = [start + timedelta(days=offset) for offset in range(days)]
+    return {
+        package_id: [(day, entry.calendar.rate(day)[0]) for day in dates]
+        for package_id, entry in pricing.items()
+    }
@@ -0,0 +1,56 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import catalogue, currency, geo, slugs
+from .models import (
+    ChildAgeBand, City, Country, ExchangeRate, GroupDiscount, Itinerary, Package, PackageCategory, PackageImage,
+    SeasonalRate, State,
+)
+
+CATALOGUE_MODELS = (
+    Package, PackageImage, Itinerary, State, Country, City, PackageCategory,
+    SeasonalRate, ChildAgeBand, GroupDiscount,  # Compiled into travel.pricing rate calendars
+)
+
+
+def catalogue_changed(sender, **kwargs):
+    """Drop derived catalogue caches whenever catalogue rows are added, edited or removed"""
+    catalogue.invalidate()
+
+
+for model in CATALOGUE_MODELS:
+    post_save.connect(catalogue_changed, sender=model, dispatch_uid=f'catalogue_save_{model.__name__}')
+    post_delete.connect(catalogue_changed, sender=model, dispatch_uid=f'catalogue_delete_{model.__name__}')
+
+
+@receiver(m2m_changed, sender=Package.destinations.through)
+def package_destinations_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    # Package card fragments are keyed on updated_at, so touch the affected packages
+    if reverse:
+        packages = Package.objects.filter(pk__in=pk_set or ())
+    else:
+        packages = Package.objects.filter(pk=instance.pk)
+    packages.update(updated_at=timezone.now())
+    catalogue.invalidate()
+
+
+@receiver(post_save, sender=ExchangeRate)
+@receiver(post_delete, sender=ExchangeRate)
+def exchange_rate_changed(sender, **kwargs):
+    """Rates are display-only, so they get their own version instead of invalidating the catalogue"""
+    currency.invalidate()
+
+
+@receiver(post_save, sender=City)
+@receiver(post_delete, sender=City)
+@receiver(post_save, sender=State)
+@receiver(post_delete, sender=State)
+@receiver(post_save, sender=Country)
+@receiver(post_delete, sender=Country)
+def place_changed(sender, **kwargs):
+    """The city index and slug maps only depend on places, so they keep their own versions like the FX table"""
+    geo.invalidate()
+    slugs.by_model[sender._meta.label].invalidate()
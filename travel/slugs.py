@@ -0,0 +1,87 @@
+"""
+Stored slugs for State, Country and City, and an in-process slug -> id map.
+
+The map is loaded on first use with one query per model and reloaded only
+when that model's slug version moves (bumped by travel.signals on saves and
+deletes of the model itself), so resolving a slug on the hot path costs
+no database queries. Legacy name-style slugs ("tamil-nadu" for a state
+named "Tamil Nadu") resolve through the same map to the canonical slug.
+"""
+import threading
+
+from django.utils.text import slugify
+
+from . import catalogue
+
+
+def unique_slug(instance, value, max_length=120):
+    """Slugify ``value``, appending -2, -3... until it is unique for the model"""
+    base = slugify(value)[:max_length] or 'item'
+    candidate = base
+    model = type(instance)
+    suffix = 2
+    while model.objects.filter(slug=candidate).exclude(pk=instance.pk).exists():
+        tail = f'-{suffix}'
+        candidate = base[:max_length - len(tail)] + tail
+        suffix += 1
+    return candidate
+
+
+def _legacy_key(value):
+    return value.replace('-', ' ').strip().lower()
+
+
+class SlugResolver:
+    """Lazy slug -> id map for one model, reloaded when its slug version changes"""
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self.version_key = f'travel:slug_version:{model_path}'
+        self._lock = threading.Lock()
+        self._version = None
+        self._by_slug = {}
+        self._by_name = {}
+
+    def _model(self):
+        from django.apps import apps
+        return apps.get_model(self.model_path)
+
+    def invalidate(self):
+        """Make every worker reload this map on its next lookup"""
+        catalogue.bump_version(self.version_key)
+
+    def _ensure_loaded(self):
+        current = catalogue.read_version(self.version_key)
+        if self._version == current:
+            return
+        with self._lock:
+            if self._version == current:
+                return
+            by_slug, by_name = {}, {}
+            for pk, slug, name in self._model().objects.values_list('pk', 'slug', 'name'):
+                if slug:
+                    by_slug[slug] = pk
+                by_name.setdefault(name.strip().lower(), slug)
+            self._by_slug, self._by_name = by_slug, by_name
+            self._version = current
+
+    def load(self):
+        """Build the map now rather than on the first lookup"""
+        self._ensure_loaded()
+
+    def resolve(self, slug):
+        """Return the primary key for a stored slug, or None"""
+        self._ensure_loaded()
+        return self._by_slug.get(slug)
+
+    def canonical_for_legacy(self, slug):
+        """Return the stored slug for an old name-style URL slug, or None"""
+        self._ensure_loaded()
+        return self._by_name.get(_legacy_key(slug))
+
+
+states = SlugResolver('travel.State')
+countries = SlugResolver('travel.Country')
+cities = SlugResolver('travel.City')
+
+by_model = {resolver.model_path: resolver for resolver in (states, countries, cities)}
@@ -0,0 +1,40 @@
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+from django import template
+from django.utils.safestring import mark_safe
+
+from travel import currency
+
+register = template.Library()
+
+FULL_STAR = '<i class="fas fa-star text-warning"></i>'
+HALF_STAR = '<i class="fas fa-star-half-alt text-warning"></i>'
+EMPTY_STAR = '<i class="far fa-star text-warning"></i>'
+
+
+@lru_cache(maxsize=None)
+def _stars_html(half_steps):
+    full, half = divmod(half_steps, 2)
+    return mark_safe(FULL_STAR * full + HALF_STAR * half + EMPTY_STAR * (5 - full - half))
+
+
+@register.filter
+def star_icons(rating):
+    """Render a 0-5 rating as five star icons; the HTML is built once per half-star value"""
+    try:
+        value = Decimal(str(rating or 0))
+    except InvalidOperation:
+        value = Decimal(0)
+    # Matches the old template loop: a half star shows when the rating is within 0.5 of the next star
+    half_steps = min(max(int((value * 2).to_integral_value(rounding='ROUND_FLOOR')), 0), 10)
+    return _stars_html(half_steps)
+
+
+@register.filter
+def display_price(package, code):
+    """Package price in currency ``code``, reusing the Money a view already set on ``package.display_price``"""
+    money = getattr(package, 'display_price', None)
+    if money is None or money.currency != code:
+        money = currency.convert(package.price, code)
+    return money
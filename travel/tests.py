@@ -1,3 +1,581 @@
-from django.test import TestCase
+import gzip
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.http import Http404, HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import Resolver404, resolve, reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+import loadtest
+from sanskruti_travels import profiling, startup
+from sanskruti_travels.staticfiles import StaticFilesMiddleware
+from sanskruti_travels.querybudget import QueryBudgetExceeded, QueryBudgetMiddleware, assert_max_queries, query_budget
+from . import catalogue, context_processors, currency, export, geo, popularity, pricing, slugs
+from .duration import parse_duration
+from .models import ChildAgeBand, City, ExchangeRate, GroupDiscount, Itinerary, Package, PackageImage, SeasonalRate, State
+from .paginator import EstimatedCountPaginator
+from .templatetags.travel_tags import FULL_STAR, HALF_STAR, star_icons
+
+
+@query_budget(1)
+def query_budget_view(request):
+    return HttpResponse()
+
+
+def make_package(title, **fields):
+    fields.setdefault('price', Decimal('10000.00'))
+    return Package.objects.create(
+        title=title, description=f'{title} description', duration=fields.pop('duration', '5 Days / 4 Nights'),
+        type=fields.pop('type', 'national'), main_image='packages/test.jpg', **fields,
+    )
+
+
+class CatalogueApiQueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.state = State.objects.create(name='Goa')
+        cities = [City.objects.create(name=name, state=cls.state) for name in ('Panaji', 'Calangute', 'Margao')]
+        cls.packages = []
+        for number in range(8):
+            package = make_package(f'Goa Escape {number}', state=cls.state)
+            package.destinations.set(cities[:number % 3 + 1])
+            for day in (1, 2, 3):
+                Itinerary.objects.create(package=package, day=day, title=f'Day {day}', description='Beaches')
+            PackageImage.objects.create(package=package, image='packages/extra.jpg')
+            cls.packages.append(package)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_package_list_embeds_relations_without_n_plus_one(self):
+        with assert_max_queries(4):
+            response = self.client.get(reverse('api_package_list'), {'include': 'destinations,itinerary,images'})
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()['data']
+        self.assertEqual(len(rows), 8)
+        self.assertTrue(all(len(row['itinerary']) == 3 for row in rows))
+
+    def test_package_detail_within_budget(self):
+        with assert_max_queries(4):
+            response = self.client.get(reverse('api_package_detail', args=[self.packages[0].slug]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['title'], 'Goa Escape 0')
+
+    def test_city_list_is_one_query(self):
+        with assert_max_queries(1):
+            response = self.client.get(reverse('api_city_list'), {'state': self.state.pk})
+        self.assertEqual(len(response.json()['data']), 3)
+
+    def test_api_views_declare_budgets(self):
+        from . import api
+
+        for view in (api.package_list, api.package_detail, api.state_list, api.country_list, api.city_list):
+            self.assertIsNotNone(getattr(view, 'query_budget', None), view.__name__)
+
+
+class CatalogueApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.goa = State.objects.create(name='Goa')
+        cls.packages = [
+            make_package('Goa Escape', state=cls.goa, featured=True),
+            make_package('Goa Monsoon', state=cls.goa),
+            make_package('Bali Retreat', type='international'),
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, **params):
+        return self.client.get(reverse('api_package_list'), params)
+
+    def titles(self, **params):
+        return [row['title'] for row in self.get(**params).json()['data']]
+
+    def test_filters(self):
+        self.assertEqual(self.titles(state=self.goa.pk), ['Goa Monsoon', 'Goa Escape'])
+        self.assertEqual(self.titles(type='international'), ['Bali Retreat'])
+        self.assertEqual(self.titles(featured='true'), ['Goa Escape'])
+        for bad in ('abc', '\u00b2', str(2 ** 63)):
+            with self.subTest(state=bad):
+                self.assertEqual(self.get(state=bad).status_code, 400)
+
+    def test_field_selection(self):
+        self.assertEqual(self.get(fields='title,state', type='national', limit=1).json()['data'],
+                         [{'title': 'Goa Monsoon', 'state': 'Goa', 'id': self.packages[1].pk}])
+        self.assertEqual(self.get(fields='title,secret').status_code, 400)
+        self.assertEqual(self.get(include='reviews').status_code, 400)
+
+    def test_cursor_pages_and_etag(self):
+        first = self.get(limit=2, fields='id').json()
+        self.assertEqual(len(first['data']), 2)
+        second = self.client.get(first['next']).json()
+        self.assertEqual(second, {'data': [{'id': self.packages[0].pk}], 'next': None})
+        self.assertEqual(self.get(cursor='!!').status_code, 400)
+
+        etag = self.get(limit=2)['ETag']
+        self.assertEqual(self.client.get(reverse('api_package_list'), {'limit': 2},
+                                         HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        make_package('Kerala Backwaters')
+        self.assertEqual(self.client.get(reverse('api_package_list'), {'limit': 2},
+                                         HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class QueryBudgetMiddlewareTests(TestCase):
+    def middleware(self, status):
+        def get_response(request):
+            list(State.objects.all())
+            list(Package.objects.all())
+            return HttpResponse(status=status)
+
+        middleware = QueryBudgetMiddleware(get_response)
+        request = RequestFactory().get('/')
+        middleware.process_view(request, query_budget_view, (), {})
+        return middleware, request
+
+    @override_settings(QUERY_BUDGET_RAISE=True)
+    def test_budget_violation_raises(self):
+        middleware, request = self.middleware(200)
+        with self.assertRaises(QueryBudgetExceeded):
+            middleware(request)
+
+    @override_settings(QUERY_BUDGET_RAISE=True)
+    def test_server_errors_are_not_budgeted(self):
+        middleware, request = self.middleware(500)
+        self.assertEqual(middleware(request).status_code, 500)
+
+    def test_assert_max_queries_reports_repeated_statements(self):
+        make_package('Kerala Backwaters')
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'N+1 suspected'):
+            with assert_max_queries(10, repeat_threshold=3):
+                for package_id in Package.objects.values_list('id', flat=True):
+                    for _ in range(3):
+                        Package.objects.filter(id=package_id).exists()
+
+
+class QuoteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.package = make_package('Goa Beach Escape', price=Decimal('100.05'))
+        self.travel_date = timezone.localdate() + timedelta(days=30)
+
+    def quote(self, adults=1, children=0, child_ages=None, single_rooms=0):
+        return pricing.quote(self.package.id, self.travel_date, adults, children, child_ages, single_rooms)
+
+    def test_lines_round_half_up_to_paise(self):
+        quote = self.quote(adults=1, children=1)
+        # 50% of 100.05 is 50.025, which rounds up rather than to even
+        self.assertEqual(quote.lines, [('1 x adult', Decimal('100.05')), ('1 x child (50%)', Decimal('50.03'))])
+        self.assertEqual(quote.total, Decimal('150.08'))
+
+    def test_higher_priority_season_wins_inside_and_beyond_the_calendar(self):
+        SeasonalRate.objects.create(
+            package=self.package, name='Peak', adult_price=Decimal('300.00'), priority=5,
+            start_date=self.travel_date - timedelta(days=10), end_date=self.travel_date + timedelta(days=10),
+        )
+        # Starts later, so it would win on date order alone
+        SeasonalRate.objects.create(
+            package=self.package, name='Festival', adult_price=Decimal('200.00'), priority=0,
+            start_date=self.travel_date - timedelta(days=5), end_date=self.travel_date + timedelta(days=5),
+        )
+        for horizon in (540, 10):  # Precompiled slot, then the fallback past the horizon
+            with self.subTest(horizon=horizon), override_settings(QUOTE_CALENDAR_DAYS=horizon):
+                catalogue.invalidate()
+                self.assertEqual(self.quote(adults=1).total, Decimal('300.00'))
+
+    def test_group_discount_takes_the_best_applicable_tier(self):
+        GroupDiscount.objects.create(min_travellers=4, percent=Decimal('10'))
+        GroupDiscount.objects.create(package=self.package, min_travellers=6, percent=Decimal('15'))
+        self.assertEqual(self.quote(adults=3).discount, Decimal('0.00'))
+        quote = self.quote(adults=4)
+        self.assertEqual((quote.subtotal, quote.discount, quote.total),
+                         (Decimal('400.20'), Decimal('40.02'), Decimal('360.18')))
+        quote = self.quote(adults=6)
+        # 15% of 600.30 is 90.045
+        self.assertEqual((quote.discount, quote.total), (Decimal('90.05'), Decimal('510.25')))
+
+    def test_children_are_priced_by_age_band(self):
+        ChildAgeBand.objects.create(min_age=0, max_age=4, percent=Decimal('0'))
+        quote = self.quote(adults=2, children=2, child_ages=[3, 10])
+        self.assertEqual(quote.lines[1:], [('1 x child (0%)', Decimal('0.00')), ('1 x child (50%)', Decimal('50.03'))])
+
+    @override_settings(QUOTE_MAX_TRAVELLERS=10)
+    def test_rejects_oversized_parties_and_invalid_ages(self):
+        for adults, children, ages in ((5, 6, None), (1, 10 ** 9, None), (1, 1, [-5]), (1, 1, [18]), (1, 2, [4])):
+            with self.subTest(adults=adults, children=children, ages=ages), self.assertRaises(pricing.QuoteError):
+                self.quote(adults, children, ages)
+
+
+class GeoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.state = State.objects.create(name='Goa')
+        cls.panaji = City.objects.create(name='Panaji', state=cls.state, latitude=15.4909, longitude=73.8278)
+        cls.margao = City.objects.create(name='Margao', state=cls.state, latitude=15.2832, longitude=73.9862)
+        cls.mumbai = City.objects.create(name='Mumbai', latitude=19.0760, longitude=72.8777)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_within_and_nearest(self):
+        for enabled in (True, False):
+            with self.subTest(index=enabled), override_settings(GEO_INDEX_ENABLED=enabled):
+                found = geo.cities_within(15.4909, 73.8278, 50)
+                self.assertEqual([pk for _, pk in found], [self.panaji.pk, self.margao.pk])
+                self.assertAlmostEqual(found[1][0], 28.6, delta=0.5)
+        nearest = geo.cities.nearest(15.4909, 73.8278, 1, exclude=[self.panaji.pk])
+        self.assertEqual([pk for _, pk in nearest], [self.margao.pk])
+        self.assertEqual(geo.cities.nearest(15.4909, 73.8278, 2, max_km=10), [(0.0, self.panaji.pk)])
+
+    def test_resolve_place_by_coordinates_and_slug(self):
+        self.assertEqual(geo.resolve_place('15.5,73.8'), (15.5, 73.8))
+        self.assertIsNone(geo.resolve_place('95,73.8'))
+        self.assertEqual(geo.resolve_place(self.mumbai.slug), (19.0760, 72.8777))
+        latitude, longitude = geo.resolve_place(self.state.slug)
+        self.assertAlmostEqual(latitude, 15.387, places=2)
+        self.assertAlmostEqual(longitude, 73.907, places=2)
+
+    def test_package_list_clamps_the_radius(self):
+        with mock.patch('travel.views.render', return_value=HttpResponse()) as render:
+            for radius, expected in (('-50', 0), ('40', 40), ('100000', settings.GEO_MAX_RADIUS_KM)):
+                self.client.get(reverse('package_list'), {'near': self.panaji.slug, 'radius': radius})
+                self.assertEqual(render.call_args.args[2]['radius'], expected)
+
+    def test_index_reloads_on_place_changes_only(self):
+        geo.cities.load()
+        make_package('Goa Escape', state=self.state)
+        with self.assertNumQueries(0):
+            geo.cities.within(15.4909, 73.8278, 50)
+        City.objects.create(name='Vasco', state=self.state, latitude=15.3860, longitude=73.8440)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(geo.cities.within(15.4909, 73.8278, 50)), 3)
+
+
+class SlugTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.state = State.objects.create(name='Tamil Nadu', slug='tn')
+
+    def test_unique_slug_appends_a_counter(self):
+        self.assertEqual([State.objects.create(name='Goa').slug for _ in range(3)], ['goa', 'goa-2', 'goa-3'])
+
+    def test_legacy_name_slugs_redirect_permanently(self):
+        response = self.client.get(reverse('state_detail', args=['tamil-nadu']))
+        self.assertRedirects(
+            response, reverse('state_detail', args=['tn']), status_code=301, fetch_redirect_response=False,
+        )
+        self.assertEqual(self.client.get(reverse('state_detail', args=['kerala'])).status_code, 404)
+
+    def test_map_reloads_on_its_own_model_changes_only(self):
+        slugs.states.load()
+        make_package('Chennai Temples', state=self.state)
+        with self.assertNumQueries(0):
+            self.assertEqual(slugs.states.resolve('tn'), self.state.pk)
+        self.state.slug = 'tamilnadu'
+        self.state.save()
+        self.assertIsNone(slugs.states.resolve('tn'))
+        self.assertEqual(slugs.states.canonical_for_legacy('tamil-nadu'), 'tamilnadu')
+
+
+class CurrencyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_rounds_to_a_multiple_of_the_quantum(self):
+        ExchangeRate.objects.create(currency='chf', rate=Decimal('0.0107'), quantum=Decimal('0.05'))
+        ExchangeRate.objects.create(currency='JPY', symbol='¥', rate=Decimal('1.78'), quantum=Decimal('1'))
+        # 10020 x 0.0107 = 107.214, the nearest 0.05 step is 107.20
+        self.assertEqual(str(currency.convert(Decimal('10020'), 'CHF')), '107.20 CHF')
+        self.assertEqual(str(currency.convert(Decimal('10020'), 'jpy')), '¥17,836')
+        self.assertEqual(currency.convert(Decimal('10020'), 'XXX').currency, settings.BASE_CURRENCY)
+
+    def test_quantum_must_be_positive(self):
+        rate = ExchangeRate(currency='USD', rate=Decimal('0.012'), quantum=Decimal('0'))
+        with self.assertRaises(ValidationError):
+            rate.full_clean()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            rate.save()
+
+    def test_switcher_changes_card_prices(self):
+        ExchangeRate.objects.create(currency='USD', symbol='$', rate=Decimal('0.012'))
+        make_package('Goa Escape', featured=True)
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, '<option value="USD">USD</option>', html=True)
+        self.assertContains(response, '10,000.00')
+        self.client.post(reverse('set_currency'), {'currency': 'usd'})
+        self.assertEqual(self.client.session[currency.SESSION_KEY], 'USD')
+        self.assertContains(self.client.get(reverse('home')), '$120.00')
+
+
+@override_settings(PACKAGE_POPULARITY_HALF_LIFE_DAYS=7)
+class PopularityTests(TestCase):
+    def setUp(self):
+        self.package = make_package('Goa Escape', popularity=80)
+
+    def popularity(self):
+        self.package.refresh_from_db()
+        return self.package.popularity
+
+    def test_decay_follows_the_real_elapsed_time(self):
+        start = timezone.now()
+        self.assertEqual(popularity.decay_popularity(now=start), 0)  # Starts the clock
+        self.assertEqual(self.popularity(), 80)
+        popularity.decay_popularity(now=start + timedelta(days=7))
+        self.assertAlmostEqual(self.popularity(), 40)
+        # A rerun for the same moment, or an earlier one, decays nothing
+        self.assertEqual(popularity.decay_popularity(now=start + timedelta(days=7)), 0)
+        self.assertEqual(popularity.decay_popularity(now=start + timedelta(days=1)), 0)
+        popularity.decay_popularity(now=start + timedelta(days=21))
+        self.assertAlmostEqual(self.popularity(), 10)
+
+    def test_buffered_views_are_flushed_in_one_update_per_increment(self):
+        other = make_package('Kerala Backwaters')
+        with override_settings(PACKAGE_VIEW_FLUSH_THRESHOLD=10 ** 6, PACKAGE_VIEW_FLUSH_INTERVAL=10 ** 6):
+            popularity.flush_views()
+            for package_id in (self.package.id, self.package.id, other.id):
+                popularity.record_view(package_id)
+        with self.assertNumQueries(4):  # Two UPDATEs, inside a savepoint under TestCase
+            self.assertEqual(popularity.flush_views(), 2)
+        self.assertEqual((self.popularity(), self.package.view_count), (82, 2))
+
+
+class ReadinessTests(TestCase):
+    def test_failed_warmers_are_named_without_their_errors(self):
+        errors = {'catalogue': 'could not connect to server at db.internal:5432 as admin'}
+        with mock.patch.dict(startup.report, errors=errors), mock.patch.object(startup, 'is_ready', return_value=True):
+            response = self.client.get(reverse('readiness'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['failed'], ['catalogue'])
+        self.assertNotIn('db.internal', response.content.decode())
+
+
+class ExportPlanTests(TestCase):
+    def setUp(self):
+        self.state = State.objects.create(name='Goa')
+        self.city = City.objects.create(name='Panaji', state=self.state)
+        self.package = make_package('Goa Escape', state=self.state)
+        self.package.destinations.add(self.city)
+
+    def digests(self):
+        with self.assertNumQueries(12):  # Matches the plan() docstring
+            return {page.url: page.digest for page in export.plan()}
+
+    def detail_digest_changes(self, change):
+        url = self.package.get_absolute_url()
+        before = self.digests()[url]
+        change()
+        return self.digests()[url] != before
+
+    def test_package_pages_follow_their_children_and_cities(self):
+        changes = {
+            'image': lambda: PackageImage.objects.create(package=self.package, image='packages/extra.jpg'),
+            'itinerary': lambda: Itinerary.objects.create(package=self.package, day=1, title='Day 1'),
+            'city': lambda: City.objects.filter(pk=self.city.pk).update(name='Panjim'),
+        }
+        for name, change in changes.items():
+            with self.subTest(name):
+                self.assertTrue(self.detail_digest_changes(change))
+
+    def test_popularity_does_not_rebuild(self):
+        self.assertFalse(self.detail_digest_changes(
+            lambda: Package.objects.filter(pk=self.package.pk).update(popularity=50, view_count=10),
+        ))
+
+
+@override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1000)
+class AdminChangelistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_superuser('admin@example.com', 'secret')
+        cls.packages = [make_package(f'Goa Escape {number}') for number in range(3)]
+
+    def count(self, queryset, estimate):
+        with mock.patch('travel.paginator.estimated_row_count', return_value=estimate):
+            return EstimatedCountPaginator(queryset, 10).count
+
+    def test_estimate_is_used_only_for_large_unfiltered_tables(self):
+        self.assertEqual(self.count(Package.objects.all(), 50000), 50000)
+        self.assertEqual(self.count(Package.objects.all(), 500), 3)  # Below the threshold
+        self.assertEqual(self.count(Package.objects.all(), None), 3)  # SQLite has no estimate
+        self.assertEqual(self.count(Package.objects.filter(featured=False), 50000), 3)
+
+    def test_featured_action_touches_cards_and_the_catalogue(self):
+        self.client.force_login(self.staff)
+        version = catalogue.version()
+        response = self.client.post(reverse('admin:travel_package_changelist'), {
+            'action': 'mark_featured', '_selected_action': [self.packages[0].pk],
+        })
+        self.assertEqual(response.status_code, 302)
+        package = Package.objects.get(pk=self.packages[0].pk)
+        self.assertTrue(package.featured)
+        self.assertGreater(package.updated_at, self.packages[0].updated_at)
+        self.assertNotEqual(catalogue.version(), version)
+        self.assertEqual(self.client.get(reverse('admin:travel_package_changelist')).status_code, 200)
+
+
+class DurationFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_parse_duration(self):
+        cases = {
+            '7 Days / 6 Nights': (7, 6), '6N/7D': (7, 6), '3 days': (3, 2), '4 Nights': (5, 4),
+            '1 Day': (1, 0), 'Flexible': (None, None), '': (None, None),
+        }
+        for text, expected in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(parse_duration(text), expected)
+
+    def test_package_list_filters_on_parsed_days_and_price(self):
+        short = make_package('Weekend Goa', duration='3 Days / 2 Nights', price=Decimal('8000'))
+        make_package('Kerala Week', duration='8D/7N', price=Decimal('30000'))
+        self.assertEqual((short.days, short.nights), (3, 2))
+        self.assertEqual(catalogue.price_histogram()['max_days'], 8)
+        with mock.patch('travel.views.render', return_value=HttpResponse()) as render:
+            for params, expected in (({'duration': 'short'}, ['Weekend Goa']), ({'min_days': 6}, ['Kerala Week']),
+                                     ({'max_price': '10000'}, ['Weekend Goa'])):
+                self.client.get(reverse('package_list'), params)
+                titles = [package.title for package in render.call_args.args[2]['page_obj']]
+                self.assertEqual(titles, expected, params)
+
+
+class StaticFilesMiddlewareTests(TestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        os.makedirs(os.path.join(root.name, 'css'))
+        self.css = b'body { margin: 0; }\n' * 50
+        with open(os.path.join(root.name, 'css', 'site.css'), 'wb') as handle:
+            handle.write(self.css)
+        with open(os.path.join(root.name, 'css', 'site.css.gz'), 'wb') as handle:
+            handle.write(gzip.compress(self.css))
+        with override_settings(STATIC_ROOT=root.name, STATIC_URL='/static/'):
+            self.middleware = StaticFilesMiddleware(lambda request: HttpResponse('django'))
+
+    def get(self, path='/static/css/site.css', **headers):
+        return self.middleware(RequestFactory().get(path, **headers))
+
+    def test_negotiates_the_precompressed_variant(self):
+        response = self.get(HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertTrue(response['ETag'].endswith('-gzip"'))
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), self.css)
+
+        plain = self.get(HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertNotEqual(plain['ETag'], response['ETag'])
+
+    def test_conditional_requests(self):
+        etag = self.get()['ETag']
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=f'"other", W/{etag}').status_code, 304)
+        future = http_date(timezone.now().timestamp() + 3600)
+        self.assertEqual(self.get(HTTP_IF_MODIFIED_SINCE=future).status_code, 304)
+        # If-None-Match wins over If-Modified-Since, even when the date alone would match
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='"other"', HTTP_IF_MODIFIED_SINCE=future).status_code, 200)
+
+    def test_unknown_and_escaping_paths_fall_through(self):
+        for path in ('/static/css/missing.css', '/static/../settings.py', '/static/css/site.css.gz'):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path).content, b'django')
+
+
+class LoadTestScriptTests(SimpleTestCase):
+    def test_journey_urls_still_resolve(self):
+        paths = ('/', '/packages/', '/packages/goa-escape/', '/bookings/book/1/', '/bookings/book-confirm/1/',
+                 '/accounts/login/', '/bookings/my-bookings/', '/api/v1/packages/')
+        for path in paths:
+            with self.subTest(path=path):
+                try:
+                    resolve(path)
+                except Resolver404:
+                    self.fail(f'loadtest.py requests {path}, which no longer resolves')
+
+    def test_report_percentiles(self):
+        stats = loadtest.Stats()
+        stats.started, stats.finished = 0, 10
+        for number in range(1, 101):
+            stats.record('home', number / 1000, error='HTTP 500' if number > 95 else None)
+        row = stats.report()['urls']['home']
+        self.assertEqual((row['requests'], row['rps'], row['error_rate']), (100, 10, 0.05))
+        self.assertEqual((row['p50_ms'], row['p90_ms'], row['p99_ms'], row['max_ms']), (50, 90, 99, 100))
+        self.assertEqual(loadtest._percentile([], 50), 0.0)
+
+    def test_csrf_token_prefers_the_form_field(self):
+        session = loadtest.Session('http://127.0.0.1:8000', loadtest.Stats(), 5)
+        session.cookies['csrftoken'] = 'cookie'
+        page = loadtest.Response(200, {}, b'<input type="hidden" name="csrfmiddlewaretoken" value="form">')
+        self.assertEqual(session.csrf_token(page), 'form')
+        self.assertEqual(session.csrf_token(loadtest.Response(200, {}, b'')), 'cookie')
+
+
+class TemplateFastPathTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches['template_fragments'].clear()
+
+    def test_star_icons(self):
+        self.assertEqual(star_icons(3.7).count(FULL_STAR), 3)
+        self.assertEqual(star_icons(3.7).count(HALF_STAR), 1)
+        self.assertEqual(star_icons(None), star_icons('bad'))
+        self.assertEqual(star_icons(9).count(FULL_STAR), 5)
+        self.assertIs(star_icons(4), star_icons(Decimal('4.2')))  # Built once per half-star value
+
+    def test_navigation_section(self):
+        factory = RequestFactory()
+        for path, section in (('/', 'home'), ('/about/', 'about'), ('/custom-tour/', 'custom-tour'), ('/packages/', '')):
+            with self.subTest(path=path):
+                self.assertEqual(context_processors.navigation(factory.get(path))['nav_section'], section)
+
+    def test_card_fragment_follows_destination_changes(self):
+        package = make_package('Goa Escape', featured=True)
+        self.assertNotContains(self.client.get(reverse('home')), 'Panaji')
+        package.destinations.add(City.objects.create(name='Panaji'))
+        self.assertContains(self.client.get(reverse('home')), 'Panaji')
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        settings_override = override_settings(PROFILE_ROOT=root.name, PROFILE_MODE='cprofile')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.root = root.name
+        self.staff = get_user_model().objects.create_user('staff@example.com', 'secret', is_staff=True)
+
+    def profile(self, token):
+        return self.client.get(reverse('api_state_list'), {'_profile': token})
+
+    def test_staff_token_profiles_the_request(self):
+        response = self.profile(profiling.make_token(self.staff))
+        name = response['X-Profile-Id']
+        self.assertEqual(sorted(os.listdir(self.root)), [f'{name}.json', f'{name}.prof'])
+        metadata = profiling._load(name)
+        self.assertEqual((metadata['path'], metadata['view'], metadata['reason']),
+                         ('/api/v1/states/', 'api_state_list', f'token:{self.staff.pk}'))
+
+    def test_tokens_of_demoted_or_inactive_users_are_ignored(self):
+        token = profiling.make_token(self.staff)
+        for changes in ({'is_staff': False}, {'is_active': False}):
+            with self.subTest(**changes):
+                get_user_model().objects.filter(pk=self.staff.pk).update(**changes)
+                self.assertFalse(self.profile(token).has_header('X-Profile-Id'))
+                get_user_model().objects.filter(pk=self.staff.pk).update(is_staff=True, is_active=True)
+        self.assertFalse(self.profile(token + 'x').has_header('X-Profile-Id'))
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_profile_names_cannot_leave_the_root(self):
+        for name in ('../settings', 'a/b', ''):
+            with self.subTest(name=name), self.assertRaises(Http404):
+                profiling._load(name)
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import views, api
 
 urlpatterns = [
     # Home and general pages
@@ -7,6 +7,7 @@ urlpatterns = [
     path('about/', views.about, name='about'),
     path('contact/', views.contact, name='contact'),
     path('newsletter-subscribe/', views.newsletter_subscribe, name='newsletter_subscribe'),
+    path('currency/', views.set_currency, name='set_currency'),
     path('privacy-policy/', views.privacy_policy, name='privacy_policy'),
     path('terms/', views.terms, name='terms'),
     path('sitemap/', views.sitemap, name='sitemap'),
@@ -23,4 +24,11 @@ urlpatterns = [
     
     # Custom tour request
     path('custom-tour/', views.custom_tour, name='custom_tour'),
+    
+    # Read-only JSON catalogue API
+    path('api/v1/packages/', api.package_list, name='api_package_list'),
+    path('api/v1/packages/<slug:slug>/', api.package_detail, name='api_package_detail'),
+    path('api/v1/states/', api.state_list, name='api_state_list'),
+    path('api/v1/countries/', api.country_list, name='api_country_list'),
+    path('api/v1/cities/', api.city_list, name='api_city_list'),
 ]
\ No newline at end of file
@@ -1,12 +1,68 @@
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
+from django.http import Http404
+from django.utils.dateparse import parse_date
 from django.core.paginator import Paginator
 from django.db.models import Q
+from django.views.decorators.csrf import csrf_exempt
+from sanskruti_travels.querybudget import query_budget
+from sanskruti_travels.ratelimit import rate_limit
 from .models import Package, State, Country, City, Testimonial, PackageCategory
+from .popularity import record_view
+from .catalogue import price_histogram
+from . import currency, export, geo, pricing, slugs
+
+# Presets used by the duration select on the home page search form
+DURATION_PRESETS = {
+    'short': (1, 3),
+    'medium': (4, 7),
+    'long': (8, None),
+}
+
+def _int_param(request, name):
+    try:
+        return int(request.GET[name])
+    except (KeyError, ValueError):
+        return None
+
+def _decimal_param(request, name):
+    try:
+        value = Decimal(request.GET[name])
+    except (KeyError, InvalidOperation):
+        return None
+    return value if value.is_finite() else None
+
+def _date_param(request, name):
+    try:
+        return parse_date(request.GET.get(name) or '')
+    except ValueError:
+        return None
+
+def _nearby_destinations(destination_ids):
+    """[(city, km)] closest to any of the given cities, excluding them, nearest first"""
+    if not settings.GEO_INDEX_ENABLED:
+        return []
+    limit = settings.GEO_NEARBY_COUNT
+    closest = {}
+    for city_id in destination_ids:
+        location = geo.cities.location(city_id)
+        if location is None:
+            continue
+        for km, pk in geo.cities.nearest(*location, limit, max_km=settings.GEO_NEARBY_RADIUS_KM, exclude=destination_ids):
+            closest[pk] = min(km, closest.get(pk, km))
+    nearest = sorted(closest.items(), key=lambda item: item[1])[:limit]
+    if not nearest:
+        return []
+    cities = City.objects.select_related('state', 'country').in_bulk([pk for pk, km in nearest])
+    return [(cities[pk], round(km)) for pk, km in nearest if pk in cities]
 
+@query_budget(10)
 def home(request):
     """Homepage view showing featured packages, testimonials, etc."""
-    featured_packages = Package.objects.filter(featured=True)[:6]
+    featured_packages = Package.objects.filter(featured=True).prefetch_related('destinations')[:6]
     national_packages = Package.objects.filter(type='national', best_seller=True)[:3]
     international_packages = Package.objects.filter(type='international', best_seller=True)[:3]
     testimonials = Testimonial.objects.all().order_by('-created_at')[:6]
@@ -25,18 +81,22 @@ def home(request):
     }
     return render(request, 'travel/home.html', context)
 
+@query_budget(4)
 def about(request):
     """About Us page view"""
     return render(request, 'travel/about.html')
 
+@query_budget(12)
+@rate_limit('contact')
 def contact(request):
     """Contact page with contact form"""
     if request.method == 'POST':
         # Process the contact form submission
+        from bookings import spam
         from bookings.models import ContactInquiry
         
         try:
-            ContactInquiry.objects.create(
+            inquiry = ContactInquiry.objects.create(
                 name=request.POST.get('name'),
                 email=request.POST.get('email'),
                 phone=request.POST.get('phone', ''),
@@ -44,6 +104,8 @@ def contact(request):
                 message=request.POST.get('message'),
                 user=request.user if request.user.is_authenticated else None,
             )
+            # Spam gets the same response so senders can't probe the filter
+            spam.check_submission('contact', inquiry)
             messages.success(request, 'Your message has been sent. We will contact you shortly!')
             return redirect('contact')
         except Exception as e:
@@ -51,20 +113,31 @@ def contact(request):
     
     return render(request, 'travel/contact.html')
 
+# The footer form is also served from static exports, which can't carry a CSRF cookie.
+# Subscribing is double opt-in and rate limited, so a forged POST gains nothing.
+@csrf_exempt
+@query_budget(6)
+@rate_limit('newsletter')
 def newsletter_subscribe(request):
     """Process newsletter subscription"""
     if request.method == 'POST':
-        email = request.POST.get('email')
-        if email:
-            # Here you would typically add the email to your newsletter service
-            # For now, we'll just show a success message
-            messages.success(request, f'Thank you for subscribing to our newsletter with {email}!')
-        else:
+        from django.core.exceptions import ValidationError
+        from django.core.validators import validate_email
+        from accounts.newsletter import subscribe
+        
+        email = request.POST.get('email', '').strip()
+        try:
+            validate_email(email)
+        except ValidationError:
             messages.error(request, 'Please provide a valid email address.')
+        else:
+            subscribe(email, user=request.user if request.user.is_authenticated else None)
+            messages.success(request, f'Thank you for subscribing! Please check {email} to confirm your subscription.')
     
     # Redirect back to the page where the form was submitted
     return redirect(request.META.get('HTTP_REFERER', 'home'))
 
+@query_budget(17)
 def package_list(request):
     """View for listing all packages with filters"""
     packages = Package.objects.all()
@@ -82,6 +155,35 @@ def package_list(request):
     if country:
         packages = packages.filter(country__name=country)
     
+    # Duration and price ranges (backed by the days and price indexes)
+    duration = request.GET.get('duration')
+    min_days, max_days = DURATION_PRESETS.get(duration, (None, None))
+    min_days = _int_param(request, 'min_days') or min_days
+    max_days = _int_param(request, 'max_days') or max_days
+    if min_days:
+        packages = packages.filter(days__gte=min_days)
+    if max_days:
+        packages = packages.filter(days__lte=max_days)
+    
+    min_price = _decimal_param(request, 'min_price')
+    max_price = _decimal_param(request, 'max_price')
+    if min_price is not None:
+        packages = packages.filter(price__gte=min_price)
+    if max_price is not None:
+        packages = packages.filter(price__lte=max_price)
+    
+    # Packages visiting any destination within `radius` km of a place ("near=goa", "near=15.49,73.82")
+    near = request.GET.get('near')
+    radius = _int_param(request, 'radius') or settings.GEO_NEAR_RADIUS_KM
+    radius = max(0, min(radius, settings.GEO_MAX_RADIUS_KM))  # Never hand the index a negative radius
+    if near:
+        origin = geo.resolve_place(near)
+        if origin is None:
+            packages = packages.none()
+        else:
+            nearby = geo.cities_within(*origin, radius)[:settings.GEO_NEAR_MAX_CITIES]
+            packages = packages.filter(destinations__in=[pk for km, pk in nearby]).distinct()
+    
     # Search functionality
     search_query = request.GET.get('q')
     if search_query:
@@ -95,13 +197,28 @@ def package_list(request):
     
     # Sorting
     sort_by = request.GET.get('sort', '-created_at')  # Default sort by latest
-    packages = packages.order_by(sort_by)
+    if sort_by == 'popular':
+        packages = packages.order_by('-popularity', '-created_at')
+    else:
+        packages = packages.order_by(sort_by)
     
     # Pagination
     paginator = Paginator(packages, 9)  # 9 packages per page
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
+    # With a travel date, show each package's seasonal adult price for that day (one batch for the page)
+    travel_date = _date_param(request, 'travel_date')
+    page_packages = list(page_obj.object_list)
+    price_source = 'price'
+    if travel_date:
+        calendars = pricing.price_calendars([package.id for package in page_packages], travel_date, 1)
+        for package in page_packages:
+            package.price_on_date = calendars[package.id][0][1] if package.id in calendars else package.price
+        price_source = 'price_on_date'
+    # One rate lookup for the whole page; templates use package.display_price
+    page_obj.object_list = currency.apply(page_packages, currency.preferred(request), source=price_source)
+    
     context = {
         'page_obj': page_obj,
         'package_type': package_type,
@@ -109,12 +226,24 @@ def package_list(request):
         'country': country,
         'search_query': search_query,
         'sort_by': sort_by,
+        'duration': duration,
+        'min_days': min_days,
+        'max_days': max_days,
+        'min_price': min_price,
+        'max_price': max_price,
+        'near': near,
+        'radius': radius,
+        'travel_date': travel_date,
+        'price_histogram': price_histogram(),
     }
     return render(request, 'travel/package_list.html', context)
 
+@query_budget(14)
 def package_detail(request, slug):
     """View for displaying package details"""
     package = get_object_or_404(Package, slug=slug)
+    if not export.rendering:
+        record_view(package.id)
     
     # Get related packages (same category, same country/state, etc.)
     related_packages = Package.objects.filter(
@@ -123,21 +252,57 @@ def package_detail(request, slug):
         Q(state=package.state)
     ).exclude(id=package.id)[:3]
     
+    # Other destinations close to this package's, and packages that visit them
+    destination_ids = set(package.destinations.values_list('id', flat=True))
+    nearby_destinations = _nearby_destinations(destination_ids)
+    nearby_packages = []
+    if nearby_destinations:
+        nearby_packages = Package.objects.filter(
+            destinations__in=[city.id for city, km in nearby_destinations]
+        ).exclude(id=package.id).distinct()[:3]
+    
+    display_currency = currency.preferred(request)
+    package.display_price = currency.convert(package.price, display_currency)
+    related_packages = currency.apply(related_packages, display_currency)
+    nearby_packages = currency.apply(nearby_packages, display_currency)
+    
     context = {
         'package': package,
         'related_packages': related_packages,
+        'nearby_destinations': nearby_destinations,
+        'nearby_packages': nearby_packages,
     }
     return render(request, 'travel/package_detail.html', context)
 
+@query_budget(4)
+def set_currency(request):
+    """Remember the visitor's display currency for this session"""
+    if request.method == 'POST':
+        code = request.POST.get('currency', '').upper()
+        if code in currency.rates.currencies():
+            request.session[currency.SESSION_KEY] = code
+    
+    # Redirect back to the page where the switcher was used
+    return redirect(request.META.get('HTTP_REFERER', 'home'))
+
+@query_budget(4)
 def state_list(request):
     """View for listing all states in India"""
     states = State.objects.all().order_by('name')
     context = {'states': states}
     return render(request, 'travel/state_list.html', context)
 
+@query_budget(6)
 def state_detail(request, slug):
     """View for displaying packages in a specific state"""
-    state = get_object_or_404(State, name__iexact=slug.replace('-', ' '))
+    state_id = slugs.states.resolve(slug)
+    if state_id is None:
+        # Old name-style URLs redirect permanently to the stored slug
+        canonical = slugs.states.canonical_for_legacy(slug)
+        if canonical is None:
+            raise Http404('No State matches the given query.')
+        return redirect('state_detail', slug=canonical, permanent=True)
+    state = get_object_or_404(State, pk=state_id)
     packages = Package.objects.filter(state=state)
     
     context = {
@@ -146,15 +311,24 @@ def state_detail(request, slug):
     }
     return render(request, 'travel/state_detail.html', context)
 
+@query_budget(4)
 def country_list(request):
     """View for listing all countries"""
     countries = Country.objects.all().order_by('name')
     context = {'countries': countries}
     return render(request, 'travel/country_list.html', context)
 
+@query_budget(6)
 def country_detail(request, slug):
     """View for displaying packages in a specific country"""
-    country = get_object_or_404(Country, name__iexact=slug.replace('-', ' '))
+    country_id = slugs.countries.resolve(slug)
+    if country_id is None:
+        # Old name-style URLs redirect permanently to the stored slug
+        canonical = slugs.countries.canonical_for_legacy(slug)
+        if canonical is None:
+            raise Http404('No Country matches the given query.')
+        return redirect('country_detail', slug=canonical, permanent=True)
+    country = get_object_or_404(Country, pk=country_id)
     packages = Package.objects.filter(country=country)
     
     context = {
@@ -163,14 +337,17 @@ def country_detail(request, slug):
     }
     return render(request, 'travel/country_detail.html', context)
 
+@query_budget(14)
+@rate_limit('custom_tour')
 def custom_tour(request):
     """Custom tour request page with form"""
     if request.method == 'POST':
         # Process the custom tour request form
+        from bookings import spam
         from bookings.models import CustomTourRequest
         
         try:
-            CustomTourRequest.objects.create(
+            tour_request = CustomTourRequest.objects.create(
                 name=request.POST.get('name'),
                 email=request.POST.get('email'),
                 phone=request.POST.get('phone'),
@@ -186,6 +363,7 @@ def custom_tour(request):
                 special_requirements=request.POST.get('special_requirements', ''),
                 user=request.user if request.user.is_authenticated else None,
             )
+            spam.check_submission('custom_tour', tour_request)
             messages.success(request, 'Your custom tour request has been submitted successfully! Our team will contact you shortly.')
             return redirect('home')
         except Exception as e:
@@ -201,14 +379,17 @@ def custom_tour(request):
     }
     return render(request, 'travel/custom_tour.html', context)
 
+@query_budget(4)
 def privacy_policy(request):
     """Privacy policy page"""
     return render(request, 'travel/privacy_policy.html')
 
+@query_budget(4)
 def terms(request):
     """Terms and conditions page"""
     return render(request, 'travel/terms.html')
 
+@query_budget(8)
 def sitemap(request):
     """HTML sitemap page"""
     # Get all packages categorized by type